@@ -1,6 +0,0 @@
-class User:
-    pass
-
-
-class Follow:
-    objects = None
\ No newline at end of file
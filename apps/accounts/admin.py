@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.utils.translation import gettext_lazy as _
-from .models import User, Follow
+from .models import User, Follow, UserSuggestion
 
 
 @admin.register(User)
@@ -40,3 +40,12 @@ class FollowAdmin(admin.ModelAdmin):
     search_fields = ('follower__username', 'following__username')
     raw_id_fields = ('follower', 'following')
     ordering = ('-created_at',)
+
+
+@admin.register(UserSuggestion)
+class UserSuggestionAdmin(admin.ModelAdmin):
+    """Административная панель для рекомендаций пользователей"""
+    list_display = ('user', 'suggested', 'mutuals_count', 'computed_at')
+    search_fields = ('user__username', 'suggested__username')
+    raw_id_fields = ('user', 'suggested')
+    ordering = ('user', '-mutuals_count')
@@ -0,0 +1,29 @@
+"""Асинхронный вариант профиля пользователя (для ASGI)"""
+from asgiref.sync import sync_to_async
+from rest_framework.exceptions import NotFound
+
+from core.async_api import async_api_view, json_response
+from .cache import attach_profile_counts
+from .graph import follow_graph
+from .models import User
+from .serializers import UserProfileSerializer
+from .viewer import VIEWER_STATE_CONTEXT_KEY, ViewerState
+
+
+@async_api_view(login_required=False)
+async def user_detail(request, username):
+    """Просмотр профиля другого пользователя"""
+    user = await User.objects.filter(username=username).afirst()
+    if user is None:
+        raise NotFound('Пользователь не найден')
+
+    # Счетчики профиля - из кэша, как в UserDetailView
+    await sync_to_async(attach_profile_counts)(user)
+    context = {'request': request}
+    if not request.user.is_authenticated:
+        return json_response(UserProfileSerializer(user, context=context).data)
+
+    is_following = await sync_to_async(follow_graph.is_following)(request.user, user.pk)
+    viewer = context[VIEWER_STATE_CONTEXT_KEY] = ViewerState(request.user)
+    viewer.set_following([user.pk], [user.pk] if is_following else [])
+    return json_response(UserProfileSerializer(user, context=context).data)
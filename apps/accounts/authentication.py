@@ -0,0 +1,111 @@
+"""
+JWT-аутентификация без чтения пользователя из БД на каждый запрос.
+
+Токены выпускаются issue_tokens(): кроме id в них записаны username и
+is_private. StatelessJWTAuthentication строит по ним объект User, у которого
+остальные поля отложены (deferred): первое обращение к любому из них
+перечитывает строку целиком одним запросом (User.refresh_from_db). Номер
+feed_version, нужный ETag и графу подписок, берется из кэша объектов.
+
+Отключенный или удаленный пользователь попадает в revoked_users - небольшой
+LRU процесса, который проверяется до кэша. В других процессах его токен
+отклоняется после сброса кэша feed_version (общий уровень) и в любом случае
+не позже истечения access-токена: обновление токена (refresh_token)
+перечитывает пользователя из БД и переписывает claims.
+"""
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import DEFERRED
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .cache import feed_versions
+from .models import User
+
+TOKEN_CLAIMS = ('username', 'is_private')
+
+
+class RevokedUsers:
+    """ID недавно отключенных пользователей; запись живет не дольше access-токена"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+
+    def add(self, user_id):
+        self.entries[user_id] = time.monotonic()
+        self.entries.move_to_end(user_id)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def discard(self, user_id):
+        self.entries.pop(user_id, None)
+
+    def __contains__(self, user_id):
+        revoked_at = self.entries.get(user_id)
+        if revoked_at is None:
+            return False
+        if time.monotonic() - revoked_at > api_settings.ACCESS_TOKEN_LIFETIME.total_seconds():
+            # Токены, выданные до отключения, уже истекли
+            self.discard(user_id)
+            return False
+        return True
+
+
+revoked_users = RevokedUsers(settings.JWT_REVOKED_USERS_MAX_ENTRIES)
+
+
+def set_claims(token, user):
+    for claim in TOKEN_CLAIMS:
+        token[claim] = getattr(user, claim)
+    return token
+
+
+def issue_tokens(user):
+    """Refresh-токен с claims пользователя (access-токен получает их копию)"""
+    return set_claims(RefreshToken.for_user(user), user)
+
+
+def user_from_token(token):
+    """
+    User с полями из claims токена без запроса к БД; None для токена,
+    выпущенного без claims (такого пользователя нужно загрузить)
+    """
+    try:
+        # simplejwt записывает id строкой
+        user_id = User._meta.pk.to_python(token[api_settings.USER_ID_CLAIM])
+        claims = {claim: token[claim] for claim in TOKEN_CLAIMS}
+    except KeyError:
+        return None
+
+    if user_id in revoked_users:
+        raise AuthenticationFailed('Пользователь не найден или отключен', code='user_inactive')
+    feed_version = feed_versions.get_many([user_id]).get(user_id)
+    if feed_version is None:
+        raise AuthenticationFailed('Пользователь не найден или отключен', code='user_inactive')
+
+    values = {
+        api_settings.USER_ID_FIELD: user_id,
+        'is_active': True,
+        'feed_version': feed_version,
+        **claims,
+    }
+    names = [field.attname for field in User._meta.concrete_fields]
+    user = User.from_db(DEFAULT_DB_ALIAS, names, [values.get(name, DEFERRED) for name in names])
+    user.from_token = True
+    return user
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication, которая берет пользователя из claims токена"""
+
+    def get_user(self, validated_token):
+        user = user_from_token(validated_token)
+        if user is None:
+            return super().get_user(validated_token)
+        return user
@@ -0,0 +1,81 @@
+"""
+Кэш карточек пользователей (поля UserListSerializer) и счетчиков подписчиков.
+
+Карточка и счетчик хранятся отдельно: подписки меняются гораздо чаще
+профиля, и подписка сбрасывает только число. Числа подписок и постов для
+страницы профиля (и ее ETag) кэшируются так же. Инвалидация - в signals.py
+обоих приложений.
+
+Номер feed_version активных пользователей нужен аутентификации по токену
+(authentication.py) на каждый запрос; он меняется при каждой подписке и
+отписке, поэтому при общем уровне хранится только в нем.
+"""
+from django.db.models import Count
+
+from core.object_cache import ObjectCache
+from .models import User, Follow
+
+CARD_FIELDS = ('id', 'username', 'first_name', 'last_name', 'avatar', 'renditions', 'is_private')
+
+
+def build_cards(pks):
+    return {card['id']: card for card in User.objects.filter(pk__in=pks).values(*CARD_FIELDS)}
+
+
+def build_followers_counts(pks):
+    counts = dict(
+        Follow.objects.filter(following_id__in=pks)
+        .values_list('following_id').annotate(total=Count('pk')).order_by()
+    )
+    return {pk: counts.get(pk, 0) for pk in pks}
+
+
+def build_profile_counts(pks):
+    """{id: (число подписок, число постов)}"""
+    from apps.posts.models import Post
+
+    following = dict(
+        Follow.objects.filter(follower_id__in=pks)
+        .values_list('follower_id').annotate(total=Count('pk')).order_by()
+    )
+    posts = dict(
+        Post.objects.filter(author_id__in=pks)
+        .values_list('author_id').annotate(total=Count('pk')).order_by()
+    )
+    return {pk: (following.get(pk, 0), posts.get(pk, 0)) for pk in pks}
+
+
+def build_feed_versions(pks):
+    """{id: feed_version}; отключенных и удаленных пользователей в результате нет"""
+    return dict(User.objects.filter(pk__in=pks, is_active=True).values_list('pk', 'feed_version'))
+
+
+user_cards = ObjectCache('user_card', 1, build_cards)
+followers_counts = ObjectCache('followers_count', 1, build_followers_counts)
+profile_counts = ObjectCache('profile_counts', 1, build_profile_counts)
+feed_versions = ObjectCache('feed_version', 1, build_feed_versions, local=False)
+
+
+def user_from_card(card):
+    user = User(**card)
+    user._state.adding = False
+    user._state.db = 'default'
+    return user
+
+
+def cached_users(pks):
+    """{id: User} из кэша карточек, с followers_total; удаленных пользователей нет"""
+    cards = user_cards.get_many(pks)
+    counts = followers_counts.get_many(cards)
+    users = {}
+    for pk, card in cards.items():
+        user = users[pk] = user_from_card(card)
+        user.followers_total = counts[pk]
+    return users
+
+
+def attach_profile_counts(user):
+    """Счетчики профиля из кэша: followers_total, following_total, posts_total"""
+    user.followers_total = followers_counts.get_many([user.pk])[user.pk]
+    user.following_total, user.posts_total = profile_counts.get_many([user.pk])[user.pk]
+    return user
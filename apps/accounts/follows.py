@@ -0,0 +1,113 @@
+"""
+Подписка и отписка списком пользователей.
+
+Имена проверяются одним запросом, текущие подписки берутся из графа
+подписок, строки Follow создаются одним INSERT ... ON CONFLICT DO NOTHING
+RETURNING и удаляются одним DELETE. Статус «подписан» и фоновая задача для
+ленты - только для строк, которые вставил этот запрос: подписка, созданная
+параллельно после чтения графа, считается уже существовавшей. Кэши,
+feed_version и задача обновляются один раз на пакет. Результат - статус по
+каждому имени.
+"""
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.jobs.queue import enqueue
+from apps.posts.tasks import follows_created, follows_deleted
+from .graph import follow_graph
+from .models import User, Follow
+from .signals import batched_follow_changes, follows_changed
+
+FOLLOWED = 'followed'
+ALREADY_FOLLOWING = 'already_following'
+UNFOLLOWED = 'unfollowed'
+NOT_FOLLOWING = 'not_following'
+NOT_FOUND = 'not_found'
+SELF = 'self'
+
+INSERT_FOLLOWS_SQL = '''
+    INSERT INTO follows (follower_id, following_id, created_at)
+    VALUES {values}
+    ON CONFLICT (follower_id, following_id) DO NOTHING
+    RETURNING id, following_id
+'''
+
+
+def resolve_usernames(usernames):
+    return dict(User.objects.filter(username__in=usernames).values_list('username', 'pk'))
+
+
+def insert_follows(follower_id, following_ids):
+    """Вставить подписки, которых еще нет; {following_id: id новой строки}"""
+    created_at = Follow._meta.get_field('created_at').get_db_prep_value(timezone.now(), connection)
+    sql = INSERT_FOLLOWS_SQL.format(values=', '.join(['(%s, %s, %s)'] * len(following_ids)))
+    params = [value for following_id in following_ids for value in (follower_id, following_id, created_at)]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return {following_id: pk for pk, following_id in cursor.fetchall()}
+
+
+def follow_many(user, usernames):
+    """Подписать user на пользователей usernames; [{username, status}, ...]"""
+    found = resolve_usernames(usernames)
+    already = follow_graph.is_following_many(user, found.values())
+    candidates = [pk for pk in found.values() if pk != user.pk and pk not in already]
+
+    created = {}
+    if candidates:
+        with transaction.atomic():
+            created = insert_follows(user.pk, candidates)
+            if created:
+                new_ids = sorted(created)
+                enqueue(
+                    follows_created,
+                    idempotency_key=f'follows-created:{min(created.values())}',
+                    follower_id=user.pk,
+                    following_ids=new_ids,
+                )
+                # Вставка в обход ORM не отправляет сигналы
+                follows_changed([user.pk], new_ids)
+
+    results = []
+    for username in usernames:
+        pk = found.get(username)
+        if pk is None:
+            status = NOT_FOUND
+        elif pk == user.pk:
+            status = SELF
+        elif pk in created:
+            status = FOLLOWED
+        else:
+            status = ALREADY_FOLLOWING
+        results.append({'username': username, 'status': status})
+    return results
+
+
+def unfollow_many(user, usernames):
+    """Отписать user от пользователей usernames; [{username, status}, ...]"""
+    found = resolve_usernames(usernames)
+    follows = dict(
+        Follow.objects.filter(follower=user, following_id__in=found.values()).values_list('following_id', 'pk')
+    )
+
+    if follows:
+        with transaction.atomic(), batched_follow_changes():
+            enqueue(
+                follows_deleted,
+                idempotency_key=f'follows-deleted:{min(follows.values())}',
+                follower_id=user.pk,
+                following_ids=list(follows),
+            )
+            Follow.objects.filter(pk__in=follows.values()).delete()
+
+    results = []
+    for username in usernames:
+        pk = found.get(username)
+        if pk is None:
+            status = NOT_FOUND
+        elif pk in follows:
+            status = UNFOLLOWED
+        else:
+            status = NOT_FOLLOWING
+        results.append({'username': username, 'status': status})
+    return results
@@ -0,0 +1,93 @@
+"""
+Граф подписок в кэше объектов.
+
+Для пользователя хранятся отсортированные массивы ID (array 'q', 8 байт на
+связь): на кого он подписан и кто подписан на него. Проверка подписки -
+двоичный поиск, общие связи - слияние двух отсортированных массивов, без
+запросов к БД, если массивы уже в кэше.
+
+Массив подписок хранится под ключом (id, feed_version). User.feed_version -
+счетчик только подписок: его увеличивают подписка и отписка (follows_changed
+в signals.py), поэтому после них ключ меняется во всех процессах сразу, а
+лайки и остальные действия пользователя массив не сбрасывают. Массив
+подписчиков сбрасывается сигналом Follow.
+Вытеснение - LRU локального уровня ObjectCache (MAX_ENTRIES кэша 'objects').
+"""
+from array import array
+from bisect import bisect_left
+
+from core.object_cache import ObjectCache
+from .models import Follow
+
+
+def build_adjacency(field, other, pks):
+    ids = {pk: array('q') for pk in pks}
+    rows = Follow.objects.filter(**{f'{field}__in': pks}).values_list(field, other).order_by(field, other)
+    for pk, other_id in rows.iterator(chunk_size=10000):
+        ids[pk].append(other_id)
+    return ids
+
+
+def build_following(keys):
+    ids = build_adjacency('follower_id', 'following_id', {pk for pk, _ in keys})
+    return {key: ids[key[0]] for key in keys}
+
+
+def build_followers(pks):
+    return build_adjacency('following_id', 'follower_id', pks)
+
+
+def contains(ids, value):
+    index = bisect_left(ids, value)
+    return index < len(ids) and ids[index] == value
+
+
+def intersection(left, right):
+    """Пересечение двух отсортированных массивов слиянием"""
+    result = []
+    i = j = 0
+    while i < len(left) and j < len(right):
+        if left[i] == right[j]:
+            result.append(left[i])
+            i += 1
+            j += 1
+        elif left[i] < right[j]:
+            i += 1
+        else:
+            j += 1
+    return result
+
+
+class FollowGraph:
+    """Подписки и подписчики пользователей; у user должен быть актуальный feed_version"""
+
+    def __init__(self):
+        self.following = ObjectCache('following', 1, build_following)
+        self.followers = ObjectCache('followers', 1, build_followers)
+
+    def following_ids(self, user):
+        """Отсортированный массив ID пользователей, на которых подписан user"""
+        key = (user.pk, user.feed_version)
+        return self.following.get_many([key])[key]
+
+    def follower_ids(self, user_id):
+        """Отсортированный массив ID подписчиков пользователя"""
+        return self.followers.get_many([user_id])[user_id]
+
+    def is_following(self, viewer, user_id):
+        return contains(self.following_ids(viewer), user_id)
+
+    def is_following_many(self, viewer, user_ids):
+        """Множество тех из user_ids, на кого подписан viewer"""
+        following = self.following_ids(viewer)
+        return {user_id for user_id in user_ids if contains(following, user_id)}
+
+    def mutuals(self, viewer, user_id):
+        """ID подписок viewer, которые подписаны на user_id («в подписчиках есть ...»)"""
+        return intersection(self.following_ids(viewer), self.follower_ids(user_id))
+
+    def invalidate_followers(self, user_ids):
+        self.followers.invalidate(user_ids)
+
+
+follow_graph = FollowGraph()
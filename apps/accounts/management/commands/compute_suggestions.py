@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from apps.accounts.models import User
+from apps.accounts.suggestions import compute_suggestions
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рекомендации «возможно, вы знакомы» (друзья друзей по числу общих связей)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('usernames', nargs='*', help='Пользователи (по умолчанию все активные)')
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(is_active=True)
+        if options['usernames']:
+            users = users.filter(username__in=options['usernames'])
+
+        processed, stored = compute_suggestions(users)
+        self.stdout.write(self.style.SUCCESS(f'Пользователей: {processed}, рекомендаций: {stored}'))
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.5 on 2026-10-16 22:29
+
+from django.db import migrations, models
+
+from core.operations import PortableAddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY нельзя выполнять внутри транзакции
+    atomic = False
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        PortableAddIndexConcurrently(
+            model_name='follow',
+            index=models.Index(fields=['following', '-created_at'], include=('follower',), name='follows_following_created_idx'),
+        ),
+        PortableAddIndexConcurrently(
+            model_name='follow',
+            index=models.Index(fields=['follower', '-created_at'], include=('following',), name='follows_follower_created_idx'),
+        ),
+    ]
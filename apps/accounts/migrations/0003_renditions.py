@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-16 22:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='renditions',
+            field=models.JSONField(blank=True, default=dict, verbose_name='уменьшенные копии аватара'),
+        ),
+    ]
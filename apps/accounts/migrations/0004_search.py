@@ -0,0 +1,36 @@
+# Generated by Django 5.2.5 on 2026-10-16 22:48
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+from core.operations import PostgresAddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY нельзя выполнять внутри транзакции
+    atomic = False
+
+    dependencies = [
+        ('accounts', '0003_renditions'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        # На других СУБД TrigramExtension ничего не делает
+        TrigramExtension(),
+        PostgresAddIndexConcurrently(
+            model_name='user',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(django.db.models.functions.comparison.Cast('username', models.TextField())), name='gin_trgm_ops'), name='users_username_trgm_idx'),
+        ),
+        PostgresAddIndexConcurrently(
+            model_name='user',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(django.db.models.functions.comparison.Cast('first_name', models.TextField())), name='gin_trgm_ops'), name='users_first_name_trgm_idx'),
+        ),
+        PostgresAddIndexConcurrently(
+            model_name='user',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(django.db.models.functions.comparison.Cast('last_name', models.TextField())), name='gin_trgm_ops'), name='users_last_name_trgm_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.5 on 2026-10-16 23:02
+
+from django.db import migrations, models
+
+from core.operations import AddFieldWithoutRebuild
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_search'),
+    ]
+
+    operations = [
+        AddFieldWithoutRebuild(
+            model_name='user',
+            name='feed_version',
+            field=models.PositiveBigIntegerField(default=0, editable=False, verbose_name='версия ленты'),
+        ),
+    ]
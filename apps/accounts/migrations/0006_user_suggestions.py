@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-16 23:09
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_feed_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserSuggestion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mutuals_count', models.PositiveIntegerField(verbose_name='общих связей')),
+                ('computed_at', models.DateTimeField(verbose_name='дата расчета')),
+                ('suggested', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='рекомендованный пользователь')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='suggestions', to=settings.AUTH_USER_MODEL, verbose_name='пользователь')),
+            ],
+            options={
+                'verbose_name': 'Рекомендация пользователя',
+                'verbose_name_plural': 'Рекомендации пользователей',
+                'db_table': 'user_suggestions',
+                'indexes': [models.Index(fields=['user', '-mutuals_count'], name='user_suggestions_rank_idx')],
+                'unique_together': {('user', 'suggested')},
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Триграммные индексы 0004_search остаются в PostgreSQL, но убираются из
+    состояния модели: индексы только для PostgreSQL в Meta.indexes ломают
+    пересоздание таблицы users на SQLite (например, при AlterField)
+    """
+
+    dependencies = [
+        ('accounts', '0006_user_suggestions'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.RemoveIndex(model_name='user', name='users_username_trgm_idx'),
+                migrations.RemoveIndex(model_name='user', name='users_first_name_trgm_idx'),
+                migrations.RemoveIndex(model_name='user', name='users_last_name_trgm_idx'),
+            ],
+        ),
+    ]
@@ -13,8 +13,14 @@ class User(AbstractUser):
         blank=True,
         null=True
     )
+    renditions = models.JSONField(_('уменьшенные копии аватара'), default=dict, blank=True)
     website = models.URLField(_('веб-сайт'), blank=True)
     is_private = models.BooleanField(_('приватный аккаунт'), default=False)
+    # Растет только при подписках и отписках пользователя: от них зависят состав
+    # ленты и is_following в ответах (номер входит в ETag, core.conditional) и ключ
+    # массива подписок в FollowGraph. Лайки его не меняют: is_liked входит в ETag
+    # через аннотацию viewer_has_liked, без записи в users на каждый лайк
+    feed_version = models.PositiveBigIntegerField(_('версия ленты'), default=0, editable=False)
     
     created_at = models.DateTimeField(_('дата создания'), auto_now_add=True)
     updated_at = models.DateTimeField(_('дата обновления'), auto_now=True)
@@ -26,10 +32,20 @@ class User(AbstractUser):
         verbose_name = _('Пользователь')
         verbose_name_plural = _('Пользователи')
         db_table = 'users'
+        # Триграммные GIN-индексы (pg_trgm) по username, first_name и last_name
+        # есть только в PostgreSQL и живут в миграциях (0004_search, 0007), а не
+        # в состоянии модели: иначе пересоздание таблицы на SQLite падает на них
 
     def __str__(self):
         return self.username
 
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        # Пользователь из claims токена (authentication.py) загружен не целиком:
+        # первое обращение к отложенному полю перечитывает всю строку одним запросом
+        if fields is not None and self.__dict__.pop('from_token', False):
+            fields = [field.attname for field in self._meta.concrete_fields]
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+
     @property
     def full_name(self):
         return f"{self.first_name} {self.last_name}".strip()
@@ -56,6 +72,19 @@ class Follow(models.Model):
         verbose_name_plural = _('Подписки')
         db_table = 'follows'
         unique_together = ('follower', 'following')
+        indexes = [
+            # Покрывающие индексы для списков подписчиков и подписок
+            models.Index(
+                fields=['following', '-created_at'],
+                include=['follower'],
+                name='follows_following_created_idx',
+            ),
+            models.Index(
+                fields=['follower', '-created_at'],
+                include=['following'],
+                name='follows_follower_created_idx',
+            ),
+        ]
         constraints = [
             models.CheckConstraint(
                 check=~models.Q(follower=models.F('following')),
@@ -65,3 +94,34 @@ class Follow(models.Model):
 
     def __str__(self):
         return f"{self.follower.username} подписан на {self.following.username}"
+
+
+class UserSuggestion(models.Model):
+    """Рекомендованный пользователь («возможно, вы знакомы»), рассчитывается compute_suggestions"""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='suggestions',
+        verbose_name=_('пользователь')
+    )
+    suggested = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name=_('рекомендованный пользователь')
+    )
+    # Сколько подписок пользователя подписаны на рекомендованного
+    mutuals_count = models.PositiveIntegerField(_('общих связей'))
+    computed_at = models.DateTimeField(_('дата расчета'))
+
+    class Meta:
+        verbose_name = _('Рекомендация пользователя')
+        verbose_name_plural = _('Рекомендации пользователей')
+        db_table = 'user_suggestions'
+        unique_together = ('user', 'suggested')
+        indexes = [
+            models.Index(fields=['user', '-mutuals_count'], name='user_suggestions_rank_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.suggested_id} для {self.user_id} ({self.mutuals_count})"
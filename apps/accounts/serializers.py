@@ -1,7 +1,10 @@
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
 from .models import User, Follow
+from .viewer import ViewerStateListSerializer, get_followers_count, get_viewer_state
+from core.renditions import rendition_urls, schedule_renditions, strip_metadata
 
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
@@ -51,30 +54,47 @@ class UserProfileSerializer(serializers.ModelSerializer):
     following_count = serializers.SerializerMethodField()
     posts_count = serializers.SerializerMethodField()
     is_following = serializers.SerializerMethodField()
+    avatar_renditions = serializers.SerializerMethodField()
 
     class Meta:
         model = User
         fields = (
             'id', 'username', 'email', 'first_name', 'last_name',
-            'bio', 'avatar', 'website', 'is_private',
+            'bio', 'avatar', 'avatar_renditions', 'website', 'is_private',
             'followers_count', 'following_count', 'posts_count',
             'is_following', 'created_at'
         )
         read_only_fields = ('id', 'created_at', 'followers_count', 'following_count', 'posts_count', 'is_following')
 
+    def validate_avatar(self, value):
+        return strip_metadata(value) if value else value
+
+    def update(self, instance, validated_data):
+        user = super().update(instance, validated_data)
+        if 'avatar' in validated_data:
+            schedule_renditions(user, 'avatar', 'avatar')
+        return user
+
+    def get_avatar_renditions(self, obj):
+        return rendition_urls(obj.renditions, self.context.get('request'))
+
     def get_followers_count(self, obj):
-        return obj.followers.count()
+        return get_followers_count(self.context, obj)
 
     def get_following_count(self, obj):
+        if hasattr(obj, 'following_total'):
+            return obj.following_total
         return obj.following.count()
 
     def get_posts_count(self, obj):
+        if hasattr(obj, 'posts_total'):
+            return obj.posts_total
         return obj.posts.count()
 
     def get_is_following(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return Follow.objects.filter(follower=request.user, following=obj).exists()
+        viewer = get_viewer_state(self.context)
+        if viewer is not None:
+            return viewer.is_following(obj.pk)
         return False
 
 
@@ -82,23 +102,40 @@ class UserListSerializer(serializers.ModelSerializer):
     """Сериализатор для списка пользователей"""
     followers_count = serializers.SerializerMethodField()
     is_following = serializers.SerializerMethodField()
+    avatar_renditions = serializers.SerializerMethodField()
 
     class Meta:
         model = User
         fields = (
             'id', 'username', 'first_name', 'last_name',
-            'avatar', 'is_private', 'followers_count', 'is_following'
+            'avatar', 'avatar_renditions', 'is_private', 'followers_count', 'is_following'
         )
+        list_serializer_class = ViewerStateListSerializer
+
+    @staticmethod
+    def collect_viewer_ids(obj, user_ids, post_ids):
+        user_ids.add(obj.pk)
 
     def get_followers_count(self, obj):
-        return obj.followers.count()
+        return get_followers_count(self.context, obj)
 
     def get_is_following(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return Follow.objects.filter(follower=request.user, following=obj).exists()
+        viewer = get_viewer_state(self.context)
+        if viewer is not None:
+            return viewer.is_following(obj.pk)
         return False
 
+    def get_avatar_renditions(self, obj):
+        return rendition_urls(obj.renditions, self.context.get('request'))
+
+
+class UserSuggestionSerializer(UserListSerializer):
+    """Рекомендованный пользователь с числом общих связей"""
+    mutuals_count = serializers.IntegerField(read_only=True)
+
+    class Meta(UserListSerializer.Meta):
+        fields = UserListSerializer.Meta.fields + ('mutuals_count',)
+
 
 class FollowSerializer(serializers.ModelSerializer):
     """Сериализатор для подписок"""
@@ -109,6 +146,11 @@ class FollowSerializer(serializers.ModelSerializer):
         model = Follow
         fields = ('id', 'follower', 'following', 'created_at')
         read_only_fields = ('id', 'created_at')
+        list_serializer_class = ViewerStateListSerializer
+
+    @staticmethod
+    def collect_viewer_ids(obj, user_ids, post_ids):
+        user_ids.update((obj.follower_id, obj.following_id))
 
 
 class PasswordChangeSerializer(serializers.Serializer):
@@ -127,3 +169,15 @@ class PasswordChangeSerializer(serializers.Serializer):
         if not user.check_password(value):
             raise serializers.ValidationError("Неверный текущий пароль.")
         return value
+
+
+class BulkUsernamesSerializer(serializers.Serializer):
+    """Список имен пользователей для пакетной подписки и отписки"""
+    usernames = serializers.ListField(
+        child=serializers.CharField(max_length=150),
+        allow_empty=False,
+        max_length=settings.BULK_ACTION_MAX_ITEMS,
+    )
+
+    def validate_usernames(self, value):
+        return list(dict.fromkeys(value))
@@ -0,0 +1,63 @@
+"""Инвалидация кэша карточек пользователей, счетчиков и графа подписок"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.renditions import renditions_updated
+from .authentication import revoked_users
+from .cache import feed_versions, followers_counts, profile_counts, user_cards
+from .graph import follow_graph
+from .models import User, Follow
+from .viewer import bump_feed_version
+
+_follow_batch = ContextVar('follow_batch', default=None)
+
+
+def follows_changed(follower_ids, following_ids):
+    """Сбросить кэши после изменения подписок follower_ids -> following_ids"""
+    followers_counts.invalidate(following_ids)
+    profile_counts.invalidate(follower_ids)
+    follow_graph.invalidate_followers(following_ids)
+    # Новый ключ массива подписок в FollowGraph и новые ETag подписчиков,
+    # в том числе при каскадном удалении и правках из админки
+    bump_feed_version(follower_ids)
+
+
+@contextmanager
+def batched_follow_changes():
+    """Сигналы Follow внутри блока копятся и обрабатываются одним follows_changed()"""
+    changes = set()
+    token = _follow_batch.set(changes)
+    try:
+        yield
+    finally:
+        _follow_batch.reset(token)
+    if changes:
+        follows_changed({follower for follower, _ in changes}, {following for _, following in changes})
+
+
+@receiver([post_save, post_delete], sender=User)
+def user_changed(sender, instance, **kwargs):
+    user_cards.invalidate([instance.pk])
+    feed_versions.invalidate([instance.pk])
+    # Токены отключенного или удаленного пользователя перестают приниматься сразу
+    if kwargs.get('signal') is post_delete or not instance.is_active:
+        revoked_users.add(instance.pk)
+    else:
+        revoked_users.discard(instance.pk)
+
+
+@receiver(renditions_updated, sender=User)
+def avatar_renditions_updated(sender, pk, **kwargs):
+    user_cards.invalidate([pk])
+
+
+@receiver([post_save, post_delete], sender=Follow)
+def follow_changed(sender, instance, **kwargs):
+    batch = _follow_batch.get()
+    if batch is not None:
+        batch.add((instance.follower_id, instance.following_id))
+    else:
+        follows_changed([instance.follower_id], [instance.following_id])
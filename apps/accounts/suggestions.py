@@ -0,0 +1,105 @@
+"""
+Рекомендации «возможно, вы знакомы»: друзья друзей по числу общих связей.
+
+Кандидаты для пользователя - те, на кого подписаны его подписки, кроме него
+самого и тех, на кого он уже подписан; вес кандидата - сколько подписок
+пользователя на него подписано. Расчет идет пакетами по
+SUGGESTIONS_BATCH_SIZE пользователей: на пакет один запрос с самосоединением
+follows, GROUP BY и ROW_NUMBER() (лучшие SUGGESTIONS_PER_USER на
+пользователя считает сама СУБД), затем строки UserSuggestion пакета
+заменяются целиком. Запускается командой compute_suggestions по расписанию.
+"""
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .cache import cached_users
+from .graph import follow_graph
+from .models import User, UserSuggestion
+
+MUTUALS_SQL = '''
+    SELECT user_id, suggested_id, mutuals FROM (
+        SELECT
+            f1.follower_id AS user_id,
+            f2.following_id AS suggested_id,
+            COUNT(*) AS mutuals,
+            ROW_NUMBER() OVER (
+                PARTITION BY f1.follower_id
+                ORDER BY COUNT(*) DESC, f2.following_id
+            ) AS position
+        FROM follows f1
+        JOIN follows f2 ON f2.follower_id = f1.following_id
+        JOIN users u ON u.id = f2.following_id AND u.is_active
+        WHERE f1.follower_id IN ({placeholders})
+            AND f2.following_id <> f1.follower_id
+            AND NOT EXISTS (
+                SELECT 1 FROM follows f3
+                WHERE f3.follower_id = f1.follower_id AND f3.following_id = f2.following_id
+            )
+        GROUP BY f1.follower_id, f2.following_id
+    ) ranked
+    WHERE position <= %s
+'''
+
+
+def mutual_counts(user_ids, limit):
+    """[(user_id, suggested_id, mutuals), ...]: лучшие limit кандидатов каждого пользователя"""
+    sql = MUTUALS_SQL.format(placeholders=', '.join(['%s'] * len(user_ids)))
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [*user_ids, limit])
+        return cursor.fetchall()
+
+
+def compute_batch(user_ids, now=None):
+    """Пересчитать рекомендации пакета пользователей; возвращает число строк"""
+    now = now or timezone.now()
+    suggestions = [
+        UserSuggestion(user_id=user_id, suggested_id=suggested_id, mutuals_count=mutuals, computed_at=now)
+        for user_id, suggested_id, mutuals in mutual_counts(user_ids, settings.SUGGESTIONS_PER_USER)
+    ]
+    with transaction.atomic():
+        UserSuggestion.objects.filter(user_id__in=user_ids).delete()
+        UserSuggestion.objects.bulk_create(suggestions, batch_size=1000)
+    return len(suggestions)
+
+
+def compute_suggestions(users=None):
+    """Пересчитать рекомендации пакетами; возвращает (пользователей, строк)"""
+    users = User.objects.filter(is_active=True) if users is None else users
+    user_ids = users.order_by('pk').values_list('pk', flat=True)
+    now = timezone.now()
+    batch = []
+    processed = stored = 0
+    for user_id in user_ids.iterator(chunk_size=settings.SUGGESTIONS_BATCH_SIZE):
+        batch.append(user_id)
+        if len(batch) == settings.SUGGESTIONS_BATCH_SIZE:
+            stored += compute_batch(batch, now)
+            processed += len(batch)
+            batch = []
+    if batch:
+        stored += compute_batch(batch, now)
+        processed += len(batch)
+    return processed, stored
+
+
+def suggested_users(user):
+    """
+    Рекомендованные пользователи из кэша карточек, с mutuals_count; те, на
+    кого пользователь подписался после расчета, отбрасываются по графу подписок
+    """
+    rows = list(
+        UserSuggestion.objects.filter(user=user)
+        .order_by('-mutuals_count', 'suggested_id')
+        .values_list('suggested_id', 'mutuals_count')
+    )
+    followed = follow_graph.is_following_many(user, [suggested_id for suggested_id, _ in rows])
+    rows = [(suggested_id, mutuals) for suggested_id, mutuals in rows if suggested_id not in followed]
+
+    users = cached_users([suggested_id for suggested_id, _ in rows])
+    page = []
+    for suggested_id, mutuals in rows:
+        if suggested_id in users:
+            suggested = users[suggested_id]
+            suggested.mutuals_count = mutuals
+            page.append(suggested)
+    return page
@@ -0,0 +1,115 @@
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.accounts.authentication import StatelessJWTAuthentication, issue_tokens, revoked_users
+from apps.accounts.models import User
+
+
+@override_settings(REQUEST_METRICS={'SAMPLE_RATE': 0})
+class StatelessJWTAuthenticationTests(TestCase):
+
+    def setUp(self):
+        for cache in caches.all(initialized_only=True):
+            cache.clear()
+        self.user = User.objects.create_user(
+            username='alice', email='alice@example.com', bio='о себе', is_private=True
+        )
+        self.addCleanup(revoked_users.discard, self.user.pk)
+
+    def authenticate(self, token):
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        return StatelessJWTAuthentication().authenticate(request)[0]
+
+    def test_user_from_claims(self):
+        token = issue_tokens(self.user).access_token
+        self.authenticate(token)  # номер feed_version попадает в кэш объектов
+
+        with self.assertNumQueries(0):
+            user = self.authenticate(token)
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertIsInstance(user.pk, int)
+        self.assertEqual(user.username, 'alice')
+        self.assertTrue(user.is_private)
+        self.assertTrue(user.is_authenticated)
+        self.assertEqual(user.feed_version, self.user.feed_version)
+
+    def test_deferred_fields_reload_once(self):
+        user = self.authenticate(issue_tokens(self.user).access_token)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(user.email, 'alice@example.com')
+            self.assertEqual(user.bio, 'о себе')
+            self.assertEqual(user.date_joined, self.user.date_joined)
+        self.assertFalse(hasattr(user, 'from_token'))
+
+    def test_token_without_claims_loads_user(self):
+        token = RefreshToken.for_user(self.user).access_token
+
+        with self.assertNumQueries(1):
+            user = self.authenticate(token)
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(user.get_deferred_fields(), set())
+
+    def test_deactivated_user_rejected(self):
+        token = issue_tokens(self.user).access_token
+        self.authenticate(token)
+
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(token)
+
+    def test_deactivated_user_rejected_in_other_process(self):
+        token = issue_tokens(self.user).access_token
+        self.authenticate(token)
+
+        self.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        # В другом процессе нет записи revoked_users, но кэш feed_version сброшен
+        revoked_users.discard(self.user.pk)
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(token)
+
+    def test_deleted_user_rejected(self):
+        token = issue_tokens(self.user).access_token
+        self.user.delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(token)
+
+    def test_reactivated_user_accepted(self):
+        token = issue_tokens(self.user).access_token
+        self.user.is_active = False
+        self.user.save()
+        self.user.is_active = True
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        self.assertEqual(self.authenticate(token).pk, self.user.pk)
+
+    def test_refresh_rewrites_claims_and_rejects_inactive(self):
+        refresh = issue_tokens(self.user)
+        User.objects.filter(pk=self.user.pk).update(username='alice2', is_private=False)
+
+        client = APIClient()
+        response = client.post('/api/accounts/refresh/', {'refresh': str(refresh)}, format='json')
+        self.assertEqual(response.status_code, 200)
+        user = self.authenticate(response.data['access'])
+        self.assertEqual(user.username, 'alice2')
+        self.assertFalse(user.is_private)
+
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        response = client.post('/api/accounts/refresh/', {'refresh': str(refresh)}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_revoked_token_gets_401(self):
+        token = issue_tokens(self.user).access_token
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(client.get('/api/accounts/profile/').status_code, 200)
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(client.get('/api/accounts/profile/').status_code, 401)
@@ -0,0 +1,75 @@
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import TestCase
+
+from apps.accounts import follows
+from apps.accounts.follows import (
+    ALREADY_FOLLOWING, FOLLOWED, NOT_FOLLOWING, NOT_FOUND, SELF, UNFOLLOWED, follow_many, unfollow_many
+)
+from apps.accounts.models import User, Follow
+from apps.jobs.models import Job
+
+
+class BulkFollowsTests(TestCase):
+
+    def setUp(self):
+        for cache in caches.all(initialized_only=True):
+            cache.clear()
+        self.user = User.objects.create_user(username='viewer', email='viewer@example.com')
+        for name in ('alice', 'bob', 'carol'):
+            User.objects.create_user(username=name, email=f'{name}@example.com')
+
+    def statuses(self, results):
+        return {result['username']: result['status'] for result in results}
+
+    def following(self):
+        return set(Follow.objects.filter(follower=self.user).values_list('following__username', flat=True))
+
+    def test_follow_many_statuses(self):
+        Follow.objects.create(follower=self.user, following=User.objects.get(username='alice'))
+        self.user.refresh_from_db(fields=['feed_version'])
+
+        results = follow_many(self.user, ['alice', 'bob', 'viewer', 'nobody'])
+
+        self.assertEqual(self.statuses(results), {
+            'alice': ALREADY_FOLLOWING, 'bob': FOLLOWED, 'viewer': SELF, 'nobody': NOT_FOUND,
+        })
+        self.assertEqual(self.following(), {'alice', 'bob'})
+        job = Job.objects.get(name='apps.posts.tasks.follows_created')
+        self.assertEqual(job.payload['following_ids'], [User.objects.get(username='bob').pk])
+
+    def test_follow_many_bumps_feed_version(self):
+        version = self.user.feed_version
+        follow_many(self.user, ['alice'])
+        self.user.refresh_from_db(fields=['feed_version'])
+        self.assertEqual(self.user.feed_version, version + 1)
+
+        # Повтор без новых подписок версию не меняет
+        follow_many(self.user, ['alice'])
+        self.user.refresh_from_db(fields=['feed_version'])
+        self.assertEqual(self.user.feed_version, version + 1)
+
+    def test_follow_many_concurrent_follow_is_already_following(self):
+        insert_follows = follows.insert_follows
+        alice = User.objects.get(username='alice')
+
+        def followed_concurrently(follower_id, following_ids):
+            # Другой запрос подписал пользователя после чтения графа
+            Follow.objects.create(follower_id=follower_id, following=alice)
+            return insert_follows(follower_id, following_ids)
+
+        with mock.patch.object(follows, 'insert_follows', followed_concurrently):
+            results = follow_many(self.user, ['alice', 'bob'])
+
+        self.assertEqual(self.statuses(results), {'alice': ALREADY_FOLLOWING, 'bob': FOLLOWED})
+        job = Job.objects.get(name='apps.posts.tasks.follows_created')
+        self.assertEqual(job.payload['following_ids'], [User.objects.get(username='bob').pk])
+
+    def test_unfollow_many_statuses(self):
+        follow_many(self.user, ['alice', 'bob'])
+
+        results = unfollow_many(self.user, ['alice', 'carol', 'nobody'])
+
+        self.assertEqual(self.statuses(results), {'alice': UNFOLLOWED, 'carol': NOT_FOLLOWING, 'nobody': NOT_FOUND})
+        self.assertEqual(self.following(), {'bob'})
@@ -0,0 +1,86 @@
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.accounts.graph import follow_graph
+from apps.accounts.models import User, Follow
+from apps.accounts.visibility import VisibilityResolver
+from apps.posts.models import Post
+
+
+class VisibilityResolverTests(TestCase):
+
+    def setUp(self):
+        for cache in caches.all(initialized_only=True):
+            cache.clear()
+        self.public = User.objects.create_user(username='public', email='public@example.com')
+        self.private = User.objects.create_user(username='private', email='private@example.com', is_private=True)
+        self.follower = User.objects.create_user(username='follower', email='follower@example.com')
+        self.stranger = User.objects.create_user(username='stranger', email='stranger@example.com')
+        Follow.objects.create(follower=self.follower, following=self.private)
+        self.follower.refresh_from_db(fields=['feed_version'])
+        self.public_post = Post.objects.create(author=self.public, image='posts/1.jpg')
+        self.private_post = Post.objects.create(author=self.private, image='posts/2.jpg')
+
+    def visible_posts(self, viewer):
+        return set(VisibilityResolver(viewer).filter(Post.objects.all()))
+
+    def test_private_author_visible_to_self_and_followers(self):
+        for viewer in (self.private, self.follower):
+            with self.subTest(viewer.username):
+                resolver = VisibilityResolver(viewer)
+                self.assertTrue(resolver.can_view(self.private))
+                self.assertEqual(resolver.visible_ids([self.public, self.private]), {self.public.pk, self.private.pk})
+                self.assertEqual(self.visible_posts(viewer), {self.public_post, self.private_post})
+
+    def test_private_author_hidden_from_others(self):
+        for viewer in (self.stranger, AnonymousUser()):
+            with self.subTest(str(viewer)):
+                resolver = VisibilityResolver(viewer)
+                self.assertFalse(resolver.can_view(self.private))
+                self.assertTrue(resolver.can_view(self.public))
+                self.assertEqual(resolver.visible_ids([self.public, self.private]), {self.public.pk})
+                self.assertEqual(self.visible_posts(viewer), {self.public_post})
+
+    def test_visible_ids_by_pk(self):
+        follow_graph.following_ids(self.stranger)
+        resolver = VisibilityResolver(self.stranger)
+        with self.assertNumQueries(1):
+            visible = resolver.visible_ids([self.public.pk, self.private.pk, 10 ** 9])
+        self.assertEqual(visible, {self.public.pk})
+        # is_private уже известен резолверу
+        with self.assertNumQueries(0):
+            resolver.visible_ids([self.private.pk])
+
+    def test_condition_uses_follows_subquery(self):
+        sql = str(VisibilityResolver(self.follower).filter(Post.objects.all()).query)
+        self.assertIn('follows', sql)
+        self.assertNotIn(f'IN ({self.private.pk})', sql)
+
+    def test_unfollow_hides_private_author(self):
+        Follow.objects.filter(follower=self.follower).delete()
+        self.follower.refresh_from_db(fields=['feed_version'])
+
+        resolver = VisibilityResolver(self.follower)
+        self.assertFalse(resolver.can_view(self.private))
+        self.assertEqual(self.visible_posts(self.follower), {self.public_post})
+
+    def test_get_author_loads_once(self):
+        follow_graph.following_ids(self.stranger)
+        resolver = VisibilityResolver(self.stranger)
+        with self.assertNumQueries(1):
+            author = resolver.get_author('private')
+            self.assertIs(resolver.get_author('private'), author)
+            self.assertFalse(resolver.can_view(author))
+
+    @override_settings(REQUEST_METRICS={'SAMPLE_RATE': 0})
+    def test_user_posts_endpoint(self):
+        client = APIClient()
+        for viewer, expected in ((self.stranger, 403), (self.follower, 200), (self.private, 200)):
+            with self.subTest(viewer.username):
+                client.force_authenticate(viewer)
+                response = client.get('/api/posts/users/private/posts/')
+                self.assertEqual(response.status_code, expected)
+                if expected == 200:
+                    self.assertEqual([post['id'] for post in response.data['results']], [self.private_post.pk])
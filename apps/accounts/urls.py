@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import views, async_views
 
 app_name = 'accounts'
 
@@ -15,11 +15,17 @@ urlpatterns = [
     
     # Пользователи
     path('users/', views.UserListView.as_view(), name='user_list'),
+    # До users/<username>/, иначе «suggestions» будет принято за имя пользователя
+    path('users/suggestions/', views.UserSuggestionsView.as_view(), name='user_suggestions'),
     path('users/<str:username>/', views.UserDetailView.as_view(), name='user_detail'),
     
     # Подписки
+    path('follows/bulk/', views.BulkFollowView.as_view(), name='bulk_follow'),
     path('users/<str:username>/follow/', views.FollowView.as_view(), name='follow'),
     path('users/<str:username>/unfollow/', views.UnfollowView.as_view(), name='unfollow'),
     path('users/<str:username>/followers/', views.FollowersListView.as_view(), name='followers'),
     path('users/<str:username>/following/', views.FollowingListView.as_view(), name='following'),
+
+    # Асинхронный вариант для ASGI
+    path('async/users/<str:username>/', async_views.user_detail, name='async_user_detail'),
 ]
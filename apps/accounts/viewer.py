@@ -0,0 +1,158 @@
+"""
+Состояние просматривающего пользователя для сериализаторов.
+
+Списочный сериализатор перед сериализацией страницы собирает ID постов и
+пользователей и выясняет, что из этого пользователь лайкнул (один IN-запрос)
+и на кого подписан (по графу подписок, FollowGraph). Дочерние сериализаторы после этого
+проверяют принадлежность множеству без запросов к БД.
+"""
+from asgiref.sync import sync_to_async
+from django.db import models
+from rest_framework import serializers
+
+from core.middleware import timed
+from .cache import feed_versions, followers_counts
+from .graph import follow_graph
+from .models import User
+
+VIEWER_STATE_CONTEXT_KEY = 'viewer_state'
+FOLLOWERS_COUNTS_CONTEXT_KEY = 'followers_counts'
+
+
+def bump_feed_version(user_ids):
+    """
+    Новая версия ответов для пользователей после подписки или отписки: меняются
+    is_following и состав ленты, прежние ETag и массив подписок в FollowGraph
+    не должны совпасть
+    """
+    User.objects.filter(pk__in=user_ids).update(feed_version=models.F('feed_version') + 1)
+    feed_versions.invalidate(user_ids)
+
+
+class ViewerState:
+    """Лайки и подписки текущего пользователя в пределах одного ответа"""
+
+    def __init__(self, user):
+        self.user = user
+        self.following_ids = set()
+        self.liked_post_ids = set()
+        self._checked_user_ids = set()
+        self._checked_post_ids = set()
+
+    def load_following(self, user_ids):
+        """Узнать по графу подписок, на кого из user_ids подписан пользователь"""
+        missing = set(user_ids) - self._checked_user_ids
+        missing.discard(self.user.pk)
+        if not missing:
+            return
+        self.following_ids.update(follow_graph.is_following_many(self.user, missing))
+        self._checked_user_ids |= missing
+
+    def load_likes(self, post_ids):
+        """Одним запросом узнать, какие из post_ids лайкнул пользователь"""
+        from apps.posts.models import Like
+
+        missing = set(post_ids) - self._checked_post_ids
+        if not missing:
+            return
+        self.liked_post_ids.update(
+            Like.objects.filter(
+                user=self.user,
+                post_id__in=missing
+            ).values_list('post_id', flat=True)
+        )
+        self._checked_post_ids |= missing
+
+    def set_following(self, user_ids, following_ids):
+        """Запомнить уже известный ответ для user_ids без запроса к БД"""
+        user_ids = set(user_ids)
+        self.following_ids.update(set(following_ids) & user_ids)
+        self._checked_user_ids |= user_ids
+
+    async def aload_following(self, user_ids):
+        """load_following() для асинхронных представлений"""
+        missing = set(user_ids) - self._checked_user_ids
+        missing.discard(self.user.pk)
+        if not missing:
+            return
+        following_ids = await sync_to_async(follow_graph.is_following_many)(self.user, missing)
+        self.set_following(missing, following_ids)
+
+    def is_following(self, user_id):
+        self.load_following([user_id])
+        return user_id in self.following_ids
+
+    def has_liked(self, post_id):
+        self.load_likes([post_id])
+        return post_id in self.liked_post_ids
+
+
+def attach_followers_counts(users):
+    """
+    Взять счетчики подписчиков из кэша (промахи - одним запросом) и сохранить
+    в атрибуте followers_total, который сериализаторы используют вместо COUNT на объект
+    """
+    users = [user for user in users if not hasattr(user, 'followers_total')]
+    if users:
+        totals = followers_counts.get_many({user.pk for user in users})
+        for user in users:
+            user.followers_total = totals.get(user.pk, 0)
+
+
+async def aattach_followers_counts(users):
+    """attach_followers_counts() для асинхронных представлений"""
+    await sync_to_async(attach_followers_counts)(list(users))
+
+
+def get_followers_count(context, user):
+    """Счетчик из followers_total, из загруженных для страницы или из кэша"""
+    if hasattr(user, 'followers_total'):
+        return user.followers_total
+    counts = context.get(FOLLOWERS_COUNTS_CONTEXT_KEY, {})
+    if user.pk in counts:
+        return counts[user.pk]
+    return followers_counts.get_many([user.pk]).get(user.pk, 0)
+
+
+def get_viewer_state(context):
+    """ViewerState из контекста сериализатора (None для анонимного запроса)"""
+    request = context.get('request')
+    if request is None or not request.user.is_authenticated:
+        return None
+
+    state = context.get(VIEWER_STATE_CONTEXT_KEY)
+    if state is None:
+        state = context[VIEWER_STATE_CONTEXT_KEY] = ViewerState(request.user)
+    return state
+
+
+class ViewerStateListSerializer(serializers.ListSerializer):
+    """
+    Списочный сериализатор с предварительной загрузкой состояния пользователя
+    и счетчиков подписчиков всех пользователей страницы.
+    Дочерний сериализатор должен реализовать collect_viewer_ids().
+    """
+
+    def to_representation(self, data):
+        # Время сериализации страницы попадает в метрики запроса отдельно от кода представления
+        with timed('serialize'):
+            return self.serialize_page(data)
+
+    def serialize_page(self, data):
+        items = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        if not items:
+            return super().to_representation(items)
+
+        user_ids, post_ids = set(), set()
+        for item in items:
+            self.child.collect_viewer_ids(item, user_ids, post_ids)
+
+        counts = self.context.setdefault(FOLLOWERS_COUNTS_CONTEXT_KEY, {})
+        counts.update(followers_counts.get_many(user_ids - counts.keys()))
+
+        viewer = get_viewer_state(self.context)
+        if viewer is not None:
+            viewer.load_following(user_ids)
+            viewer.load_likes(post_ids)
+
+        return super().to_representation(items)
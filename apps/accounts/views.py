@@ -3,16 +3,29 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
+from rest_framework_simplejwt.settings import api_settings
 from rest_framework_simplejwt.tokens import RefreshToken
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.filters import OrderingFilter
 
+from apps.jobs.queue import enqueue
+from core.conditional import DetailVersionMixin
+from apps.search.filters import SearchIndexFilter
+from apps.posts.permissions import CanViewPrivateProfile
+from apps.posts.tasks import follow_created, follow_deleted
 from .models import User, Follow
+from . import visibility
+from .authentication import issue_tokens, set_claims
+from .cache import attach_profile_counts
 from .serializers import (
     UserRegistrationSerializer, UserLoginSerializer, UserProfileSerializer,
-    UserListSerializer, FollowSerializer, PasswordChangeSerializer
+    UserListSerializer, FollowSerializer, PasswordChangeSerializer, UserSuggestionSerializer,
+    BulkUsernamesSerializer
 )
+from .follows import follow_many, unfollow_many
+from .suggestions import suggested_users
 
 
 class UserRegistrationView(generics.CreateAPIView):
@@ -26,7 +39,7 @@ class UserRegistrationView(generics.CreateAPIView):
         serializer.is_valid(raise_exception=True)
         user = serializer.save()
         
-        refresh = RefreshToken.for_user(user)
+        refresh = issue_tokens(user)
         
         return Response({
             'user': UserProfileSerializer(user).data,
@@ -44,7 +57,7 @@ class UserLoginView(APIView):
         serializer.is_valid(raise_exception=True)
         user = serializer.validated_data['user']
         
-        refresh = RefreshToken.for_user(user)
+        refresh = issue_tokens(user)
         
         return Response({
             'user': UserProfileSerializer(user).data,
@@ -59,14 +72,26 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
-        return self.request.user
+        # Пользователь запроса собран из claims токена: изменение сохраняет строку целиком
+        return User.objects.get(pk=self.request.user.pk)
 
 
-class UserDetailView(generics.RetrieveAPIView):
+class UserDetailView(DetailVersionMixin, generics.RetrieveAPIView):
     """Просмотр профиля другого пользователя"""
     queryset = User.objects.all()
     serializer_class = UserProfileSerializer
     lookup_field = 'username'
+    # Счетчики профиля - из кэша (attach_profile_counts), без COUNT-запросов
+    version_fields = ('updated_at', 'pk', 'followers_total', 'following_total', 'posts_total')
+
+    def get_object(self):
+        # Один раз на запрос: объект нужен и для ETag, и для ответа
+        if not hasattr(self, '_object'):
+            self._object = attach_profile_counts(super().get_object())
+        return self._object
+
+    def load_version_rows(self):
+        return self.version_rows([self.get_object()])
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
@@ -78,8 +103,7 @@ class UserListView(generics.ListAPIView):
     """Список пользователей"""
     queryset = User.objects.filter(is_active=True)
     serializer_class = UserListSerializer
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
-    search_fields = ['username', 'first_name', 'last_name']
+    filter_backends = [DjangoFilterBackend, SearchIndexFilter, OrderingFilter]
     ordering_fields = ['username', 'created_at']
     ordering = ['-created_at']
 
@@ -89,6 +113,16 @@ class UserListView(generics.ListAPIView):
         return context
 
 
+class UserSuggestionsView(generics.ListAPIView):
+    """Рекомендованные пользователи («возможно, вы знакомы»)"""
+    serializer_class = UserSuggestionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = None
+
+    def get_queryset(self):
+        return suggested_users(self.request.user)
+
+
 class FollowView(APIView):
     """Подписка на пользователя"""
     permission_classes = [permissions.IsAuthenticated]
@@ -102,10 +136,18 @@ class FollowView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        follow, created = Follow.objects.get_or_create(
-            follower=request.user,
-            following=user_to_follow
-        )
+        with transaction.atomic():
+            follow, created = Follow.objects.get_or_create(
+                follower=request.user,
+                following=user_to_follow
+            )
+            if created:
+                enqueue(
+                    follow_created,
+                    idempotency_key=f'follow-created:{follow.pk}',
+                    follower_id=request.user.pk,
+                    following_id=user_to_follow.pk,
+                )
         
         if created:
             return Response(
@@ -127,11 +169,18 @@ class UnfollowView(APIView):
         user_to_unfollow = get_object_or_404(User, username=username)
         
         try:
-            follow = Follow.objects.get(
-                follower=request.user,
-                following=user_to_unfollow
-            )
-            follow.delete()
+            with transaction.atomic():
+                follow = Follow.objects.get(
+                    follower=request.user,
+                    following=user_to_unfollow
+                )
+                enqueue(
+                    follow_deleted,
+                    idempotency_key=f'follow-deleted:{follow.pk}',
+                    follower_id=request.user.pk,
+                    following_id=user_to_unfollow.pk,
+                )
+                follow.delete()
             return Response(
                 {'message': f'Вы отписались от {username}'},
                 status=status.HTTP_200_OK
@@ -143,24 +192,42 @@ class UnfollowView(APIView):
             )
 
 
+class BulkFollowView(APIView):
+    """Подписка (POST) и отписка (DELETE) списком: {"usernames": [...]}"""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        return Response({'results': follow_many(request.user, self.usernames(request))})
+
+    def delete(self, request):
+        return Response({'results': unfollow_many(request.user, self.usernames(request))})
+
+    @staticmethod
+    def usernames(request):
+        serializer = BulkUsernamesSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data['usernames']
+
+
 class FollowersListView(generics.ListAPIView):
     """Список подписчиков пользователя"""
     serializer_class = FollowSerializer
-    
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly, CanViewPrivateProfile]
+
+    def get_author(self):
+        return visibility.for_request(self.request).get_author(self.kwargs['username'])
+
     def get_queryset(self):
-        username = self.kwargs['username']
-        user = get_object_or_404(User, username=username)
-        return Follow.objects.filter(following=user)
+        user = self.get_author()
+        return Follow.objects.filter(following=user).select_related('follower', 'following').order_by('-created_at')
 
 
-class FollowingListView(generics.ListAPIView):
+class FollowingListView(FollowersListView):
     """Список подписок пользователя"""
-    serializer_class = FollowSerializer
-    
+
     def get_queryset(self):
-        username = self.kwargs['username']
-        user = get_object_or_404(User, username=username)
-        return Follow.objects.filter(follower=user)
+        user = self.get_author()
+        return Follow.objects.filter(follower=user).select_related('follower', 'following').order_by('-created_at')
 
 
 class PasswordChangeView(APIView):
@@ -185,9 +252,11 @@ def refresh_token(request):
     try:
         refresh_tokens = request.data['refresh']
         token = RefreshToken(refresh_tokens)
-        
+        # Claims нового access-токена - из БД: отключенный пользователь его не получит
+        user = User.objects.get(pk=token[api_settings.USER_ID_CLAIM], is_active=True)
+
         return Response({
-            'access': str(token.access_token)
+            'access': str(set_claims(token.access_token, user))
         })
     except Exception as e:
         return Response(
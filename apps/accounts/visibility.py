@@ -0,0 +1,81 @@
+"""
+Видимость приватных аккаунтов.
+
+Содержимое приватного аккаунта видят он сам и его подписчики.
+VisibilityResolver решает это сразу для пакета авторов: is_private берется
+из уже загруженных объектов (для голых ID - одним запросом), подписки - из
+графа подписок (FollowGraph), поэтому фильтрация страницы не добавляет
+запросов на строку. Для выборок из БД то же правило дает condition():
+подписки в нем - подзапрос к follows (индекс follows_follower_created_idx),
+а не список ID, который у пользователя с тысячами подписок раздувал бы SQL.
+
+Резолвер создается один раз на запрос (for_request) и запоминает авторов,
+загруженных по имени из URL: проверка доступа и выборка берут один объект.
+"""
+from django.db.models import Q
+from django.shortcuts import get_object_or_404
+
+from .graph import follow_graph
+from .models import User, Follow
+
+REQUEST_ATTRIBUTE = '_visibility'
+
+
+class VisibilityResolver:
+    """Кого из авторов может видеть viewer (анонимный - только публичных)"""
+
+    def __init__(self, viewer):
+        self.viewer = viewer
+        self.authors = {}
+        self.private = {}
+
+    def get_author(self, username):
+        """Пользователь из URL, загружается один раз на запрос; 404, если его нет"""
+        if username not in self.authors:
+            author = get_object_or_404(User, username=username)
+            self.authors[username] = author
+            self.private[author.pk] = author.is_private
+        return self.authors[username]
+
+    def visible_ids(self, authors):
+        """ID видимых из authors (объекты User или ID)"""
+        authors = list(authors)
+        unknown = []
+        for author in authors:
+            if isinstance(author, User):
+                self.private[author.pk] = author.is_private
+            elif author not in self.private:
+                unknown.append(author)
+        if unknown:
+            self.private.update(User.objects.filter(pk__in=unknown).values_list('pk', 'is_private'))
+
+        ids = {author.pk if isinstance(author, User) else author for author in authors}
+        ids &= set(self.private)
+        private = {pk for pk in ids if self.private[pk]}
+        if not private or not self.viewer.is_authenticated:
+            return ids - private
+        private.discard(self.viewer.pk)
+        return (ids - private) | follow_graph.is_following_many(self.viewer, private)
+
+    def can_view(self, author):
+        return author.pk in self.visible_ids([author])
+
+    def condition(self, field='author'):
+        """Условие на автора для выборки: публичный, сам пользователь или его подписка"""
+        condition = Q(**{f'{field}__is_private': False})
+        if self.viewer.is_authenticated:
+            following = Follow.objects.filter(follower=self.viewer.pk).values('following_id')
+            condition |= Q(**{field: self.viewer.pk}) | Q(**{f'{field}__in': following})
+        return condition
+
+    def filter(self, queryset, field='author'):
+        return queryset.filter(self.condition(field))
+
+
+def for_request(request):
+    """Резолвер текущего запроса"""
+    resolver = getattr(request, REQUEST_ATTRIBUTE, None)
+    if resolver is None:
+        resolver = VisibilityResolver(request.user)
+        setattr(request, REQUEST_ATTRIBUTE, resolver)
+    return resolver
@@ -0,0 +1,12 @@
+from django.contrib import admin
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    """Административная панель для фоновых задач"""
+    list_display = ('id', 'name', 'status', 'attempts', 'run_after', 'created_at')
+    list_filter = ('status', 'name', 'created_at')
+    search_fields = ('name', 'idempotency_key')
+    ordering = ('-created_at',)
+    readonly_fields = ('created_at', 'updated_at', 'locked_at')
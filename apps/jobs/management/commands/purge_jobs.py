@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from apps.jobs.queue import job_settings, purge_done
+
+
+class Command(BaseCommand):
+    help = 'Удаляет выполненные фоновые задачи старше JOBS["KEEP_DONE_DAYS"] дней'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None, help='Срок хранения выполненных задач, дней')
+
+    def handle(self, *args, **options):
+        days = options['days'] if options['days'] is not None else job_settings()['KEEP_DONE_DAYS']
+        deleted = purge_done(keep_days=days)
+        self.stdout.write(self.style.SUCCESS(f'Удалено выполненных задач: {deleted}'))
@@ -0,0 +1,89 @@
+import logging
+import multiprocessing
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, close_old_connections, connections
+
+from apps.jobs.queue import claim, execute, requeue_stale
+
+STALE_CHECK_INTERVAL = 60
+
+logger = logging.getLogger('apps.jobs')
+
+
+def work(stop, batch_size, sleep, burst):
+    """Цикл воркера: брать задачи, пока не попросят остановиться"""
+    processed = 0
+    last_stale_check = 0.0
+    while not stop.is_set():
+        close_old_connections()
+        if time.monotonic() - last_stale_check > STALE_CHECK_INTERVAL:
+            requeue_stale()
+            last_stale_check = time.monotonic()
+
+        try:
+            jobs = claim(batch_size)
+        except DatabaseError:
+            # БД недоступна или занята: подождать и попробовать снова
+            logger.exception('Не удалось получить задачи из очереди')
+            connections.close_all()
+            stop.wait(sleep)
+            continue
+        if not jobs:
+            if burst:
+                break
+            stop.wait(sleep)
+            continue
+        for job in jobs:
+            execute(job)
+            processed += 1
+    connections.close_all()
+    return processed
+
+
+def child(*args):
+    # Ctrl+C обрабатывает родительский процесс и останавливает всех через stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    work(*args)
+
+
+class Command(BaseCommand):
+    help = 'Запустить воркеры очереди фоновых задач'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=1, help='Количество процессов-воркеров')
+        parser.add_argument('--batch-size', type=int, default=10, help='Задач за одну выборку')
+        parser.add_argument('--sleep', type=float, default=1.0, help='Пауза при пустой очереди, сек')
+        parser.add_argument('--burst', action='store_true', help='Выйти, когда очередь опустеет')
+
+    def handle(self, *args, **options):
+        context = multiprocessing.get_context('fork')
+        stop = context.Event()
+        worker_args = (stop, options['batch_size'], options['sleep'], options['burst'])
+
+        def shutdown(signum, frame):
+            self.stdout.write('Остановка воркеров...')
+            stop.set()
+
+        signal.signal(signal.SIGTERM, shutdown)
+        signal.signal(signal.SIGINT, shutdown)
+
+        if options['processes'] == 1:
+            processed = work(*worker_args)
+            self.stdout.write(self.style.SUCCESS(f'Выполнено задач: {processed}'))
+            return
+
+        # Соединения с БД нельзя разделять между процессами
+        connections.close_all()
+        workers = [
+            context.Process(target=child, args=worker_args, name=f'worker-{number}')
+            for number in range(options['processes'])
+        ]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(f'Запущено воркеров: {len(workers)}')
+        for worker in workers:
+            worker.join()
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.5 on 2026-10-16 22:37
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, verbose_name='задача')),
+                ('payload', models.JSONField(blank=True, default=dict, verbose_name='параметры')),
+                ('status', models.CharField(choices=[('pending', 'В очереди'), ('running', 'Выполняется'), ('done', 'Выполнена'), ('failed', 'Ошибка')], default='pending', max_length=10, verbose_name='статус')),
+                ('idempotency_key', models.CharField(blank=True, max_length=200, null=True, unique=True, verbose_name='ключ идемпотентности')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='попыток')),
+                ('max_attempts', models.PositiveSmallIntegerField(default=5, verbose_name='максимум попыток')),
+                ('last_error', models.TextField(blank=True, verbose_name='последняя ошибка')),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now, verbose_name='выполнить после')),
+                ('locked_at', models.DateTimeField(blank=True, null=True, verbose_name='взята в работу')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='дата создания')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='дата обновления')),
+            ],
+            options={
+                'verbose_name': 'Задача',
+                'verbose_name_plural': 'Задачи',
+                'db_table': 'jobs',
+                'ordering': ['run_after', 'id'],
+                'indexes': [models.Index(condition=models.Q(('status', 'pending')), fields=['run_after', 'id'], name='jobs_pending_idx'), models.Index(condition=models.Q(('status', 'running')), fields=['locked_at'], name='jobs_running_idx')],
+            },
+        ),
+    ]
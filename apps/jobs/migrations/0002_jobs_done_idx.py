@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+from core.operations import PortableAddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY нельзя выполнять внутри транзакции
+    atomic = False
+
+    dependencies = [
+        ('jobs', '0001_initial'),
+    ]
+
+    operations = [
+        PortableAddIndexConcurrently(
+            model_name='job',
+            index=models.Index(condition=models.Q(('status', 'done')), fields=['updated_at'], name='jobs_done_idx'),
+        ),
+    ]
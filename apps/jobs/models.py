@@ -0,0 +1,65 @@
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+
+class Job(models.Model):
+    """Фоновая задача в очереди"""
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', _('В очереди')
+        RUNNING = 'running', _('Выполняется')
+        DONE = 'done', _('Выполнена')
+        FAILED = 'failed', _('Ошибка')
+
+    name = models.CharField(_('задача'), max_length=200)
+    payload = models.JSONField(_('параметры'), default=dict, blank=True)
+    status = models.CharField(
+        _('статус'),
+        max_length=10,
+        choices=Status.choices,
+        default=Status.PENDING
+    )
+    idempotency_key = models.CharField(
+        _('ключ идемпотентности'),
+        max_length=200,
+        unique=True,
+        null=True,
+        blank=True
+    )
+    attempts = models.PositiveSmallIntegerField(_('попыток'), default=0)
+    max_attempts = models.PositiveSmallIntegerField(_('максимум попыток'), default=5)
+    last_error = models.TextField(_('последняя ошибка'), blank=True)
+
+    run_after = models.DateTimeField(_('выполнить после'), default=timezone.now)
+    locked_at = models.DateTimeField(_('взята в работу'), null=True, blank=True)
+    created_at = models.DateTimeField(_('дата создания'), auto_now_add=True)
+    updated_at = models.DateTimeField(_('дата обновления'), auto_now=True)
+
+    class Meta:
+        verbose_name = _('Задача')
+        verbose_name_plural = _('Задачи')
+        db_table = 'jobs'
+        ordering = ['run_after', 'id']
+        indexes = [
+            # Выборка воркером: только ожидающие задачи
+            models.Index(
+                fields=['run_after', 'id'],
+                name='jobs_pending_idx',
+                condition=models.Q(status='pending'),
+            ),
+            models.Index(
+                fields=['locked_at'],
+                name='jobs_running_idx',
+                condition=models.Q(status='running'),
+            ),
+            # Удаление старых выполненных задач (purge_done)
+            models.Index(
+                fields=['updated_at'],
+                name='jobs_done_idx',
+                condition=models.Q(status='done'),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
@@ -0,0 +1,160 @@
+"""
+Очередь фоновых задач в таблице БД.
+
+Задача - обычная функция, помеченная декоратором @task; в очередь кладется
+ее путь для импорта и JSON-параметры. Запись в очередь делается в той же
+транзакции, что и основное изменение, поэтому задача не теряется и не
+выполняется для откаченной записи. Воркеры (команда runworker) забирают
+задачи через SELECT ... FOR UPDATE SKIP LOCKED, повторяют упавшие с
+экспоненциальной задержкой и возвращают в очередь зависшие. Выполненные
+задачи хранятся KEEP_DONE_DAYS дней (purge_done, команда purge_jobs).
+"""
+import logging
+import random
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ALWAYS_EAGER': False,
+    'MAX_ATTEMPTS': 5,
+    'RETRY_BACKOFF': 10,
+    'RETRY_BACKOFF_MAX': 3600,
+    'STALE_AFTER': 600,
+    'KEEP_DONE_DAYS': 7,
+}
+PURGE_BATCH_SIZE = 1000
+
+
+def job_settings():
+    return {**DEFAULTS, **getattr(settings, 'JOBS', {})}
+
+
+def task(func=None, *, max_attempts=None):
+    """Разрешить запуск функции как фоновой задачи"""
+    def decorate(func):
+        func.job_name = f'{func.__module__}.{func.__qualname__}'
+        func.job_max_attempts = max_attempts
+        return func
+    return decorate(func) if func else decorate
+
+
+def resolve(name):
+    """Функция задачи по имени; запускать можно только помеченные @task"""
+    func = import_string(name)
+    if getattr(func, 'job_name', None) != name:
+        raise ImportError(f'{name} не является фоновой задачей')
+    return func
+
+
+def enqueue(func, idempotency_key=None, delay=None, **payload):
+    """
+    Поставить задачу в очередь. Повторная постановка с тем же
+    idempotency_key игнорируется и возвращает None.
+    """
+    config = job_settings()
+    if config['ALWAYS_EAGER']:
+        transaction.on_commit(lambda: func(**payload))
+        return None
+
+    job = Job(
+        name=func.job_name,
+        payload=payload,
+        idempotency_key=idempotency_key,
+        max_attempts=func.job_max_attempts or config['MAX_ATTEMPTS'],
+        run_after=timezone.now() + (delay or timedelta()),
+    )
+    if idempotency_key is None:
+        job.save()
+        return job
+    try:
+        with transaction.atomic():
+            job.save()
+    except IntegrityError:
+        return None
+    return job
+
+
+def claim(limit=1):
+    """Взять в работу до limit готовых задач, не блокируясь на чужих"""
+    with transaction.atomic():
+        jobs = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status=Job.Status.PENDING, run_after__lte=timezone.now())
+            .order_by('run_after', 'id')[:limit]
+        )
+        if jobs:
+            now = timezone.now()
+            Job.objects.filter(pk__in=[job.pk for job in jobs]).update(
+                status=Job.Status.RUNNING,
+                locked_at=now,
+            )
+            for job in jobs:
+                job.status, job.locked_at = Job.Status.RUNNING, now
+    return jobs
+
+
+def retry_delay(attempts):
+    """Экспоненциальная задержка со случайным разбросом"""
+    config = job_settings()
+    delay = min(config['RETRY_BACKOFF'] * 2 ** (attempts - 1), config['RETRY_BACKOFF_MAX'])
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def execute(job):
+    """Выполнить задачу и записать результат; True при успехе"""
+    job.attempts += 1
+    try:
+        resolve(job.name)(**job.payload)
+    except Exception:
+        job.last_error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            job.status = Job.Status.FAILED
+            logger.exception('Задача %s #%s завершилась ошибкой', job.name, job.pk)
+        else:
+            job.status = Job.Status.PENDING
+            job.run_after = timezone.now() + retry_delay(job.attempts)
+            logger.warning('Задача %s #%s будет повторена (попытка %s)', job.name, job.pk, job.attempts)
+        job.locked_at = None
+        job.save(update_fields=['status', 'attempts', 'last_error', 'run_after', 'locked_at', 'updated_at'])
+        return False
+
+    job.status = Job.Status.DONE
+    job.locked_at = None
+    job.save(update_fields=['status', 'attempts', 'locked_at', 'updated_at'])
+    return True
+
+
+def requeue_stale():
+    """Вернуть в очередь задачи, которые воркер взял и не завершил (упал)"""
+    deadline = timezone.now() - timedelta(seconds=job_settings()['STALE_AFTER'])
+    return Job.objects.filter(status=Job.Status.RUNNING, locked_at__lt=deadline).update(
+        status=Job.Status.PENDING,
+        locked_at=None,
+    )
+
+
+def purge_done(keep_days=None, batch_size=PURGE_BATCH_SIZE):
+    """
+    Удалить выполненные задачи старше keep_days дней пачками; возвращает
+    число удаленных. Вместе с задачей освобождается ее idempotency_key,
+    поэтому срок хранения должен перекрывать окно повторной постановки.
+    """
+    if keep_days is None:
+        keep_days = job_settings()['KEEP_DONE_DAYS']
+    deadline = timezone.now() - timedelta(days=keep_days)
+    finished = Job.objects.filter(status=Job.Status.DONE, updated_at__lt=deadline)
+    deleted = 0
+    while True:
+        pks = list(finished.values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return deleted
+        deleted += Job.objects.filter(pk__in=pks).delete()[0]
@@ -0,0 +1,97 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.jobs.models import Job
+from apps.jobs.queue import claim, enqueue, execute, purge_done, requeue_stale, task
+
+calls = []
+
+
+@task
+def record(value):
+    calls.append(value)
+
+
+@task(max_attempts=2)
+def fail(value):
+    calls.append(value)
+    raise RuntimeError('сбой')
+
+
+@override_settings(JOBS={'ALWAYS_EAGER': False, 'MAX_ATTEMPTS': 5, 'RETRY_BACKOFF': 10, 'RETRY_BACKOFF_MAX': 3600})
+class QueueTests(TestCase):
+
+    def setUp(self):
+        calls.clear()
+
+    def run_next(self):
+        jobs = claim()
+        self.assertEqual(len(jobs), 1)
+        return execute(jobs[0]), Job.objects.get(pk=jobs[0].pk)
+
+    def test_execute(self):
+        enqueue(record, value=1)
+        done, job = self.run_next()
+        self.assertTrue(done)
+        self.assertEqual(job.status, Job.Status.DONE)
+        self.assertEqual(job.attempts, 1)
+        self.assertEqual(calls, [1])
+        self.assertEqual(claim(), [])
+
+    def test_idempotency_key(self):
+        self.assertIsNotNone(enqueue(record, idempotency_key='record:1', value=1))
+        self.assertIsNone(enqueue(record, idempotency_key='record:1', value=2))
+        self.assertEqual(Job.objects.count(), 1)
+        self.run_next()
+        # Ключ выполненной задачи занят, пока она не удалена purge_done
+        self.assertIsNone(enqueue(record, idempotency_key='record:1', value=3))
+        self.assertEqual(calls, [1])
+
+    def test_retry_with_backoff(self):
+        enqueue(fail, value=1)
+        started = timezone.now()
+        with self.assertLogs('apps.jobs.queue', 'WARNING'):
+            done, job = self.run_next()
+        self.assertFalse(done)
+        self.assertEqual(job.status, Job.Status.PENDING)
+        self.assertEqual(job.attempts, 1)
+        self.assertIn('RuntimeError', job.last_error)
+        self.assertIsNone(job.locked_at)
+        # 10 секунд +-20% до следующей попытки: сейчас задача не выдается
+        self.assertGreaterEqual(job.run_after, started + timedelta(seconds=8))
+        self.assertEqual(claim(), [])
+
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        with self.assertLogs('apps.jobs.queue', 'ERROR'):
+            done, job = self.run_next()
+        self.assertFalse(done)
+        self.assertEqual(job.status, Job.Status.FAILED)
+        self.assertEqual(job.attempts, 2)
+        self.assertEqual(calls, [1, 1])
+
+    def test_requeue_stale(self):
+        enqueue(record, value=1)
+        job = claim()[0]
+        self.assertEqual(requeue_stale(), 0)
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(requeue_stale(), 1)
+        self.assertEqual(Job.objects.get(pk=job.pk).status, Job.Status.PENDING)
+
+    def test_purge_done(self):
+        enqueue(record, idempotency_key='old', value=1)
+        enqueue(record, idempotency_key='recent', value=2)
+        enqueue(fail, idempotency_key='failed', value=3)
+        with self.assertLogs('apps.jobs.queue', 'WARNING'):
+            for _ in range(3):
+                execute(claim()[0])
+        Job.objects.update(updated_at=timezone.now() - timedelta(days=30))
+        Job.objects.filter(idempotency_key='recent').update(updated_at=timezone.now())
+
+        self.assertEqual(purge_done(keep_days=7, batch_size=1), 1)
+        self.assertEqual(
+            set(Job.objects.values_list('idempotency_key', flat=True)), {'recent', 'failed'}
+        )
+        # Ключ удаленной задачи снова свободен
+        self.assertIsNotNone(enqueue(record, idempotency_key='old', value=4))
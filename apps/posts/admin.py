@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Post, Like, Comment, Story
+from .models import (
+    Post, Like, Comment, Story, StorySeen, FeedEntry, ExploreCandidate, Hashtag, Mention, Location
+)
 
 
 @admin.register(Post)
@@ -8,7 +10,7 @@ class PostAdmin(admin.ModelAdmin):
     list_display = ('id', 'author', 'caption_short', 'location', 'likes_count', 'comments_count', 'created_at')
     list_filter = ('created_at', 'updated_at')
     search_fields = ('author__username', 'caption', 'location')
-    raw_id_fields = ('author',)
+    raw_id_fields = ('author', 'place')
     ordering = ('-created_at',)
     readonly_fields = ('created_at', 'updated_at', 'likes_count', 'comments_count')
     
@@ -56,3 +58,58 @@ class StoryAdmin(admin.ModelAdmin):
         return obj.is_expired
     is_expired.boolean = True
     is_expired.short_description = 'Истекла'
+
+
+@admin.register(StorySeen)
+class StorySeenAdmin(admin.ModelAdmin):
+    """Административная панель для отметок просмотра историй"""
+    list_display = ('user', 'author', 'seen_until')
+    search_fields = ('user__username', 'author__username')
+    raw_id_fields = ('user', 'author')
+    ordering = ('-seen_until',)
+
+
+@admin.register(FeedEntry)
+class FeedEntryAdmin(admin.ModelAdmin):
+    """Административная панель для записей ленты"""
+    list_display = ('user', 'post', 'author', 'created_at')
+    list_filter = ('created_at',)
+    search_fields = ('user__username', 'author__username')
+    raw_id_fields = ('user', 'post', 'author')
+    ordering = ('-created_at',)
+
+
+@admin.register(ExploreCandidate)
+class ExploreCandidateAdmin(admin.ModelAdmin):
+    """Административная панель для пула рекомендаций"""
+    list_display = ('post', 'author', 'score', 'computed_at')
+    raw_id_fields = ('post', 'author')
+    ordering = ('-score',)
+
+
+@admin.register(Hashtag)
+class HashtagAdmin(admin.ModelAdmin):
+    """Административная панель для хэштегов"""
+    list_display = ('name', 'posts_count', 'created_at')
+    search_fields = ('name',)
+    ordering = ('-posts_count',)
+    readonly_fields = ('created_at', 'posts_count')
+
+
+@admin.register(Mention)
+class MentionAdmin(admin.ModelAdmin):
+    """Административная панель для упоминаний"""
+    list_display = ('user', 'author', 'post', 'comment', 'created_at')
+    list_filter = ('created_at',)
+    search_fields = ('user__username', 'author__username')
+    raw_id_fields = ('user', 'author', 'post', 'comment')
+    ordering = ('-created_at',)
+
+
+@admin.register(Location)
+class LocationAdmin(admin.ModelAdmin):
+    """Административная панель для мест"""
+    list_display = ('name', 'latitude', 'longitude', 'geohash', 'posts_count', 'created_at')
+    search_fields = ('name',)
+    ordering = ('-posts_count',)
+    readonly_fields = ('normalized_name', 'geohash', 'posts_count', 'created_at')
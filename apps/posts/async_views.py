@@ -0,0 +1,152 @@
+"""
+Асинхронные варианты ленты, рекомендаций и историй подписок (для ASGI).
+
+Запросы страницы (посты, подписки просматривающего, счетчики подписчиков
+авторов) выполняются по очереди: асинхронный ORM Django отдает их одному
+потоку, так что параллельно они бы не пошли. ViewerState заполняется
+заранее, поэтому сериализация проходит без обращений к БД. Пока запрос
+ждет базу, воркер ASGI-сервера обслуживает другие запросы.
+"""
+from asgiref.sync import sync_to_async
+from django.utils import timezone
+
+from apps.accounts import visibility
+from apps.accounts.graph import follow_graph
+from apps.accounts.serializers import UserListSerializer
+from apps.accounts.viewer import VIEWER_STATE_CONTEXT_KEY, ViewerState, aattach_followers_counts
+from core.async_api import async_api_view, json_response
+from core.pagination import KeysetPagination, RankedListPagination
+from .explore import candidate_pool, explore_post_ids
+from .feed import home_feed_queryset
+from .models import Post, Story
+from .serializers import PostSerializer, PostCompactSerializer, StorySerializer, StoryCompactSerializer
+
+
+async def fetch_all(queryset):
+    return [item async for item in queryset]
+
+
+async def following_ids(user):
+    return set(await sync_to_async(follow_graph.following_ids)(user))
+
+
+def serializer_context(request, viewer):
+    return {'request': request, VIEWER_STATE_CONTEXT_KEY: viewer}
+
+
+@async_api_view
+async def feed(request):
+    """Лента новостей (посты от подписок)"""
+    user = request.user
+    paginator = KeysetPagination()
+    queryset = (await sync_to_async(home_feed_queryset)(user)).for_listing(user)
+
+    # В ленте только подписки и свои посты, поэтому весь набор подписок
+    # отвечает на is_following для любого автора страницы
+    posts = await paginator.apaginate_queryset(queryset, request)
+    followed = await following_ids(user)
+    authors = [post.author for post in posts]
+    await aattach_followers_counts(authors)
+
+    viewer = ViewerState(user)
+    viewer.set_following({author.pk for author in authors}, followed)
+    data = PostSerializer(posts, many=True, context=serializer_context(request, viewer)).data
+    return json_response({'next': paginator.get_next_link(), 'results': data})
+
+
+@async_api_view
+async def explore(request):
+    """Рекомендуемые посты"""
+    user = request.user
+    paginator = RankedListPagination()
+    post_ids = await sync_to_async(explore_post_ids)(user)
+    page_ids = paginator.paginate_queryset(post_ids, request)
+
+    # Авторы известны из пула кандидатов еще до загрузки постов
+    pool_authors = dict(await sync_to_async(candidate_pool)())
+    author_ids = {pool_authors[post_id] for post_id in page_ids if post_id in pool_authors}
+    posts = await Post.objects.filter(pk__in=page_ids).for_listing(user).ain_bulk()
+    # Видимость - как в ExploreView: приватные авторы видны подписчикам
+    visible = await sync_to_async(visibility.for_request(request).visible_ids)(
+        post.author for post in posts.values()
+    )
+    page = [
+        posts[post_id] for post_id in page_ids
+        if post_id in posts and posts[post_id].author_id in visible
+    ]
+
+    viewer = ViewerState(user)
+    await viewer.aload_following(author_ids)
+    await aattach_followers_counts([post.author for post in page])
+
+    data = PostSerializer(page, many=True, context=serializer_context(request, viewer)).data
+    return json_response({
+        'count': paginator.count,
+        'next': paginator.get_next_link(),
+        'previous': paginator.get_previous_link(),
+        'results': data,
+    })
+
+
+@async_api_view(login_required=False)
+async def following_stories(request):
+    """Истории от подписок"""
+    user = request.user
+    if not user.is_authenticated:
+        return json_response([])
+    stories = await fetch_all(
+        Story.objects.filter(
+            author__in=await following_ids(user),
+            expires_at__gt=timezone.now()
+        ).select_related('author').order_by('-created_at')
+    )
+    await aattach_followers_counts(story.author for story in stories)
+    authors = {story.author_id for story in stories}
+
+    # Истории только от подписок: на всех авторов пользователь подписан
+    viewer = ViewerState(user)
+    viewer.set_following(authors, authors)
+    data = StorySerializer(stories, many=True, context=serializer_context(request, viewer)).data
+    return json_response(data)
+
+
+@async_api_view
+async def home(request):
+    """
+    Главный экран за один запрос: страница ленты и истории подписок.
+    Авторы не вкладываются в посты и истории, а отдаются один раз в карте users.
+    """
+    user = request.user
+    paginator = KeysetPagination()
+
+    # Подписки читаются один раз и используются и лентой, и историями
+    followed = await following_ids(user)
+
+    async def feed_page():
+        queryset = await sync_to_async(home_feed_queryset)(user, following_ids=followed)
+        return await paginator.apaginate_queryset(queryset.for_listing(user), request)
+
+    stories = Story.objects.filter(
+        author_id__in=followed,
+        expires_at__gt=timezone.now()
+    ).select_related('author').order_by('-created_at')
+
+    posts = await feed_page()
+    stories = await fetch_all(stories)
+    authors = {item.author_id: item.author for item in (*posts, *stories)}
+    await aattach_followers_counts(authors.values())
+
+    viewer = ViewerState(user)
+    viewer.set_following(authors, followed)
+    context = serializer_context(request, viewer)
+    return json_response({
+        'users': {
+            user_data['id']: user_data
+            for user_data in UserListSerializer(list(authors.values()), many=True, context=context).data
+        },
+        'feed': {
+            'next': paginator.get_next_link(),
+            'results': PostCompactSerializer(posts, many=True, context=context).data,
+        },
+        'stories': StoryCompactSerializer(stories, many=True, context=context).data,
+    })
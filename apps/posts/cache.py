@@ -0,0 +1,38 @@
+"""
+Кэш сводок постов: поля PostSerializer без данных просматривающего.
+
+Страница, для которой известны ID (рекомендации, поиск, хэштеги),
+собирается из кэша сводок и карточек авторов, а лайки текущего
+пользователя догружает ViewerState. Инвалидация - в signals.py.
+"""
+from apps.accounts.cache import cached_users
+from core.object_cache import ObjectCache
+from .models import Post
+
+SUMMARY_FIELDS = (
+    'id', 'author_id', 'image', 'renditions', 'caption', 'location', 'place_id',
+    'likes_count', 'comments_count', 'created_at', 'updated_at',
+)
+
+
+def build_summaries(pks):
+    return {summary['id']: summary for summary in Post.objects.filter(pk__in=pks).values(*SUMMARY_FIELDS)}
+
+
+post_summaries = ObjectCache('post_summary', 1, build_summaries)
+
+
+def cached_posts(pks):
+    """{id: Post} из кэша сводок, автор - из кэша карточек; удаленных постов нет"""
+    summaries = post_summaries.get_many(pks)
+    authors = cached_users({summary['author_id'] for summary in summaries.values()})
+    posts = {}
+    for pk, summary in summaries.items():
+        author = authors.get(summary['author_id'])
+        if author is None:
+            continue
+        post = posts[pk] = Post(**summary)
+        post._state.adding = False
+        post._state.db = 'default'
+        post.author = author
+    return posts
@@ -0,0 +1,56 @@
+"""
+Загрузка веток комментариев.
+
+Страница комментариев верхнего уровня читается курсорной пагинацией, а
+первые REPLY_PREVIEW_SIZE ответов для всех комментариев страницы - одним
+запросом с ROW_NUMBER() OVER (PARTITION BY parent_id). Ответы сохраняются
+в атрибуте reply_preview, его использует CommentSerializer.
+"""
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from .models import Comment
+
+REPLY_PREVIEW_SIZE = 2
+RECENT_COMMENTS_SIZE = 3
+
+
+def load_reply_previews(comments, size=REPLY_PREVIEW_SIZE):
+    """Первые size ответов на каждый из comments одним запросом"""
+    comments = [comment for comment in comments if comment.parent_id is None]
+    for comment in comments:
+        comment.reply_preview = []
+    parents = {comment.pk: comment for comment in comments if comment.replies_count}
+    if not parents:
+        return comments
+
+    replies = Comment.objects.filter(parent_id__in=parents).annotate(
+        position=Window(
+            RowNumber(),
+            partition_by=[F('parent_id')],
+            order_by=[F('created_at').asc(), F('id').asc()],
+        )
+    ).filter(position__lte=size).select_related('author').order_by('parent_id', 'position')
+
+    for reply in replies:
+        parents[reply.parent_id].reply_preview.append(reply)
+    return comments
+
+
+def recent_comments(post, size=RECENT_COMMENTS_SIZE):
+    """Первые комментарии верхнего уровня к посту вместе с превью ответов"""
+    comments = list(
+        Comment.objects.filter(post=post, parent=None)
+        .select_related('author')
+        .order_by('created_at', 'id')[:size]
+    )
+    return load_reply_previews(comments)
+
+
+def comment_authors(comments):
+    """Авторы комментариев и превью ответов (для attach_followers_counts)"""
+    authors = []
+    for comment in comments:
+        authors.append(comment.author)
+        authors.extend(reply.author for reply in getattr(comment, 'reply_preview', ()))
+    return authors
@@ -0,0 +1,125 @@
+"""
+Пул рекомендаций (Explore).
+
+Команда rank_explore периодически оценивает свежие публичные посты по
+скорости набора лайков и комментариев в нескольких временных окнах и
+сохраняет лучшие в ExploreCandidate. При запросе пул читается из кэша, а
+подписки и собственные посты пользователя отсеиваются операциями над
+множествами в памяти.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from apps.accounts.graph import follow_graph
+from .models import Post, Like, Comment, ExploreCandidate
+
+POOL_CACHE_KEY = 'explore:pool'
+POOL_CACHE_TIMEOUT = 300
+VIEWER_CACHE_KEY = 'explore:viewer:{}'
+
+# (окно, вес): недавняя активность важнее давней
+WINDOWS = (
+    (timedelta(hours=1), 4.0),
+    (timedelta(hours=24), 1.0),
+    (timedelta(days=7), 0.25),
+)
+COMMENT_WEIGHT = 2.0
+
+
+def _engagement(model, since, created_after):
+    """Количество лайков или комментариев на пост начиная с since"""
+    return (
+        model.objects.filter(
+            created_at__gte=since,
+            post__created_at__gte=created_after,
+            post__author__is_private=False,
+        )
+        .values_list('post')
+        .annotate(total=Count('pk'))
+        .order_by()
+    )
+
+
+def score_posts(now=None):
+    """Рейтинг постов: взвешенная сумма активности в час по каждому окну"""
+    now = now or timezone.now()
+    created_after = now - timedelta(days=settings.EXPLORE_LOOKBACK_DAYS)
+    scores = defaultdict(float)
+
+    for window, weight in WINDOWS:
+        since = now - window
+        hours = window.total_seconds() / 3600
+        for post_id, likes in _engagement(Like, since, created_after):
+            scores[post_id] += weight * likes / hours
+        for post_id, comments in _engagement(Comment, since, created_after):
+            scores[post_id] += weight * COMMENT_WEIGHT * comments / hours
+    return scores
+
+
+def rank_candidates(now=None):
+    """Пересчитать и сохранить пул кандидатов; возвращает его размер"""
+    now = now or timezone.now()
+    scores = score_posts(now)
+    top = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:settings.EXPLORE_POOL_SIZE]
+
+    # Остаток пула добираем свежими публичными постами без активности
+    missing = settings.EXPLORE_POOL_SIZE - len(top)
+    if missing > 0:
+        recent = Post.objects.filter(
+            created_at__gte=now - timedelta(days=settings.EXPLORE_LOOKBACK_DAYS),
+            author__is_private=False,
+        ).exclude(pk__in=list(scores)).order_by('-created_at', '-id').values_list('pk', flat=True)
+        top.extend((post_id, 0.0) for post_id in recent[:missing])
+
+    authors = dict(Post.objects.filter(pk__in=[post_id for post_id, _ in top]).values_list('pk', 'author_id'))
+    candidates = [
+        ExploreCandidate(post_id=post_id, author_id=authors[post_id], score=score, computed_at=now)
+        for post_id, score in top if post_id in authors
+    ]
+
+    with transaction.atomic():
+        ExploreCandidate.objects.all().delete()
+        ExploreCandidate.objects.bulk_create(candidates, batch_size=1000)
+    cache.delete(POOL_CACHE_KEY)
+    return len(candidates)
+
+
+def ranked_pool_queryset():
+    """Пул, сохраненный rank_candidates (от лучших к худшим)"""
+    return ExploreCandidate.objects.values_list('post_id', 'author_id')
+
+
+def recent_pool_queryset():
+    """Пул до первого расчета рейтинга: свежие публичные посты"""
+    return (
+        Post.objects.filter(author__is_private=False)
+        .order_by('-created_at', '-id')
+        .values_list('pk', 'author_id')[:settings.EXPLORE_POOL_SIZE]
+    )
+
+
+def candidate_pool():
+    """Упорядоченный пул [(post_id, author_id), ...] из кэша"""
+    pool = cache.get(POOL_CACHE_KEY)
+    if pool is None:
+        pool = list(ranked_pool_queryset()) or list(recent_pool_queryset())
+        cache.set(POOL_CACHE_KEY, pool, POOL_CACHE_TIMEOUT)
+    return pool
+
+
+def explore_post_ids(user):
+    """ID рекомендованных постов для пользователя (кэшируются на короткое время)"""
+    key = VIEWER_CACHE_KEY.format(user.pk)
+    post_ids = cache.get(key)
+    if post_ids is None:
+        excluded = set(follow_graph.following_ids(user))
+        excluded.add(user.pk)
+        post_ids = [post_id for post_id, author_id in candidate_pool() if author_id not in excluded]
+        cache.set(key, post_ids, settings.EXPLORE_VIEWER_CACHE_TIMEOUT)
+    return post_ids
@@ -0,0 +1,159 @@
+"""
+Материализованная домашняя лента.
+
+Посты обычных авторов раскладываются по лентам подписчиков при публикации
+(fan-out-on-write) в таблицу FeedEntry. Посты авторов, у которых подписчиков
+больше FEED_FANOUT_FOLLOWER_LIMIT, не раскладываются: они помечаются
+Post.pulled и подмешиваются при чтении ленты (fan-out-on-read). Режим
+запоминается в посте, поэтому когда автор пересекает порог в любую сторону,
+его прежние посты остаются в лентах.
+
+Раскладка только добавляет записи; длину лент до FEED_MAX_LENGTH сводит
+периодическая команда trim_feeds (обрезка при каждой раскладке стоила бы
+прохода по FEED_MAX_LENGTH записям каждого подписчика на каждый пост).
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from apps.accounts.graph import follow_graph
+from apps.accounts.models import Follow
+from .models import Post, FeedEntry
+
+PULL_AUTHORS_CACHE_KEY = 'feed:pull_authors'
+PULL_AUTHORS_CACHE_TIMEOUT = 300
+PULLED_AUTHORS_CACHE_KEY = 'feed:pulled_authors'
+# Сбрасывается, когда у автора появляется первый такой пост
+PULLED_AUTHORS_CACHE_TIMEOUT = 3600
+BULK_BATCH_SIZE = 1000
+
+
+def pull_author_ids():
+    """ID авторов, чьи посты читаются при запросе ленты, а не раскладываются"""
+    author_ids = cache.get(PULL_AUTHORS_CACHE_KEY)
+    if author_ids is None:
+        author_ids = set(
+            Follow.objects.values('following')
+            .annotate(followers=Count('id'))
+            .filter(followers__gt=settings.FEED_FANOUT_FOLLOWER_LIMIT)
+            .values_list('following', flat=True)
+        )
+        cache.set(PULL_AUTHORS_CACHE_KEY, author_ids, PULL_AUTHORS_CACHE_TIMEOUT)
+    return author_ids
+
+
+def pulled_author_ids():
+    """ID авторов, у которых есть посты, подмешиваемые в ленты при чтении"""
+    author_ids = cache.get(PULLED_AUTHORS_CACHE_KEY)
+    if author_ids is None:
+        author_ids = set(
+            Post.objects.filter(pulled=True).order_by().values_list('author_id', flat=True).distinct()
+        )
+        cache.set(PULLED_AUTHORS_CACHE_KEY, author_ids, PULLED_AUTHORS_CACHE_TIMEOUT)
+    return author_ids
+
+
+def fan_out_post(post):
+    """Разложить новый пост по лентам подписчиков автора"""
+    if post.author_id in pull_author_ids():
+        Post.objects.filter(pk=post.pk).update(pulled=True)
+        if post.author_id not in pulled_author_ids():
+            cache.delete(PULLED_AUTHORS_CACHE_KEY)
+        return
+
+    follower_ids = Follow.objects.filter(
+        following_id=post.author_id
+    ).values_list('follower_id', flat=True).iterator(chunk_size=BULK_BATCH_SIZE)
+
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(
+                user_id=follower_id,
+                post_id=post.pk,
+                author_id=post.author_id,
+                created_at=post.created_at,
+            )
+            for follower_id in follower_ids
+        ),
+        batch_size=BULK_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def backfill_feed(user, author):
+    """Добавить в ленту последние разложенные посты автора после подписки на него"""
+    posts = Post.objects.filter(author=author, pulled=False).values_list('pk', 'created_at')
+    FeedEntry.objects.bulk_create(
+        [
+            FeedEntry(user=user, post_id=post_id, author=author, created_at=created_at)
+            for post_id, created_at in posts[:settings.FEED_BACKFILL_SIZE]
+        ],
+        ignore_conflicts=True,
+    )
+    trim_feed(user)
+
+
+def remove_author_from_feed(user, author):
+    """Убрать из ленты посты автора после отписки"""
+    FeedEntry.objects.filter(user=user, author=author).delete()
+
+
+def trim_feed(user):
+    """Оставить в ленте не больше FEED_MAX_LENGTH последних записей"""
+    cutoff = FeedEntry.objects.filter(user=user).values_list(
+        'created_at', flat=True
+    )[settings.FEED_MAX_LENGTH:settings.FEED_MAX_LENGTH + 1]
+    if cutoff:
+        FeedEntry.objects.filter(user=user, created_at__lte=cutoff[0]).delete()
+
+
+def trim_feeds():
+    """Обрезать все ленты длиннее FEED_MAX_LENGTH; возвращает число обрезанных лент"""
+    user_ids = (
+        FeedEntry.objects.values('user_id')
+        .annotate(total=Count('pk'))
+        .filter(total__gt=settings.FEED_MAX_LENGTH)
+        .values_list('user_id', flat=True)
+        .order_by()
+    )
+    trimmed = 0
+    for user_id in user_ids.iterator(chunk_size=BULK_BATCH_SIZE):
+        trim_feed(user_id)
+        trimmed += 1
+    return trimmed
+
+
+def rebuild_feed(user):
+    """Пересобрать ленту пользователя с нуля по текущим подпискам"""
+    FeedEntry.objects.filter(user=user).delete()
+    posts = Post.objects.filter(
+        author_id__in=follow_graph.following_ids(user),
+        pulled=False,
+    ).values_list('pk', 'author_id', 'created_at')[:settings.FEED_MAX_LENGTH]
+    FeedEntry.objects.bulk_create(
+        [
+            FeedEntry(user=user, post_id=post_id, author_id=author_id, created_at=created_at)
+            for post_id, author_id, created_at in posts
+        ],
+        batch_size=BULK_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def home_feed_queryset(user, following_ids=None):
+    """
+    Посты домашней ленты: материализованные записи + неразложенные посты
+    крупных авторов. Если подписки пользователя уже загружены, их можно
+    передать в following_ids.
+    """
+    condition = Q(pk__in=FeedEntry.objects.filter(user=user).values('post_id'))
+
+    pulled_ids = pulled_author_ids()
+    if pulled_ids:
+        if following_ids is None:
+            following_ids = follow_graph.following_ids(user)
+        followed_pulled_ids = list(pulled_ids.intersection(following_ids))
+        if followed_pulled_ids:
+            condition |= Q(author_id__in=followed_pulled_ids, pulled=True)
+
+    return Post.objects.filter(condition)
@@ -0,0 +1,100 @@
+"""
+Лайки списком постов.
+
+Посты проверяются одним запросом: видимость для пользователя и его лайк
+(EXISTS) читаются вместе. Лайки вставляются одним INSERT ... ON CONFLICT DO
+NOTHING и удаляются одним DELETE; оба возвращают (RETURNING) ID постов, строки
+которых действительно изменились. По ним меняется likes_count (один UPDATE на
+пакет) и выставляются статусы: параллельный лайк того же поста не
+засчитывается дважды, а повторная отмена не уводит счетчик вниз.
+Результат - статус по каждому ID.
+"""
+from django.db import connection, transaction
+from django.db.models import Exists, F, OuterRef
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .cache import post_summaries
+from .models import Post, Like
+
+LIKED = 'liked'
+ALREADY_LIKED = 'already_liked'
+UNLIKED = 'unliked'
+NOT_LIKED = 'not_liked'
+NOT_FOUND = 'not_found'
+
+INSERT_LIKES_SQL = '''
+    INSERT INTO likes (user_id, post_id, created_at)
+    VALUES {values}
+    ON CONFLICT (user_id, post_id) DO NOTHING
+    RETURNING post_id
+'''
+
+DELETE_LIKES_SQL = '''
+    DELETE FROM likes
+    WHERE user_id = %s AND post_id IN ({placeholders})
+    RETURNING post_id
+'''
+
+
+def insert_likes(user_id, post_ids):
+    """Вставить лайки, которых еще нет; множество ID постов с новой строкой"""
+    created_at = Like._meta.get_field('created_at').get_db_prep_value(timezone.now(), connection)
+    sql = INSERT_LIKES_SQL.format(values=', '.join(['(%s, %s, %s)'] * len(post_ids)))
+    params = [value for post_id in post_ids for value in (user_id, post_id, created_at)]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return {post_id for post_id, in cursor.fetchall()}
+
+
+def delete_likes(user_id, post_ids):
+    """Удалить лайки; множество ID постов, строки которых удалил этот запрос"""
+    sql = DELETE_LIKES_SQL.format(placeholders=', '.join(['%s'] * len(post_ids)))
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [user_id, *post_ids])
+        return {post_id for post_id, in cursor.fetchall()}
+
+
+def like_many(user, post_ids):
+    """Лайкнуть посты post_ids от имени user; [{post_id, status}, ...]"""
+    posts = dict(
+        Post.objects.visible_to(user).filter(pk__in=post_ids)
+        .annotate(liked=Exists(Like.objects.filter(user=user, post=OuterRef('pk'))))
+        .values_list('pk', 'liked')
+    )
+    candidates = [pk for pk, liked in posts.items() if not liked]
+
+    created = set()
+    if candidates:
+        with transaction.atomic():
+            # Пост, лайкнутый параллельным запросом после проверки, в created не попадет
+            created = insert_likes(user.pk, candidates)
+            if created:
+                Post.objects.filter(pk__in=created).update(likes_count=F('likes_count') + 1)
+                # Вставка в обход ORM не отправляет сигналы
+                post_summaries.invalidate(created)
+
+    results = []
+    for pk in post_ids:
+        if pk not in posts:
+            status = NOT_FOUND
+        elif pk in created:
+            status = LIKED
+        else:
+            status = ALREADY_LIKED
+        results.append({'post_id': pk, 'status': status})
+    return results
+
+
+def unlike_many(user, post_ids):
+    """Убрать лайки user с постов post_ids; [{post_id, status}, ...]"""
+    deleted = set()
+    if post_ids:
+        with transaction.atomic():
+            # Строку, удаленную параллельным запросом, этот DELETE не вернет
+            deleted = delete_likes(user.pk, post_ids)
+            if deleted:
+                Post.objects.filter(pk__in=deleted).update(likes_count=Greatest(F('likes_count') - 1, 0))
+                post_summaries.invalidate(deleted)
+
+    return [{'post_id': pk, 'status': UNLIKED if pk in deleted else NOT_LIKED} for pk in post_ids]
@@ -0,0 +1,82 @@
+"""
+Места постов и поиск постов рядом с точкой.
+
+Свободный текст Post.location сводится к записи Location: одинаковые
+названия без координат - одно место, с координатами - одно место в радиусе
+MATCH_PRECISION ячейки geohash. Поиск «рядом» выбирает места по префиксам
+geohash ячейки точки и ее соседей (core.geo), отсекает лишние по точному
+расстоянию, а посты читаются по индексу (place, created_at).
+"""
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+
+from core import geo
+from .models import Location
+
+# Ячейка ~150 м: одноименные места ближе считаются одним местом
+MATCH_PRECISION = 7
+
+
+def normalize_location_name(name):
+    return ' '.join((name or '').split())
+
+
+def resolve_location(name, latitude=None, longitude=None):
+    """Найти или создать место по названию и координатам; None для пустого названия"""
+    name = normalize_location_name(name)
+    if not name:
+        return None
+    normalized = name.lower()
+
+    if latitude is None or longitude is None:
+        try:
+            # Savepoint: при гонке уникальный индекс не ломает внешнюю транзакцию
+            with transaction.atomic():
+                location, _ = Location.objects.get_or_create(
+                    normalized_name=normalized,
+                    geohash='',
+                    defaults={'name': name},
+                )
+        except IntegrityError:
+            location = Location.objects.get(normalized_name=normalized, geohash='')
+        return location
+
+    geohash = geo.encode(latitude, longitude)
+    location = Location.objects.filter(
+        normalized_name=normalized,
+        geohash__startswith=geohash[:MATCH_PRECISION],
+    ).first()
+    if location is None:
+        location = Location.objects.create(
+            name=name,
+            normalized_name=normalized,
+            latitude=latitude,
+            longitude=longitude,
+            geohash=geohash,
+        )
+    return location
+
+
+def adjust_posts_count(place_id, delta):
+    if place_id is not None:
+        Location.objects.filter(pk=place_id).update(posts_count=Greatest(F('posts_count') + delta, 0))
+
+
+def nearby_locations(latitude, longitude, radius_km):
+    """[(id, расстояние в км), ...] мест в радиусе, от ближних к дальним"""
+    precision = geo.precision_for_radius(radius_km, latitude)
+    cells = geo.neighbours(latitude, longitude, precision)
+    condition = Q()
+    for cell in cells:
+        condition |= Q(geohash__startswith=cell)
+
+    found = []
+    candidates = Location.objects.filter(condition).values_list('pk', 'latitude', 'longitude')
+    for pk, lat, lon in candidates.iterator():
+        distance = geo.distance_km(latitude, longitude, lat, lon)
+        if distance <= radius_km:
+            found.append((pk, distance))
+    found.sort(key=lambda item: item[1])
+    return found[:settings.LOCATIONS_NEARBY_MAX_PLACES]
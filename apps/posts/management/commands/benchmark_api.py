@@ -0,0 +1,90 @@
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from benchmarks.runner import compare, current_commit, run_benchmarks
+from benchmarks.seed import DEFAULT_CONFIG, seed_graph
+
+DEFAULT_BASELINE = Path(settings.BASE_DIR) / 'benchmarks' / 'baseline.json'
+
+
+class Command(BaseCommand):
+    help = (
+        'Бенчмарк API на синтетическом социальном графе во временной тестовой БД. '
+        'Падает, если количество SQL-запросов или загруженных строк выросло относительно эталона.'
+    )
+
+    def add_arguments(self, parser):
+        for key, default in DEFAULT_CONFIG.items():
+            parser.add_argument(
+                f'--{key.replace("_", "-")}',
+                type=type(default),
+                default=default,
+                dest=key,
+            )
+        parser.add_argument('--iterations', type=int, default=20, help='Замеров на эндпоинт')
+        parser.add_argument('--warmup', type=int, default=2, help='Прогревочных запросов на эндпоинт')
+        parser.add_argument('--output', help='Куда сохранить результаты (JSON)')
+        parser.add_argument('--baseline', default=str(DEFAULT_BASELINE), help='Эталон для сравнения')
+        parser.add_argument('--save-baseline', action='store_true', help='Записать результаты как новый эталон')
+
+    def handle(self, *args, **options):
+        config = {key: options[key] for key in DEFAULT_CONFIG}
+
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.stdout.write(f'Генерация данных: {config}')
+            seed_graph(config)
+            # Собственные замеры middleware не должны искажать результаты
+            with override_settings(REQUEST_METRICS={'SAMPLE_RATE': 0}):
+                results = run_benchmarks(options['iterations'], options['warmup'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        report = {
+            'commit': current_commit(),
+            'database': connection.vendor,
+            'config': config,
+            'endpoints': results,
+        }
+        self.print_table(results)
+
+        if options['output']:
+            Path(options['output']).write_text(json.dumps(report, indent=2, ensure_ascii=False) + '\n')
+
+        baseline_path = Path(options['baseline'])
+        if options['save_baseline']:
+            baseline_path.write_text(json.dumps(report, indent=2, ensure_ascii=False) + '\n')
+            self.stdout.write(self.style.SUCCESS(f'Эталон сохранен: {baseline_path}'))
+            return
+
+        if not baseline_path.exists():
+            self.stdout.write(self.style.WARNING('Эталон не найден, сравнение пропущено'))
+            return
+
+        baseline = json.loads(baseline_path.read_text())
+        if baseline.get('config') != config:
+            self.stdout.write(self.style.WARNING('Параметры генерации отличаются от эталона'))
+
+        regressions = compare(results, baseline['endpoints'])
+        if regressions:
+            details = ', '.join(
+                f'{name} {metric}: {before} -> {after}' for name, metric, before, after in regressions
+            )
+            raise CommandError(f'Выросло количество SQL-запросов или строк: {details}')
+        self.stdout.write(self.style.SUCCESS(f'Регрессий относительно {baseline.get("commit")} нет'))
+
+    def print_table(self, results):
+        header = f'{"endpoint":<16}{"status":>7}{"queries":>9}{"rows":>7}{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}'
+        self.stdout.write(header)
+        for name, m in results.items():
+            self.stdout.write(
+                f'{name:<16}{m["status"]:>7}{m["queries"]:>9}{m["rows"]:>7}'
+                f'{m["p50_ms"]:>9}{m["p95_ms"]:>9}{m["p99_ms"]:>9}'
+            )
@@ -0,0 +1,60 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.accounts.authentication import issue_tokens
+from apps.accounts.models import User
+from benchmarks.concurrency import run_concurrency
+from benchmarks.runner import pick_fixtures
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнить пропускную способность синхронных представлений (WSGI) и их '
+        'асинхронных вариантов (ASGI) при конкурентных клиентах. Оба сервера '
+        'должны быть запущены на этой же БД.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--wsgi-url', default='http://127.0.0.1:8000', help='Адрес WSGI-сервера')
+        parser.add_argument('--asgi-url', default='http://127.0.0.1:8001', help='Адрес ASGI-сервера')
+        parser.add_argument('--username', help='От чьего имени запросы (по умолчанию - с наибольшим числом подписок)')
+        parser.add_argument('--clients', type=int, default=50, help='Одновременных клиентов')
+        parser.add_argument('--requests', type=int, default=500, help='Запросов на эндпоинт')
+        parser.add_argument('--output', help='Куда сохранить результаты (JSON)')
+
+    def handle(self, *args, **options):
+        if not User.objects.exists():
+            raise CommandError('БД пуста: заполните ее, например, через benchmarks.seed')
+
+        viewer, params = pick_fixtures()
+        if options['username']:
+            viewer = User.objects.filter(username=options['username']).first()
+            if viewer is None:
+                raise CommandError(f'Пользователь {options["username"]} не найден')
+
+        results = run_concurrency(
+            options['wsgi_url'],
+            options['asgi_url'],
+            str(issue_tokens(viewer).access_token),
+            params,
+            options['clients'],
+            options['requests'],
+        )
+
+        self.stdout.write(f'{"endpoint":<20}{"server":>7}{"req/s":>9}{"errors":>8}{"p50 ms":>9}{"p95 ms":>9}')
+        for name, servers in results.items():
+            for server, m in servers.items():
+                self.stdout.write(
+                    f'{name:<20}{server:>7}{m["rps"]:>9}{m["errors"]:>8}'
+                    f'{str(m["p50_ms"]):>9}{str(m["p95_ms"]):>9}'
+                )
+
+        if options['output']:
+            report = {
+                'clients': options['clients'],
+                'requests': options['requests'],
+                'endpoints': results,
+            }
+            Path(options['output']).write_text(json.dumps(report, indent=2, ensure_ascii=False) + '\n')
@@ -0,0 +1,125 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.utils import timezone
+from rest_framework.request import Request
+
+from apps.accounts.graph import follow_graph
+from apps.accounts.models import Follow
+from apps.accounts.views import FollowersListView, FollowingListView
+from apps.posts.explore import ranked_pool_queryset, recent_pool_queryset
+from apps.posts.models import Post, Like, Comment, Story
+from apps.posts.views import FeedView, UserPostsViewSet, CommentViewSet
+from core.pagination import ChronologicalKeysetPagination, KeysetPagination
+
+
+def page_queryset(view_class, viewer, action=None, **kwargs):
+    """Выборка первой страницы представления: его get_queryset, фильтры и пагинация"""
+    view = view_class(action=action, args=(), kwargs=kwargs, format_kwarg=None)
+    request = Request(RequestFactory().get('/'))
+    request.user = viewer
+    view.request = request
+    queryset = view.filter_queryset(view.get_queryset())
+    paginator = view.paginator
+    if hasattr(paginator, 'page_queryset'):
+        return paginator.page_queryset(queryset, request)
+    return queryset[:paginator.get_limit(request)]
+
+
+def key_queries(viewer, author, post):
+    """
+    Запросы ключевых эндпоинтов: (имя, таблица, индексы, выборка). Таблица
+    не должна читаться полным просмотром, в плане должен быть один из индексов.
+    viewer подписан на author, post - пост author
+    """
+    request = Request(RequestFactory().get('/'))
+    return [
+        ('FeedView', 'feed_entries', ('feed_user_created_idx', 'feed_user_author_idx'),
+         page_queryset(FeedView, viewer)),
+        ('UserPostsViewSet', 'posts', ('posts_author_created_idx',),
+         page_queryset(UserPostsViewSet, viewer, username=author.username)),
+        ('ExploreView', 'explore_candidates', ('explore_score_idx',), ranked_pool_queryset()),
+        ('ExploreView.recent', 'posts', ('posts_created_idx', 'posts_author_created_idx'), recent_pool_queryset()),
+        ('CommentViewSet', 'comments', ('comments_post_top_idx',),
+         page_queryset(CommentViewSet, viewer, action='list', post_pk=post.pk)),
+        # Выборки действий строятся в самих действиях - здесь те же запросы
+        ('CommentViewSet.replies', 'comments', ('comments_parent_created_idx',),
+         ChronologicalKeysetPagination().page_queryset(
+             Comment.objects.filter(parent_id=0).select_related('author'), request
+         )),
+        ('PostViewSet.likes', 'likes', ('likes_post_created_idx',),
+         KeysetPagination().page_queryset(Like.objects.filter(post=post).select_related('user'), request)),
+        ('StoryViewSet.following_stories', 'stories', ('stories_author_created_idx', 'stories_expires_author_idx'),
+         Story.objects.filter(
+             author__in=follow_graph.following_ids(viewer), expires_at__gt=timezone.now()
+         ).select_related('author').order_by('-created_at')),
+        ('FollowersListView', 'follows', ('follows_following_created_idx',),
+         page_queryset(FollowersListView, viewer, username=author.username)),
+        ('FollowingListView', 'follows', ('follows_follower_created_idx',),
+         page_queryset(FollowingListView, viewer, username=viewer.username)),
+    ]
+
+
+def uses_seq_scan(plan, table):
+    """Есть ли в плане полный просмотр таблицы"""
+    if connection.vendor == 'postgresql':
+        return f'Seq Scan on {table}' in plan
+    # SQLite: "SCAN table" без индекса, "SEARCH table USING INDEX" - поиск по индексу
+    return any(
+        line.strip().endswith(f'SCAN {table}') for line in plan.splitlines()
+    )
+
+
+def used_index(plan, indexes):
+    """Первый из индексов, который встречается в плане (None - ни одного)"""
+    return next((index for index in indexes if index in plan), None)
+
+
+def sample_objects():
+    """(подписчик, автор, пост автора) из базы: выборкам представлений нужны реальные строки"""
+    follow = Follow.objects.select_related('follower', 'following').filter(
+        following__posts__isnull=False
+    ).order_by('pk').first()
+    if follow is None:
+        return None
+    return follow.follower, follow.following, Post.objects.filter(author=follow.following).first()
+
+
+def explain_key_queries(viewer, author, post):
+    """[(имя, таблица, индексы, план), ...] для key_queries()"""
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            # На маленьких таблицах планировщик всегда выберет Seq Scan,
+            # поэтому проверяем, что индексный план вообще возможен
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        return [
+            (name, table, indexes, queryset.explain())
+            for name, table, indexes, queryset in key_queries(viewer, author, post)
+        ]
+
+
+class Command(BaseCommand):
+    help = 'Проверяет, что запросы ключевых эндпоинтов используют свои индексы (EXPLAIN)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plans', action='store_true', help='Печатать планы целиком')
+
+    def handle(self, *args, **options):
+        sample = sample_objects()
+        if sample is None:
+            raise CommandError('Нужна хотя бы одна подписка на автора с постами')
+
+        failures = []
+        for name, table, indexes, plan in explain_key_queries(*sample):
+            index = used_index(plan, indexes)
+            failed = index is None or uses_seq_scan(plan, table)
+            status = self.style.ERROR('NO INDEX') if failed else self.style.SUCCESS(index)
+            self.stdout.write(f'{status}  {name} ({table})')
+            if options['verbose_plans'] or failed:
+                self.stdout.write(plan)
+            if failed:
+                failures.append(name)
+
+        if failures:
+            raise CommandError(f'Запросы читают таблицы не по своим индексам: {", ".join(failures)}')
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.posts.models import Story
+from apps.posts.stories import expire_stories
+
+
+class Command(BaseCommand):
+    help = 'Удаляет истекшие истории пачками вместе с файлами изображений и их копиями'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Историй за одно удаление')
+        parser.add_argument('--dry-run', action='store_true', help='Только показать, сколько историй истекло')
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            expired = Story.objects.filter(expires_at__lte=timezone.now()).count()
+            self.stdout.write(f'Истекших историй: {expired}')
+            return
+
+        stories, cursors = expire_stories(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено историй: {stories}, устаревших отметок просмотра: {cursors}'
+        ))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.posts.models import Post
+from apps.posts.tags import index_post
+
+
+class Command(BaseCommand):
+    help = (
+        'Индексирует хэштеги и упоминания в подписях существующих постов '
+        '(после загрузки данных в обход API)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Постов в одной транзакции')
+
+    def handle(self, *args, **options):
+        indexed = 0
+        last_pk = 0
+        while True:
+            batch = list(
+                Post.objects.filter(pk__gt=last_pk)
+                .order_by('pk')
+                .only('pk', 'author_id', 'caption', 'created_at')[:options['batch_size']]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            with transaction.atomic():
+                for post in batch:
+                    index_post(post)
+            indexed += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f'Проиндексировано постов: {indexed}'))
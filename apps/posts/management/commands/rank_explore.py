@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.posts.explore import rank_candidates
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает пул рекомендаций (Explore) по скорости набора лайков и комментариев'
+
+    def handle(self, *args, **options):
+        size = rank_candidates()
+        self.stdout.write(self.style.SUCCESS(f'Кандидатов в пуле: {size}'))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from apps.accounts.models import User
+from apps.posts.feed import rebuild_feed
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает материализованные ленты пользователей по текущим подпискам'
+
+    def add_arguments(self, parser):
+        parser.add_argument('usernames', nargs='*', help='Пользователи (по умолчанию все активные)')
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(is_active=True)
+        if options['usernames']:
+            users = users.filter(username__in=options['usernames'])
+
+        rebuilt = 0
+        for user in users.iterator():
+            rebuild_feed(user)
+            rebuilt += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Пересобрано лент: {rebuilt}'))
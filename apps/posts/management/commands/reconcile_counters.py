@@ -0,0 +1,86 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from apps.posts.models import Post, Like, Comment, Hashtag, PostHashtag
+
+
+def count_subquery(model, fk):
+    """Подзапрос с фактическим количеством связанных строк"""
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{fk: OuterRef('pk')})
+            .order_by()
+            .values(fk)
+            .annotate(total=Count('pk'))
+            .values('total'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+class Command(BaseCommand):
+    help = 'Сверяет хранимые счетчики лайков, комментариев, ответов и постов хэштегов с фактическими данными'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Размер пачки объектов')
+        parser.add_argument('--dry-run', action='store_true', help='Только показать расхождения')
+
+    def handle(self, *args, **options):
+        self.batch_size = options['batch_size']
+        self.dry_run = options['dry_run']
+
+        fixed_posts = self.reconcile(
+            Post.objects.all(),
+            likes_count=count_subquery(Like, 'post'),
+            comments_count=count_subquery(Comment, 'post'),
+        )
+        fixed_comments = self.reconcile(
+            Comment.objects.all(),
+            replies_count=count_subquery(Comment, 'parent'),
+        )
+        fixed_hashtags = self.reconcile(
+            Hashtag.objects.all(),
+            posts_count=count_subquery(PostHashtag, 'hashtag'),
+        )
+
+        verb = 'Найдено расхождений' if self.dry_run else 'Исправлено'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb}: постов {fixed_posts}, комментариев {fixed_comments}, хэштегов {fixed_hashtags}'
+        ))
+
+    def reconcile(self, queryset, **counters):
+        """Пройти таблицу пачками по pk и поправить разошедшиеся счетчики"""
+        actual = {f'actual_{field}': expression for field, expression in counters.items()}
+        fields = list(counters)
+        fixed = 0
+        last_pk = 0
+
+        while True:
+            batch = list(
+                queryset.filter(pk__gt=last_pk)
+                .order_by('pk')
+                .only('pk', *fields)
+                .annotate(**actual)[:self.batch_size]
+            )
+            if not batch:
+                return fixed
+            last_pk = batch[-1].pk
+
+            drifted = []
+            for obj in batch:
+                changed = False
+                for field in fields:
+                    value = getattr(obj, f'actual_{field}')
+                    if getattr(obj, field) != value:
+                        setattr(obj, field, value)
+                        changed = True
+                if changed:
+                    drifted.append(obj)
+
+            fixed += len(drifted)
+            if drifted and not self.dry_run:
+                with transaction.atomic():
+                    queryset.model.objects.bulk_update(drifted, fields)
@@ -0,0 +1,71 @@
+import json
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    index = max(0, int(round(percent / 100 * len(ordered))) - 1)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+def cache_hit_ratio(records):
+    """Доля попаданий в кэш объектов по всем запросам представления ('-' без обращений)"""
+    hits = sum(r.get('cache_hits', 0) for r in records)
+    total = hits + sum(r.get('cache_misses', 0) for r in records)
+    return round(hits / total, 3) if total else '-'
+
+
+class Command(BaseCommand):
+    help = 'Сводка метрик запросов по представлениям из лога RequestMetricsMiddleware'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'files', nargs='*',
+            help='Файлы с JSON-строками метрик ("-" - stdin); по умолчанию REQUEST_METRICS["LOG_FILE"]',
+        )
+        parser.add_argument('--sort', default='queries_p95', help='Колонка для сортировки')
+
+    def handle(self, *args, **options):
+        files = options['files'] or [settings.REQUEST_METRICS.get('LOG_FILE')]
+        if not all(files):
+            raise CommandError('Не указан файл с метриками')
+
+        by_view = defaultdict(list)
+        for path in files:
+            stream = sys.stdin if path == '-' else open(path, encoding='utf-8')
+            with stream:
+                for line in stream:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if isinstance(record, dict) and 'queries' in record:
+                        by_view[f"{record['method']} {record['view']}"].append(record)
+
+        rows = []
+        for view, records in by_view.items():
+            rows.append({
+                'view': view,
+                'requests': len(records),
+                'queries_p50': percentile([r['queries'] for r in records], 50),
+                'queries_p95': percentile([r['queries'] for r in records], 95),
+                'db_ms_p95': percentile([r['db_ms'] for r in records], 95),
+                # В записях до появления serialize_ms время сериализаторов входило в app_ms
+                'serialize_ms_p95': percentile([r.get('serialize_ms', 0) for r in records], 95),
+                'total_ms_p95': percentile([r['total_ms'] for r in records], 95),
+                'dup_max': max(r['duplicate_queries'] for r in records),
+                'kb_avg': round(
+                    sum(r['response_bytes'] or 0 for r in records) / len(records) / 1024, 1
+                ),
+                'cache_hit': cache_hit_ratio(records),
+            })
+        rows.sort(key=lambda row: row.get(options['sort'], 0), reverse=True)
+
+        columns = ['requests', 'queries_p50', 'queries_p95', 'db_ms_p95', 'serialize_ms_p95', 'total_ms_p95', 'dup_max', 'kb_avg', 'cache_hit']
+        self.stdout.write(f'{"view":<40}' + ''.join(f'{c:>14}' for c in columns))
+        for row in rows:
+            self.stdout.write(f'{row["view"]:<40}' + ''.join(f'{row[c]:>14}' for c in columns))
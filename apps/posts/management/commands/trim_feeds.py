@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.posts.feed import trim_feeds
+
+
+class Command(BaseCommand):
+    help = 'Обрезает материализованные ленты до FEED_MAX_LENGTH последних записей'
+
+    def handle(self, *args, **options):
+        trimmed = trim_feeds()
+        self.stdout.write(self.style.SUCCESS(f'Обрезано лент: {trimmed}'))
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.5 on 2026-10-16 22:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+from core.operations import PortableAddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY нельзя выполнять внутри транзакции
+    atomic = False
+
+    dependencies = [
+        ('posts', '0003_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        PortableAddIndexConcurrently(
+            model_name='comment',
+            index=models.Index(fields=['post', 'parent', 'created_at'], name='comments_post_parent_idx'),
+        ),
+        PortableAddIndexConcurrently(
+            model_name='comment',
+            index=models.Index(condition=models.Q(('parent__isnull', True)), fields=['post', 'created_at', 'id'], name='comments_post_top_idx'),
+        ),
+        PortableAddIndexConcurrently(
+            model_name='comment',
+            index=models.Index(fields=['parent', 'created_at', 'id'], name='comments_parent_created_idx'),
+        ),
+        PortableAddIndexConcurrently(
+            model_name='like',
+            index=models.Index(fields=['post', '-created_at', '-id'], name='likes_post_created_idx'),
+        ),
+        PortableAddIndexConcurrently(
+            model_name='post',
+            index=models.Index(fields=['author', '-created_at', '-id'], name='posts_author_created_idx'),
+        ),
+        PortableAddIndexConcurrently(
+            model_name='post',
+            index=models.Index(fields=['-created_at', '-id'], name='posts_created_idx'),
+        ),
+        PortableAddIndexConcurrently(
+            model_name='story',
+            index=models.Index(fields=['expires_at', 'author'], name='stories_expires_author_idx'),
+        ),
+        PortableAddIndexConcurrently(
+            model_name='story',
+            index=models.Index(fields=['author', '-created_at'], include=('expires_at',), name='stories_author_created_idx'),
+        ),
+    ]
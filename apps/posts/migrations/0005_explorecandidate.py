@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-16 22:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0004_query_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExploreCandidate',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='explore_candidate', serialize=False, to='posts.post', verbose_name='пост')),
+                ('score', models.FloatField(verbose_name='рейтинг')),
+                ('computed_at', models.DateTimeField(verbose_name='дата расчета')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='автор поста')),
+            ],
+            options={
+                'verbose_name': 'Кандидат в рекомендации',
+                'verbose_name_plural': 'Кандидаты в рекомендации',
+                'db_table': 'explore_candidates',
+                'ordering': ['-score'],
+                'indexes': [models.Index(fields=['-score'], name='explore_score_idx')],
+            },
+        ),
+    ]
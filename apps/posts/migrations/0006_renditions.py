@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-16 22:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0005_explorecandidate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='renditions',
+            field=models.JSONField(blank=True, default=dict, verbose_name='уменьшенные копии'),
+        ),
+        migrations.AddField(
+            model_name='story',
+            name='renditions',
+            field=models.JSONField(blank=True, default=dict, verbose_name='уменьшенные копии'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-16 22:44
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_renditions'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StorySeen',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seen_until', models.DateTimeField(verbose_name='просмотрено до')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='автор историй')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='seen_stories', to=settings.AUTH_USER_MODEL, verbose_name='зритель')),
+            ],
+            options={
+                'verbose_name': 'Просмотр историй',
+                'verbose_name_plural': 'Просмотры историй',
+                'db_table': 'story_seen',
+                'indexes': [models.Index(fields=['seen_until'], name='story_seen_until_idx')],
+                'unique_together': {('user', 'author')},
+            },
+        ),
+    ]
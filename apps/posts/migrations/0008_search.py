@@ -0,0 +1,66 @@
+# Generated by Django 5.2.5 on 2026-10-16 22:48
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations
+
+from core.operations import PostgresAddIndexConcurrently
+
+# Словарь 'russian' должен совпадать с SEARCH_CONFIG в apps.search.backends
+CREATE_TRIGGER = """
+CREATE OR REPLACE FUNCTION posts_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('russian', coalesce(NEW.caption, '')), 'A') ||
+        setweight(to_tsvector('russian', coalesce(NEW.location, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER posts_search_vector_trigger
+BEFORE INSERT OR UPDATE OF caption, location, search_vector ON posts
+FOR EACH ROW EXECUTE FUNCTION posts_search_vector_update();
+"""
+
+DROP_TRIGGER = """
+DROP TRIGGER IF EXISTS posts_search_vector_trigger ON posts;
+DROP FUNCTION IF EXISTS posts_search_vector_update();
+"""
+
+
+def create_trigger(apps, schema_editor):
+    """Триггер поддерживает search_vector при любой записи, включая bulk_create"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(CREATE_TRIGGER)
+    # Заполнить вектор для существующих постов (срабатывает тот же триггер)
+    schema_editor.execute('UPDATE posts SET search_vector = NULL')
+
+
+def drop_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_TRIGGER)
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY нельзя выполнять внутри транзакции
+    atomic = False
+
+    dependencies = [
+        ('posts', '0007_storyseen'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='поисковый вектор'),
+        ),
+        migrations.RunPython(create_trigger, drop_trigger),
+        PostgresAddIndexConcurrently(
+            model_name='post',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='posts_search_vector_idx'),
+        ),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 5.2.5 on 2026-10-16 22:52
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Hashtag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='название')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='количество постов')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='дата создания')),
+            ],
+            options={
+                'verbose_name': 'Хэштег',
+                'verbose_name_plural': 'Хэштеги',
+                'db_table': 'hashtags',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='HashtagDailyCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='день')),
+                ('posts_count', models.IntegerField(default=0, verbose_name='количество постов')),
+                ('hashtag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_counts', to='posts.hashtag', verbose_name='хэштег')),
+            ],
+            options={
+                'verbose_name': 'Счетчик хэштега за день',
+                'verbose_name_plural': 'Счетчики хэштегов по дням',
+                'db_table': 'hashtag_daily_counts',
+                'indexes': [models.Index(fields=['day'], name='hashtag_daily_day_idx')],
+                'unique_together': {('hashtag', 'day')},
+            },
+        ),
+        migrations.CreateModel(
+            name='Mention',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='дата упоминания')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='кто упомянул')),
+                ('comment', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='mentions', to='posts.comment', verbose_name='комментарий')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mentions', to='posts.post', verbose_name='пост')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mentions', to=settings.AUTH_USER_MODEL, verbose_name='упомянутый пользователь')),
+            ],
+            options={
+                'verbose_name': 'Упоминание',
+                'verbose_name_plural': 'Упоминания',
+                'db_table': 'mentions',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['user', '-created_at', '-id'], name='mentions_user_created_idx'), models.Index(fields=['post', 'comment'], name='mentions_post_comment_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='PostHashtag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(verbose_name='дата поста')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='автор поста')),
+                ('hashtag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='post_links', to='posts.hashtag', verbose_name='хэштег')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hashtag_links', to='posts.post', verbose_name='пост')),
+            ],
+            options={
+                'verbose_name': 'Хэштег поста',
+                'verbose_name_plural': 'Хэштеги постов',
+                'db_table': 'post_hashtags',
+                'indexes': [models.Index(fields=['hashtag', '-created_at', '-post'], name='post_hashtags_feed_idx'), models.Index(fields=['post'], name='post_hashtags_post_idx')],
+                'unique_together': {('hashtag', 'post')},
+            },
+        ),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 5.2.5 on 2026-10-16 22:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models, transaction
+from django.db.models import Count
+
+from core.operations import PortableAddIndexConcurrently
+
+
+def link_locations(apps, schema_editor):
+    """Места из существующих названий (без координат) и ссылки на них из постов"""
+    Location = apps.get_model('posts', 'Location')
+    Post = apps.get_model('posts', 'Post')
+
+    names = Post.objects.exclude(location='').values_list('location', flat=True).distinct().iterator()
+    for raw in names:
+        name = ' '.join(raw.split())
+        if not name:
+            continue
+        with transaction.atomic():
+            location, _ = Location.objects.get_or_create(
+                normalized_name=name.lower(),
+                geohash='',
+                defaults={'name': name},
+            )
+            Post.objects.filter(location=raw).update(place=location)
+
+    totals = Post.objects.exclude(place=None).values('place').annotate(total=Count('pk')).order_by()
+    for row in totals.iterator():
+        Location.objects.filter(pk=row['place']).update(posts_count=row['total'])
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY нельзя выполнять внутри транзакции
+    atomic = False
+
+    dependencies = [
+        ('posts', '0009_hashtags'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Location',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='название')),
+                ('normalized_name', models.CharField(max_length=100, verbose_name='нормализованное название')),
+                ('latitude', models.FloatField(blank=True, null=True, verbose_name='широта')),
+                ('longitude', models.FloatField(blank=True, null=True, verbose_name='долгота')),
+                ('geohash', models.CharField(blank=True, max_length=12, verbose_name='geohash')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='количество постов')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='дата создания')),
+            ],
+            options={
+                'verbose_name': 'Место',
+                'verbose_name_plural': 'Места',
+                'db_table': 'locations',
+                'ordering': ['name'],
+                'indexes': [models.Index(fields=['normalized_name'], name='locations_name_idx'), models.Index(fields=['geohash'], name='locations_geohash_idx', opclasses=['varchar_pattern_ops'])],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('geohash', '')), fields=('normalized_name',), name='locations_name_without_coords_uniq')],
+            },
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='place',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='posts', to='posts.location', verbose_name='место'),
+        ),
+        PortableAddIndexConcurrently(
+            model_name='post',
+            index=models.Index(fields=['place', '-created_at', '-id'], name='posts_place_created_idx'),
+        ),
+        migrations.RunPython(link_locations, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    GIN-индекс posts_search_vector_idx из 0008_search остается в PostgreSQL,
+    но убирается из состояния модели, чтобы пересоздание таблицы posts на
+    SQLite не пыталось его повторить
+    """
+
+    dependencies = [
+        ('posts', '0010_locations'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.RemoveIndex(model_name='post', name='posts_search_vector_idx'),
+            ],
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.5 on 2026-10-16 23:40
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def mark_pulled_posts(apps, schema_editor):
+    # До этой миграции режим раскладки решался при чтении по текущему числу
+    # подписчиков: посты таких авторов не разложены по лентам
+    Follow = apps.get_model('accounts', 'Follow')
+    Post = apps.get_model('posts', 'Post')
+
+    pull_authors = (
+        Follow.objects.values('following')
+        .annotate(followers=Count('id'))
+        .filter(followers__gt=settings.FEED_FANOUT_FOLLOWER_LIMIT)
+        .values('following')
+    )
+    Post.objects.filter(author__in=pull_authors).update(pulled=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_trgm_indexes_out_of_state'),
+        ('posts', '0011_search_index_out_of_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='pulled',
+            field=models.BooleanField(default=False, verbose_name='читается при запросе ленты'),
+        ),
+        migrations.RunPython(mark_pulled_posts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-16 23:40
+
+from django.db import migrations, models
+
+from core.operations import PortableAddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY нельзя выполнять внутри транзакции
+    atomic = False
+
+    dependencies = [
+        ('posts', '0012_post_pulled'),
+    ]
+
+    operations = [
+        PortableAddIndexConcurrently(
+            model_name='post',
+            index=models.Index(condition=models.Q(('pulled', True)), fields=['author', '-created_at', '-id'], name='posts_pulled_author_idx'),
+        ),
+    ]
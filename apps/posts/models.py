@@ -1,10 +1,71 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchVectorField
 from django.utils.translation import gettext_lazy as _
 
+from apps.accounts.visibility import VisibilityResolver
+
 User = get_user_model()
 
 
+class PostQuerySet(models.QuerySet):
+    """Общий слой запросов для списков постов"""
+
+    def for_listing(self, viewer=None):
+        """
+        Посты для сериализации в списках: автор подгружается JOIN-ом,
+        счетчики берутся из колонок, лайк текущего пользователя - подзапросом EXISTS.
+        Строки лайков и комментариев в память не загружаются.
+        """
+        queryset = self.select_related('author')
+        if viewer is not None and viewer.is_authenticated:
+            queryset = queryset.annotate(
+                viewer_has_liked=models.Exists(
+                    Like.objects.filter(user=viewer, post=models.OuterRef('pk'))
+                )
+            )
+        return queryset
+
+    def visible_to(self, viewer):
+        """Посты, которые viewer может видеть (правило - в VisibilityResolver)"""
+        return VisibilityResolver(viewer).filter(self)
+
+
+class Location(models.Model):
+    """Место: нормализованное название и, если известны, координаты"""
+    name = models.CharField(_('название'), max_length=100)
+    # Название без лишних пробелов в нижнем регистре - по нему ищутся совпадения
+    normalized_name = models.CharField(_('нормализованное название'), max_length=100)
+    latitude = models.FloatField(_('широта'), null=True, blank=True)
+    longitude = models.FloatField(_('долгота'), null=True, blank=True)
+    # Пусто, если координат нет
+    geohash = models.CharField(_('geohash'), max_length=12, blank=True)
+    posts_count = models.PositiveIntegerField(_('количество постов'), default=0)
+    created_at = models.DateTimeField(_('дата создания'), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _('Место')
+        verbose_name_plural = _('Места')
+        db_table = 'locations'
+        ordering = ['name']
+        indexes = [
+            models.Index(fields=['normalized_name'], name='locations_name_idx'),
+            # varchar_pattern_ops - чтобы LIKE 'префикс%' использовал индекс при любой collation
+            models.Index(fields=['geohash'], name='locations_geohash_idx', opclasses=['varchar_pattern_ops']),
+        ]
+        constraints = [
+            # Место без координат определяется только названием
+            models.UniqueConstraint(
+                fields=['normalized_name'],
+                condition=models.Q(geohash=''),
+                name='locations_name_without_coords_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
 class Post(models.Model):
     """Модель поста"""
     author = models.ForeignKey(
@@ -17,29 +78,53 @@ class Post(models.Model):
         _('изображение'),
         upload_to='posts/%Y/%m/%d/'
     )
+    renditions = models.JSONField(_('уменьшенные копии'), default=dict, blank=True)
     caption = models.TextField(_('описание'), blank=True, max_length=2200)
     location = models.CharField(_('местоположение'), max_length=100, blank=True)
+    place = models.ForeignKey(
+        Location,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='posts',
+        verbose_name=_('место')
+    )
+    likes_count = models.PositiveIntegerField(_('количество лайков'), default=0)
+    comments_count = models.PositiveIntegerField(_('количество комментариев'), default=0)
+    # Режим раскладки, выбранный при публикации: пост крупного автора не лежит
+    # в FeedEntry и подмешивается в ленты подписчиков при чтении
+    pulled = models.BooleanField(_('читается при запросе ленты'), default=False)
+    # Заполняется триггером БД из caption и location (PostgreSQL)
+    search_vector = SearchVectorField(_('поисковый вектор'), null=True, editable=False)
     
     created_at = models.DateTimeField(_('дата создания'), auto_now_add=True)
     updated_at = models.DateTimeField(_('дата обновления'), auto_now=True)
 
+    objects = PostQuerySet.as_manager()
+
     class Meta:
         verbose_name = _('Пост')
         verbose_name_plural = _('Посты')
         db_table = 'posts'
         ordering = ['-created_at']
+        indexes = [
+            # Посты автора (профиль, лента fan-out-on-read) и общая лента
+            models.Index(fields=['author', '-created_at', '-id'], name='posts_author_created_idx'),
+            models.Index(fields=['-created_at', '-id'], name='posts_created_idx'),
+            models.Index(fields=['place', '-created_at', '-id'], name='posts_place_created_idx'),
+            # Посты, подмешиваемые в ленты при чтении, и их авторы (pulled_author_ids)
+            models.Index(
+                fields=['author', '-created_at', '-id'],
+                name='posts_pulled_author_idx',
+                condition=models.Q(pulled=True),
+            ),
+        ]
+        # GIN-индекс posts_search_vector_idx есть только в PostgreSQL и живет
+        # в миграциях (0008_search, 0011), а не в состоянии модели
 
     def __str__(self):
         return f"Пост от {self.author.username} - {self.created_at.strftime('%d.%m.%Y %H:%M')}"
 
-    @property
-    def likes_count(self):
-        return self.likes.count()
-
-    @property
-    def comments_count(self):
-        return self.comments.count()
-
 
 class Like(models.Model):
     """Модель лайков"""
@@ -62,6 +147,9 @@ class Like(models.Model):
         verbose_name_plural = _('Лайки')
         db_table = 'likes'
         unique_together = ('user', 'post')
+        indexes = [
+            models.Index(fields=['post', '-created_at', '-id'], name='likes_post_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} лайкнул пост {self.post.id}"
@@ -90,6 +178,7 @@ class Comment(models.Model):
         verbose_name=_('родительский комментарий')
     )
     text = models.TextField(_('текст'), max_length=500)
+    replies_count = models.PositiveIntegerField(_('количество ответов'), default=0)
     
     created_at = models.DateTimeField(_('дата создания'), auto_now_add=True)
     updated_at = models.DateTimeField(_('дата обновления'), auto_now=True)
@@ -99,14 +188,20 @@ class Comment(models.Model):
         verbose_name_plural = _('Комментарии')
         db_table = 'comments'
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['post', 'parent', 'created_at'], name='comments_post_parent_idx'),
+            # Только комментарии верхнего уровня - основная страница обсуждения
+            models.Index(
+                fields=['post', 'created_at', 'id'],
+                name='comments_post_top_idx',
+                condition=models.Q(parent__isnull=True),
+            ),
+            models.Index(fields=['parent', 'created_at', 'id'], name='comments_parent_created_idx'),
+        ]
 
     def __str__(self):
         return f"Комментарий от {self.author.username} к посту {self.post.id}"
 
-    @property
-    def replies_count(self):
-        return self.replies.count()
-
 
 class Story(models.Model):
     """Модель историй (Stories)"""
@@ -120,6 +215,7 @@ class Story(models.Model):
         _('изображение'),
         upload_to='stories/%Y/%m/%d/'
     )
+    renditions = models.JSONField(_('уменьшенные копии'), default=dict, blank=True)
     text = models.CharField(_('текст'), max_length=200, blank=True)
     
     created_at = models.DateTimeField(_('дата создания'), auto_now_add=True)
@@ -130,6 +226,14 @@ class Story(models.Model):
         verbose_name_plural = _('Истории')
         db_table = 'stories'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['expires_at', 'author'], name='stories_expires_author_idx'),
+            models.Index(
+                fields=['author', '-created_at'],
+                include=['expires_at'],
+                name='stories_author_created_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"История от {self.author.username} - {self.created_at.strftime('%d.%m.%Y %H:%M')}"
@@ -138,3 +242,225 @@ class Story(models.Model):
     def is_expired(self):
         from django.utils import timezone
         return timezone.now() > self.expires_at
+
+
+class StorySeen(models.Model):
+    """Курсор просмотра историй: до какого момента пользователь видел истории автора"""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='seen_stories',
+        verbose_name=_('зритель')
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name=_('автор историй')
+    )
+    # created_at последней просмотренной истории автора
+    seen_until = models.DateTimeField(_('просмотрено до'))
+
+    class Meta:
+        verbose_name = _('Просмотр историй')
+        verbose_name_plural = _('Просмотры историй')
+        db_table = 'story_seen'
+        unique_together = ('user', 'author')
+        indexes = [
+            models.Index(fields=['seen_until'], name='story_seen_until_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} видел истории {self.author_id} до {self.seen_until}"
+
+
+class FeedEntry(models.Model):
+    """Запись материализованной ленты пользователя (fan-out-on-write)"""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name=_('владелец ленты')
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name=_('пост')
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name=_('автор поста')
+    )
+    # Копия Post.created_at, чтобы сортировать ленту без join с posts
+    created_at = models.DateTimeField(_('дата поста'))
+
+    class Meta:
+        verbose_name = _('Запись ленты')
+        verbose_name_plural = _('Записи ленты')
+        db_table = 'feed_entries'
+        ordering = ['-created_at']
+        unique_together = ('user', 'post')
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='feed_user_created_idx'),
+            models.Index(fields=['user', 'author'], name='feed_user_author_idx'),
+        ]
+
+    def __str__(self):
+        return f"Пост {self.post_id} в ленте {self.user_id}"
+
+
+class ExploreCandidate(models.Model):
+    """Пост из пула рекомендаций (Explore) с рассчитанным рейтингом"""
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='explore_candidate',
+        verbose_name=_('пост')
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name=_('автор поста')
+    )
+    score = models.FloatField(_('рейтинг'))
+    computed_at = models.DateTimeField(_('дата расчета'))
+
+    class Meta:
+        verbose_name = _('Кандидат в рекомендации')
+        verbose_name_plural = _('Кандидаты в рекомендации')
+        db_table = 'explore_candidates'
+        ordering = ['-score']
+        indexes = [
+            models.Index(fields=['-score'], name='explore_score_idx'),
+        ]
+
+    def __str__(self):
+        return f"Пост {self.post_id} ({self.score:.2f})"
+
+
+class Hashtag(models.Model):
+    """Хэштег; posts_count поддерживается при индексации постов"""
+    # Нормализованное имя: без '#', в нижнем регистре
+    name = models.CharField(_('название'), max_length=100, unique=True)
+    posts_count = models.PositiveIntegerField(_('количество постов'), default=0)
+    created_at = models.DateTimeField(_('дата создания'), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _('Хэштег')
+        verbose_name_plural = _('Хэштеги')
+        db_table = 'hashtags'
+        ordering = ['name']
+
+    def __str__(self):
+        return f"#{self.name}"
+
+
+class PostHashtag(models.Model):
+    """Инвертированный индекс: хэштег -> посты"""
+    hashtag = models.ForeignKey(
+        Hashtag,
+        on_delete=models.CASCADE,
+        related_name='post_links',
+        verbose_name=_('хэштег')
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='hashtag_links',
+        verbose_name=_('пост')
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name=_('автор поста')
+    )
+    # Копия Post.created_at, чтобы листать посты тега без join с posts
+    created_at = models.DateTimeField(_('дата поста'))
+
+    class Meta:
+        verbose_name = _('Хэштег поста')
+        verbose_name_plural = _('Хэштеги постов')
+        db_table = 'post_hashtags'
+        unique_together = ('hashtag', 'post')
+        indexes = [
+            models.Index(fields=['hashtag', '-created_at', '-post'], name='post_hashtags_feed_idx'),
+            models.Index(fields=['post'], name='post_hashtags_post_idx'),
+        ]
+
+    def __str__(self):
+        return f"Пост {self.post_id} с тегом {self.hashtag_id}"
+
+
+class HashtagDailyCount(models.Model):
+    """Число постов с хэштегом за день - для трендов без агрегации по постам"""
+    hashtag = models.ForeignKey(
+        Hashtag,
+        on_delete=models.CASCADE,
+        related_name='daily_counts',
+        verbose_name=_('хэштег')
+    )
+    day = models.DateField(_('день'))
+    posts_count = models.IntegerField(_('количество постов'), default=0)
+
+    class Meta:
+        verbose_name = _('Счетчик хэштега за день')
+        verbose_name_plural = _('Счетчики хэштегов по дням')
+        db_table = 'hashtag_daily_counts'
+        unique_together = ('hashtag', 'day')
+        indexes = [
+            models.Index(fields=['day'], name='hashtag_daily_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.hashtag_id} за {self.day}: {self.posts_count}"
+
+
+class Mention(models.Model):
+    """Упоминание пользователя (@username) в посте или комментарии"""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='mentions',
+        verbose_name=_('упомянутый пользователь')
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name=_('кто упомянул')
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='mentions',
+        verbose_name=_('пост')
+    )
+    # Пусто, если упоминание в подписи к посту
+    comment = models.ForeignKey(
+        Comment,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='mentions',
+        verbose_name=_('комментарий')
+    )
+    created_at = models.DateTimeField(_('дата упоминания'), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _('Упоминание')
+        verbose_name_plural = _('Упоминания')
+        db_table = 'mentions'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='mentions_user_created_idx'),
+            models.Index(fields=['post', 'comment'], name='mentions_post_comment_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.author_id} упомянул {self.user_id} в посте {self.post_id}"
@@ -1,5 +1,7 @@
 from rest_framework import permissions
 
+from apps.accounts import visibility
+
 
 class IsOwnerOrReadOnly(permissions.BasePermission):
     """
@@ -32,50 +34,20 @@ class CanViewPrivateProfile(permissions.BasePermission):
     """
     Разрешение для просмотра приватных профилей.
     Приватный профиль может видеть только сам пользователь или его подписчики.
+    Для списков проверяется автор из URL (view.get_author()), для объектов - сам пользователь.
     """
 
-    def has_object_permission(self, request, view, obj):
-        # Если профиль публичный, разрешаем всем
-        if not obj.is_private:
-            return True
-        
-        # Если это сам пользователь, разрешаем
-        if request.user == obj:
+    def has_permission(self, request, view):
+        if not hasattr(view, 'get_author'):
             return True
-        
-        # Если пользователь подписан на приватный аккаунт
-        if request.user.is_authenticated:
-            from apps.accounts import Follow
-            return Follow.objects.filter(
-                follower=request.user,
-                following=obj
-            ).exists()
-        
-        return False
+        return visibility.for_request(request).can_view(view.get_author())
+
+    def has_object_permission(self, request, view, obj):
+        return visibility.for_request(request).can_view(obj)
 
 
-class CanViewUserPosts(permissions.BasePermission):
+class CanViewUserPosts(CanViewPrivateProfile):
     """
     Разрешение для просмотра постов пользователя.
     Посты приватного пользователя могут видеть только подписчики.
     """
-
-    def has_permission(self, request, view):
-        if not hasattr(view, 'get_author'):
-            return True
-            
-        author = view.get_author()
-        if not author.is_private:
-            return True
-            
-        if request.user == author:
-            return True
-            
-        if request.user.is_authenticated:
-            from apps.accounts import Follow
-            return Follow.objects.filter(
-                follower=request.user,
-                following=author
-            ).exists()
-            
-        return False
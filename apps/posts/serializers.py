@@ -1,51 +1,101 @@
 from rest_framework import serializers
+from django.conf import settings
 from django.utils import timezone
-from datetime import timedelta
-from .models import Post, Like, Comment, Story
+from .models import Post, Like, Comment, Story, Hashtag, Mention, Location
 from apps.accounts.serializers import UserListSerializer
+from apps.accounts.viewer import ViewerStateListSerializer, attach_followers_counts, get_viewer_state
+from core.renditions import rendition_urls, schedule_renditions, strip_metadata
+from .comments import REPLY_PREVIEW_SIZE, comment_authors, recent_comments
+from .locations import normalize_location_name, resolve_location
+from .stories import STORY_LIFETIME
 
 
 class PostCreateSerializer(serializers.ModelSerializer):
     """Сериализатор для создания постов"""
+    latitude = serializers.FloatField(write_only=True, required=False, min_value=-90, max_value=90)
+    longitude = serializers.FloatField(write_only=True, required=False, min_value=-180, max_value=180)
     
     class Meta:
         model = Post
-        fields = ('image', 'caption', 'location')
+        fields = ('image', 'caption', 'location', 'latitude', 'longitude')
+
+    def validate(self, attrs):
+        if ('latitude' in attrs) != ('longitude' in attrs):
+            raise serializers.ValidationError('Укажите и широту, и долготу')
+        if 'latitude' in attrs and not normalize_location_name(attrs.get('location')):
+            raise serializers.ValidationError({'location': 'Укажите название места'})
+        return attrs
+
+    def validate_image(self, value):
+        return strip_metadata(value)
 
     def create(self, validated_data):
         validated_data['author'] = self.context['request'].user
-        return super().create(validated_data)
+        validated_data['location'] = normalize_location_name(validated_data.get('location'))
+        validated_data['place'] = resolve_location(
+            validated_data['location'],
+            validated_data.pop('latitude', None),
+            validated_data.pop('longitude', None),
+        )
+        post = super().create(validated_data)
+        schedule_renditions(post, 'image', 'post')
+        return post
 
 
 class PostSerializer(serializers.ModelSerializer):
     """Сериализатор для постов"""
     author = UserListSerializer(read_only=True)
-    likes_count = serializers.SerializerMethodField()
-    comments_count = serializers.SerializerMethodField()
+    image_renditions = serializers.SerializerMethodField()
     is_liked = serializers.SerializerMethodField()
     
     class Meta:
         model = Post
         fields = (
-            'id', 'author', 'image', 'caption', 'location',
+            'id', 'author', 'image', 'image_renditions', 'caption', 'location', 'place',
             'likes_count', 'comments_count', 'is_liked',
             'created_at', 'updated_at'
         )
-        read_only_fields = ('id', 'author', 'created_at', 'updated_at')
+        read_only_fields = ('id', 'author', 'place', 'likes_count', 'comments_count', 'created_at', 'updated_at')
+        list_serializer_class = ViewerStateListSerializer
+
+    @staticmethod
+    def collect_viewer_ids(obj, user_ids, post_ids):
+        user_ids.add(obj.author_id)
+        # Лайк уже известен из аннотации Post.objects.for_listing()
+        if not hasattr(obj, 'viewer_has_liked'):
+            post_ids.add(obj.pk)
 
-    def get_likes_count(self, obj):
-        return obj.likes_count
+    def update(self, instance, validated_data):
+        if 'location' in validated_data:
+            location = normalize_location_name(validated_data['location'])
+            validated_data['location'] = location
+            # Новое название без координат - место ищется только по названию
+            if location.lower() != instance.location.lower():
+                validated_data['place'] = resolve_location(location)
+        return super().update(instance, validated_data)
 
-    def get_comments_count(self, obj):
-        return obj.comments_count
+    def get_image_renditions(self, obj):
+        return rendition_urls(obj.renditions, self.context.get('request'))
 
     def get_is_liked(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return Like.objects.filter(user=request.user, post=obj).exists()
+        if hasattr(obj, 'viewer_has_liked'):
+            return obj.viewer_has_liked
+        viewer = get_viewer_state(self.context)
+        if viewer is not None:
+            return viewer.has_liked(obj.pk)
         return False
 
 
+class PostCompactSerializer(PostSerializer):
+    """Пост со ссылкой на автора по ID (авторы отдаются отдельно)"""
+    author = None
+    author_id = serializers.IntegerField(read_only=True)
+
+    class Meta(PostSerializer.Meta):
+        fields = tuple('author_id' if field == 'author' else field for field in PostSerializer.Meta.fields)
+        read_only_fields = PostSerializer.Meta.read_only_fields + ('author_id',)
+
+
 class PostDetailSerializer(PostSerializer):
     """Детальный сериализатор для постов с комментариями"""
     recent_comments = serializers.SerializerMethodField()
@@ -54,8 +104,9 @@ class PostDetailSerializer(PostSerializer):
         fields = PostSerializer.Meta.fields + ('recent_comments',)
 
     def get_recent_comments(self, obj):
-        recent_comments = obj.comments.filter(parent=None)[:3]
-        return CommentSerializer(recent_comments, many=True, context=self.context).data
+        comments = recent_comments(obj)
+        attach_followers_counts(comment_authors(comments))
+        return CommentSerializer(comments, many=True, context=self.context).data
 
 
 class LikeSerializer(serializers.ModelSerializer):
@@ -66,6 +117,11 @@ class LikeSerializer(serializers.ModelSerializer):
         model = Like
         fields = ('id', 'user', 'created_at')
         read_only_fields = ('id', 'created_at')
+        list_serializer_class = ViewerStateListSerializer
+
+    @staticmethod
+    def collect_viewer_ids(obj, user_ids, post_ids):
+        user_ids.add(obj.user_id)
 
 
 class CommentCreateSerializer(serializers.ModelSerializer):
@@ -89,7 +145,6 @@ class CommentCreateSerializer(serializers.ModelSerializer):
 class CommentSerializer(serializers.ModelSerializer):
     """Сериализатор для комментариев"""
     author = UserListSerializer(read_only=True)
-    replies_count = serializers.SerializerMethodField()
     replies = serializers.SerializerMethodField()
 
     class Meta:
@@ -98,16 +153,22 @@ class CommentSerializer(serializers.ModelSerializer):
             'id', 'author', 'text', 'parent', 'replies_count',
             'replies', 'created_at', 'updated_at'
         )
-        read_only_fields = ('id', 'author', 'created_at', 'updated_at')
+        read_only_fields = ('id', 'author', 'replies_count', 'created_at', 'updated_at')
+        list_serializer_class = ViewerStateListSerializer
 
-    def get_replies_count(self, obj):
-        return obj.replies_count
+    @staticmethod
+    def collect_viewer_ids(obj, user_ids, post_ids):
+        user_ids.add(obj.author_id)
+        user_ids.update(reply.author_id for reply in getattr(obj, 'reply_preview', ()))
 
     def get_replies(self, obj):
-        if obj.parent is None:  # Показываем ответы только для основных комментариев
-            replies = obj.replies.all()[:2]  # Показываем только 2 последних ответа
-            return CommentSerializer(replies, many=True, context=self.context).data
-        return []
+        if obj.parent_id is not None:  # Показываем ответы только для основных комментариев
+            return []
+        if hasattr(obj, 'reply_preview'):
+            replies = obj.reply_preview
+        else:
+            replies = obj.replies.select_related('author')[:REPLY_PREVIEW_SIZE]
+        return CommentSerializer(replies, many=True, context=self.context).data
 
 
 class StoryCreateSerializer(serializers.ModelSerializer):
@@ -117,24 +178,114 @@ class StoryCreateSerializer(serializers.ModelSerializer):
         model = Story
         fields = ('image', 'text')
 
+    def validate_image(self, value):
+        return strip_metadata(value)
+
     def create(self, validated_data):
         validated_data['author'] = self.context['request'].user
-        validated_data['expires_at'] = timezone.now() + timedelta(hours=24)
-        return super().create(validated_data)
+        validated_data['expires_at'] = timezone.now() + STORY_LIFETIME
+        story = super().create(validated_data)
+        schedule_renditions(story, 'image', 'story')
+        return story
 
 
 class StorySerializer(serializers.ModelSerializer):
     """Сериализатор для историй"""
     author = UserListSerializer(read_only=True)
+    image_renditions = serializers.SerializerMethodField()
     is_expired = serializers.SerializerMethodField()
 
     class Meta:
         model = Story
         fields = (
-            'id', 'author', 'image', 'text', 'is_expired',
+            'id', 'author', 'image', 'image_renditions', 'text', 'is_expired',
             'created_at', 'expires_at'
         )
         read_only_fields = ('id', 'author', 'created_at', 'expires_at')
+        list_serializer_class = ViewerStateListSerializer
+
+    @staticmethod
+    def collect_viewer_ids(obj, user_ids, post_ids):
+        user_ids.add(obj.author_id)
+
+    def get_image_renditions(self, obj):
+        return rendition_urls(obj.renditions, self.context.get('request'))
 
     def get_is_expired(self, obj):
         return obj.is_expired
+
+
+class StoryCompactSerializer(StorySerializer):
+    """История со ссылкой на автора по ID (авторы отдаются отдельно)"""
+    author = None
+    author_id = serializers.IntegerField(read_only=True)
+
+    class Meta(StorySerializer.Meta):
+        fields = tuple('author_id' if field == 'author' else field for field in StorySerializer.Meta.fields)
+        read_only_fields = StorySerializer.Meta.read_only_fields + ('author_id',)
+
+
+class StoryTraySerializer(serializers.Serializer):
+    """Группа активных историй одного автора в ленте историй"""
+    author = UserListSerializer(read_only=True)
+    has_unseen = serializers.BooleanField(read_only=True)
+    seen_until = serializers.DateTimeField(read_only=True)
+    latest_at = serializers.DateTimeField(read_only=True)
+    stories = StoryCompactSerializer(many=True, read_only=True)
+
+    class Meta:
+        list_serializer_class = ViewerStateListSerializer
+
+    @staticmethod
+    def collect_viewer_ids(obj, user_ids, post_ids):
+        user_ids.add(obj['author'].pk)
+
+
+class HashtagSerializer(serializers.ModelSerializer):
+    """Сериализатор для хэштегов"""
+
+    class Meta:
+        model = Hashtag
+        fields = ('name', 'posts_count')
+
+
+class TrendingHashtagSerializer(serializers.Serializer):
+    """Хэштег в трендах"""
+    name = serializers.CharField(read_only=True)
+    posts_count = serializers.IntegerField(read_only=True)
+    recent_posts_count = serializers.IntegerField(read_only=True)
+
+
+class MentionSerializer(serializers.ModelSerializer):
+    """Сериализатор для упоминаний"""
+    author = UserListSerializer(read_only=True)
+
+    class Meta:
+        model = Mention
+        fields = ('id', 'author', 'post', 'comment', 'created_at')
+        read_only_fields = fields
+        list_serializer_class = ViewerStateListSerializer
+
+    @staticmethod
+    def collect_viewer_ids(obj, user_ids, post_ids):
+        user_ids.add(obj.author_id)
+
+
+class LocationSerializer(serializers.ModelSerializer):
+    """Сериализатор для мест"""
+
+    class Meta:
+        model = Location
+        fields = ('id', 'name', 'latitude', 'longitude', 'posts_count')
+
+
+class BulkPostIdsSerializer(serializers.Serializer):
+    """Список ID постов для пакетных лайков"""
+    post_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.BULK_ACTION_MAX_ITEMS,
+    )
+
+    def validate_post_ids(self, value):
+        return list(dict.fromkeys(value))
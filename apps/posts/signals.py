@@ -0,0 +1,28 @@
+"""Инвалидация кэша сводок постов"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.accounts.cache import profile_counts
+from core.renditions import renditions_updated
+from .cache import post_summaries
+from .models import Post, Like, Comment
+
+
+@receiver([post_save, post_delete], sender=Post)
+def post_changed(sender, instance, created=True, **kwargs):
+    post_summaries.invalidate([instance.pk])
+    # Число постов автора меняется при создании и удалении (post_delete без created)
+    if created:
+        profile_counts.invalidate([instance.author_id])
+
+
+@receiver(renditions_updated, sender=Post)
+def post_renditions_updated(sender, pk, **kwargs):
+    post_summaries.invalidate([pk])
+
+
+@receiver([post_save, post_delete], sender=Like)
+@receiver([post_save, post_delete], sender=Comment)
+def counters_changed(sender, instance, **kwargs):
+    # likes_count и comments_count меняются update() в той же транзакции
+    post_summaries.invalidate([instance.post_id])
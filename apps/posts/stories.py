@@ -0,0 +1,90 @@
+"""
+Лента историй (tray) и удаление истекших историй.
+
+Tray - активные истории подписок, сгруппированные по автору: группы
+упорядочены по последней истории, истории внутри группы - в порядке
+просмотра (от старых к новым). Для каждого автора хранится курсор
+StorySeen.seen_until, по нему клиент понимает, с какой истории продолжить.
+"""
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from apps.accounts.graph import follow_graph
+from core.renditions import delete_renditions
+from .models import Story, StorySeen
+
+STORY_LIFETIME = timedelta(hours=24)
+
+
+def stories_tray(user):
+    """Группы [{author, stories, latest_at, seen_until, has_unseen}, ...]"""
+    stories = Story.objects.filter(
+        author__in=follow_graph.following_ids(user),
+        expires_at__gt=timezone.now()
+    ).select_related('author').order_by('author_id', 'created_at')
+
+    groups = {}
+    for story in stories:
+        group = groups.setdefault(story.author_id, {'author': story.author, 'stories': []})
+        group['stories'].append(story)
+    if not groups:
+        return []
+
+    seen = dict(
+        StorySeen.objects.filter(
+            user=user,
+            author_id__in=groups
+        ).values_list('author_id', 'seen_until')
+    )
+    for author_id, group in groups.items():
+        group['latest_at'] = group['stories'][-1].created_at
+        group['seen_until'] = seen.get(author_id)
+        group['has_unseen'] = group['seen_until'] is None or group['seen_until'] < group['latest_at']
+
+    return sorted(groups.values(), key=lambda group: group['latest_at'], reverse=True)
+
+
+def mark_seen(user, story):
+    """Сдвинуть курсор просмотра историй автора вперед до story (но не назад)"""
+    updated = StorySeen.objects.filter(
+        user=user,
+        author_id=story.author_id,
+        seen_until__lt=story.created_at
+    ).update(seen_until=story.created_at)
+    if not updated:
+        StorySeen.objects.bulk_create(
+            [StorySeen(user=user, author_id=story.author_id, seen_until=story.created_at)],
+            ignore_conflicts=True,
+        )
+
+
+def expire_stories(batch_size=500, now=None):
+    """
+    Удалить истекшие истории пачками по batch_size вместе с файлами и
+    копиями изображений, а также курсоры, которые больше ни на что не
+    указывают. Возвращает (историй, курсоров).
+    """
+    now = now or timezone.now()
+    deleted = 0
+    while True:
+        batch = list(
+            Story.objects.filter(expires_at__lte=now)
+            .order_by('expires_at')
+            .values_list('pk', 'image', 'renditions')[:batch_size]
+        )
+        if not batch:
+            break
+
+        Story.objects.filter(pk__in=[pk for pk, _, _ in batch]).delete()
+        # Файлы удаляются после строк: на удаленный файл не останется ссылок
+        for _, image, renditions in batch:
+            if image:
+                default_storage.delete(image)
+            delete_renditions(renditions)
+        deleted += len(batch)
+
+    # Курсор старше срока жизни истории: все истории до него уже истекли
+    cursors, _ = StorySeen.objects.filter(seen_until__lte=now - STORY_LIFETIME).delete()
+    return deleted, cursors
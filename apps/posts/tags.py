@@ -0,0 +1,163 @@
+"""
+Хэштеги и упоминания.
+
+При сохранении поста его подпись разбирается: хэштеги попадают в
+инвертированный индекс PostHashtag (хэштег -> посты, с копией даты поста
+для курсорной пагинации), а упоминания @username - в Mention. Счетчики
+Hashtag.posts_count и HashtagDailyCount меняются на каждый добавленный или
+убранный тег, поэтому тренды считаются по небольшой таблице дневных
+счетчиков, без агрегации постов. Из комментариев извлекаются только
+упоминания.
+"""
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Sum
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from apps.accounts.models import User
+from .models import Hashtag, HashtagDailyCount, Mention, PostHashtag
+
+HASHTAG_RE = re.compile(r'(?<![\w#&])#(\w+)')
+MENTION_RE = re.compile(r'(?<![\w@])@([\w.]+)')
+MAX_HASHTAGS = 30
+
+TRENDING_CACHE_KEY = 'tags:trending'
+TRENDING_CACHE_TIMEOUT = 300
+
+
+def normalize_hashtag(name):
+    return name.lstrip('#').lower()[:Hashtag._meta.get_field('name').max_length]
+
+
+def extract_hashtags(text):
+    """Нормализованные хэштеги в порядке появления, без повторов"""
+    names = dict.fromkeys(normalize_hashtag(match) for match in HASHTAG_RE.findall(text or ''))
+    return list(names)[:MAX_HASHTAGS]
+
+
+def extract_mentions(text):
+    """Имена упомянутых пользователей (точка в конце - знак препинания)"""
+    return {name.rstrip('.') for name in MENTION_RE.findall(text or '')} - {''}
+
+
+def hashtag_ids(names):
+    """{имя: id} с созданием недостающих хэштегов"""
+    Hashtag.objects.bulk_create([Hashtag(name=name) for name in names], ignore_conflicts=True)
+    return dict(Hashtag.objects.filter(name__in=names).values_list('name', 'pk'))
+
+
+def adjust_counts(tag_ids, posted_at, delta):
+    """Изменить общий и дневной счетчики хэштегов на delta"""
+    if not tag_ids:
+        return
+    # Greatest: при расхождении счетчик не уходит ниже нуля (CHECK >= 0)
+    Hashtag.objects.filter(pk__in=tag_ids).update(posts_count=Greatest(F('posts_count') + delta, 0))
+
+    day = timezone.localdate(posted_at)
+    if delta > 0:
+        HashtagDailyCount.objects.bulk_create(
+            [HashtagDailyCount(hashtag_id=tag_id, day=day) for tag_id in tag_ids],
+            ignore_conflicts=True,
+        )
+    HashtagDailyCount.objects.filter(hashtag_id__in=tag_ids, day=day).update(
+        posts_count=Greatest(F('posts_count') + delta, 0)
+    )
+
+
+def index_post(post, created=False):
+    """Привести хэштеги и упоминания поста в соответствие с подписью"""
+    names = extract_hashtags(post.caption)
+    current = {} if created else dict(
+        PostHashtag.objects.filter(post=post).values_list('hashtag__name', 'hashtag_id')
+    )
+
+    added = [name for name in names if name not in current]
+    if added:
+        tag_ids = list(hashtag_ids(added).values())
+        PostHashtag.objects.bulk_create(
+            [
+                PostHashtag(hashtag_id=tag_id, post=post, author_id=post.author_id, created_at=post.created_at)
+                for tag_id in tag_ids
+            ],
+            ignore_conflicts=True,
+        )
+        adjust_counts(tag_ids, post.created_at, 1)
+
+    removed = [tag_id for name, tag_id in current.items() if name not in names]
+    if removed:
+        PostHashtag.objects.filter(post=post, hashtag_id__in=removed).delete()
+        adjust_counts(removed, post.created_at, -1)
+
+    sync_mentions(post.pk, None, post.author_id, post.caption, created=created)
+
+
+def unindex_post(post):
+    """Уменьшить счетчики хэштегов перед удалением поста (связи удалятся каскадно)"""
+    tag_ids = list(PostHashtag.objects.filter(post=post).values_list('hashtag_id', flat=True))
+    adjust_counts(tag_ids, post.created_at, -1)
+
+
+def index_comment(comment, created=False):
+    sync_mentions(comment.post_id, comment.pk, comment.author_id, comment.text, created=created)
+
+
+def sync_mentions(post_id, comment_id, author_id, text, created=False):
+    usernames = extract_mentions(text)
+    mentioned = set()
+    if usernames:
+        mentioned = set(
+            User.objects.filter(username__in=usernames, is_active=True)
+            .exclude(pk=author_id)
+            .values_list('pk', flat=True)
+        )
+
+    existing = set()
+    if not created:
+        existing = set(
+            Mention.objects.filter(post_id=post_id, comment_id=comment_id).values_list('user_id', flat=True)
+        )
+
+    if mentioned - existing:
+        Mention.objects.bulk_create([
+            Mention(user_id=user_id, author_id=author_id, post_id=post_id, comment_id=comment_id)
+            for user_id in mentioned - existing
+        ])
+    if existing - mentioned:
+        Mention.objects.filter(
+            post_id=post_id,
+            comment_id=comment_id,
+            user_id__in=existing - mentioned
+        ).delete()
+
+
+def trending_hashtags():
+    """
+    Хэштеги с наибольшим числом новых постов за последние TAGS_TRENDING_DAYS
+    дней: [{name, posts_count, recent_posts_count}, ...]
+    """
+    trending = cache.get(TRENDING_CACHE_KEY)
+    if trending is None:
+        since = timezone.localdate() - timedelta(days=settings.TAGS_TRENDING_DAYS - 1)
+        recent = list(
+            HashtagDailyCount.objects.filter(day__gte=since)
+            .values('hashtag')
+            .annotate(recent=Sum('posts_count'))
+            .filter(recent__gt=0)
+            .order_by('-recent', 'hashtag')
+            .values_list('hashtag', 'recent')[:settings.TAGS_TRENDING_SIZE]
+        )
+        hashtags = Hashtag.objects.in_bulk([tag_id for tag_id, _ in recent])
+        trending = [
+            {
+                'name': hashtags[tag_id].name,
+                'posts_count': hashtags[tag_id].posts_count,
+                'recent_posts_count': total,
+            }
+            for tag_id, total in recent if tag_id in hashtags
+        ]
+        cache.set(TRENDING_CACHE_KEY, trending, TRENDING_CACHE_TIMEOUT)
+    return trending
@@ -0,0 +1,51 @@
+"""Фоновые задачи, которые выполняются после записи в API"""
+from django.core.cache import cache
+
+from apps.accounts.models import Follow
+from apps.jobs.queue import task
+from .explore import VIEWER_CACHE_KEY
+from .feed import fan_out_post, backfill_feed, remove_author_from_feed
+from .models import Post
+
+
+@task
+def fan_out(post_id):
+    """Разложить опубликованный пост по лентам подписчиков"""
+    post = Post.objects.filter(pk=post_id).first()
+    if post is not None:
+        fan_out_post(post)
+
+
+@task
+def follow_created(follower_id, following_id):
+    """Дополнить ленту постами автора, на которого подписались"""
+    follow = Follow.objects.select_related('follower', 'following').filter(
+        follower_id=follower_id,
+        following_id=following_id
+    ).first()
+    # Если пользователь успел отписаться, добавлять уже нечего
+    if follow is not None:
+        backfill_feed(follow.follower, follow.following)
+    cache.delete(VIEWER_CACHE_KEY.format(follower_id))
+
+
+@task
+def follows_created(follower_id, following_ids):
+    """follow_created() для пакетной подписки"""
+    for following_id in following_ids:
+        follow_created(follower_id, following_id)
+
+
+@task
+def follow_deleted(follower_id, following_id):
+    """Убрать из ленты посты автора, от которого отписались"""
+    if not Follow.objects.filter(follower_id=follower_id, following_id=following_id).exists():
+        remove_author_from_feed(follower_id, following_id)
+    cache.delete(VIEWER_CACHE_KEY.format(follower_id))
+
+
+@task
+def follows_deleted(follower_id, following_ids):
+    """follow_deleted() для пакетной отписки"""
+    for following_id in following_ids:
+        follow_deleted(follower_id, following_id)
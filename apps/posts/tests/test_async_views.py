@@ -0,0 +1,48 @@
+from datetime import timedelta
+
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.accounts.authentication import issue_tokens
+from apps.accounts.models import User, Follow
+from apps.posts.models import Post, Story, ExploreCandidate
+
+
+@override_settings(REQUEST_METRICS={'SAMPLE_RATE': 0})
+class AsyncViewsTests(TestCase):
+
+    def setUp(self):
+        for cache in caches.all(initialized_only=True):
+            cache.clear()
+        self.viewer = User.objects.create_user(username='viewer', email='viewer@example.com')
+        self.public = User.objects.create_user(username='public', email='public@example.com')
+        self.private = User.objects.create_user(username='private', email='private@example.com', is_private=True)
+        Follow.objects.create(follower=self.viewer, following=self.public)
+        self.headers = {'Authorization': f'Bearer {issue_tokens(self.viewer).access_token}'}
+
+    async def test_following_stories_with_cold_cache(self):
+        await Story.objects.acreate(
+            author=self.public, image='stories/1.jpg', expires_at=timezone.now() + timedelta(hours=1)
+        )
+
+        response = await self.async_client.get('/api/posts/async/stories/following/', headers=self.headers)
+
+        self.assertEqual(response.status_code, 200)
+        [story] = response.json()
+        self.assertEqual(story['author']['followers_count'], 1)
+        self.assertTrue(story['author']['is_following'])
+
+    async def test_explore_hides_private_authors(self):
+        stranger = await User.objects.acreate(username='stranger', email='stranger@example.com')
+        public_post = await Post.objects.acreate(author=stranger, image='posts/1.jpg')
+        private_post = await Post.objects.acreate(author=self.private, image='posts/2.jpg')
+        for score, post in enumerate((public_post, private_post)):
+            await ExploreCandidate.objects.acreate(
+                post=post, author=post.author, score=score, computed_at=timezone.now()
+            )
+
+        response = await self.async_client.get('/api/posts/async/explore/', headers=self.headers)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([post['id'] for post in response.json()['results']], [public_post.pk])
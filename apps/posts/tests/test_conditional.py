@@ -0,0 +1,90 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from PIL import Image
+from rest_framework.test import APIClient
+
+from apps.accounts.models import User, Follow
+from apps.posts.models import Post, Comment, FeedEntry
+from core.renditions import process_renditions
+
+
+def save_image(name):
+    buffer = BytesIO()
+    Image.new('RGB', (64, 48), 'red').save(buffer, 'PNG')
+    return default_storage.save(name, ContentFile(buffer.getvalue()))
+
+
+@override_settings(
+    REQUEST_METRICS={'SAMPLE_RATE': 0},
+    IMAGE_RENDITIONS={'post': [('small', 32, False)], 'avatar': [('small', 16, True)]},
+    IMAGE_RENDITION_FORMATS=['jpeg'],
+)
+class ConditionalGetTests(TestCase):
+    """304 только пока ответ не изменился, в том числе после фоновых задач"""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        for cache in caches.all(initialized_only=True):
+            cache.clear()
+
+        self.viewer = User.objects.create_user(username='viewer', email='viewer@example.com')
+        self.author = User.objects.create_user(
+            username='author', email='author@example.com', avatar=save_image('avatars/a.png')
+        )
+        Follow.objects.create(follower=self.viewer, following=self.author)
+        self.post = Post.objects.create(author=self.author, image=save_image('posts/p.png'))
+        FeedEntry.objects.create(
+            user=self.viewer, post=self.post, author=self.author, created_at=self.post.created_at
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.get(pk=self.viewer.pk))
+
+    def assertModifiedAfter(self, url, change):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_post_renditions_change_etag(self):
+        urls = [f'/api/posts/posts/{self.post.pk}/', '/api/posts/users/author/posts/', '/api/posts/feed/']
+        for url in urls:
+            with self.subTest(url):
+                self.post.refresh_from_db()
+                response = self.assertModifiedAfter(url, lambda: process_renditions(
+                    'posts.post', self.post.pk, 'image', self.post.image.name, 'post'
+                ))
+                data = response.data if 'results' not in response.data else response.data['results'][0]
+                self.assertIn('small', data['image_renditions'])
+
+    def test_avatar_renditions_change_etag(self):
+        urls = ['/api/accounts/users/author/', f'/api/posts/posts/{self.post.pk}/', '/api/posts/feed/']
+        for url in urls:
+            with self.subTest(url):
+                self.assertModifiedAfter(url, lambda: process_renditions(
+                    'accounts.user', self.author.pk, 'avatar', self.author.avatar.name, 'avatar'
+                ))
+
+    def test_reply_preview_edit_changes_etag(self):
+        comment = Comment.objects.create(post=self.post, author=self.author, text='комментарий', replies_count=1)
+        reply = Comment.objects.create(post=self.post, author=self.viewer, parent=comment, text='ответ')
+
+        def edit_reply():
+            reply.text = 'исправленный ответ'
+            reply.save()
+
+        response = self.assertModifiedAfter(f'/api/posts/posts/{self.post.pk}/comments/', edit_reply)
+        self.assertEqual(response.data['results'][0]['replies'][0]['text'], 'исправленный ответ')
@@ -0,0 +1,56 @@
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+from apps.accounts.models import User, Follow
+from apps.posts.feed import PULL_AUTHORS_CACHE_KEY, fan_out_post, home_feed_queryset, backfill_feed
+from apps.posts.models import Post, FeedEntry
+
+
+@override_settings(FEED_FANOUT_FOLLOWER_LIMIT=1)
+class FanOutThresholdTests(TestCase):
+    """Автор пересекает FEED_FANOUT_FOLLOWER_LIMIT: прежние посты остаются в лентах"""
+
+    def setUp(self):
+        for cache in caches.all(initialized_only=True):
+            cache.clear()
+        self.author = User.objects.create_user(username='author', email='author@example.com')
+        self.viewer = User.objects.create_user(username='viewer', email='viewer@example.com')
+        self.other = User.objects.create_user(username='other', email='other@example.com')
+        Follow.objects.create(follower=self.viewer, following=self.author)
+
+    def publish(self):
+        post = Post.objects.create(author=self.author, image='posts/1.jpg')
+        fan_out_post(post)
+        return post
+
+    def set_followers(self, *followers):
+        Follow.objects.filter(following=self.author).exclude(follower__in=followers).delete()
+        for follower in followers:
+            Follow.objects.get_or_create(follower=follower, following=self.author)
+        # Набор крупных авторов пересчитывается по истечении кэша
+        caches['default'].delete(PULL_AUTHORS_CACHE_KEY)
+
+    def feed(self, user):
+        return set(home_feed_queryset(user))
+
+    def test_posts_stay_in_feed_after_dropping_below_limit(self):
+        self.set_followers(self.viewer, self.other)
+        pulled = self.publish()
+        self.assertTrue(Post.objects.get(pk=pulled.pk).pulled)
+        self.assertFalse(FeedEntry.objects.filter(post=pulled).exists())
+
+        self.set_followers(self.viewer)
+        pushed = self.publish()
+
+        self.assertTrue(FeedEntry.objects.filter(user=self.viewer, post=pushed).exists())
+        self.assertEqual(self.feed(self.viewer), {pulled, pushed})
+
+    def test_posts_stay_in_feed_after_rising_above_limit(self):
+        pushed = self.publish()
+
+        self.set_followers(self.viewer, self.other)
+        backfill_feed(self.other, self.author)
+        pulled = self.publish()
+
+        self.assertEqual(self.feed(self.viewer), {pushed, pulled})
+        self.assertEqual(self.feed(self.other), {pushed, pulled})
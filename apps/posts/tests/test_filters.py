@@ -0,0 +1,30 @@
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.accounts.models import User
+from apps.posts.models import Post, Location
+
+
+@override_settings(REQUEST_METRICS={'SAMPLE_RATE': 0})
+class PostFilterTests(TestCase):
+
+    def setUp(self):
+        for cache in caches.all(initialized_only=True):
+            cache.clear()
+        self.user = User.objects.create_user(username='author', email='author@example.com')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def filtered_ids(self, query):
+        response = self.client.get(f'/api/posts/posts/?{query}')
+        self.assertEqual(response.status_code, 200)
+        return [post['id'] for post in response.data['results']]
+
+    def test_filter_by_location_text_and_place(self):
+        place = Location.objects.create(name='Москва', normalized_name='москва')
+        in_place = Post.objects.create(author=self.user, image='posts/1.jpg', location='Москва', place=place)
+        Post.objects.create(author=self.user, image='posts/2.jpg', location='Казань')
+
+        self.assertEqual(self.filtered_ids('location=Москва'), [in_place.pk])
+        self.assertEqual(self.filtered_ids(f'place={place.pk}'), [in_place.pk])
@@ -0,0 +1,83 @@
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import TestCase
+
+from apps.accounts.models import User, Follow
+from apps.posts import likes
+from apps.posts.likes import ALREADY_LIKED, LIKED, NOT_FOUND, NOT_LIKED, UNLIKED, like_many, unlike_many
+from apps.posts.models import Post, Like
+
+
+class BulkLikesTests(TestCase):
+
+    def setUp(self):
+        for cache in caches.all(initialized_only=True):
+            cache.clear()
+        self.user = User.objects.create_user(username='viewer', email='viewer@example.com')
+        author = User.objects.create_user(username='author', email='author@example.com')
+        private = User.objects.create_user(username='private', email='private@example.com', is_private=True)
+        self.posts = [Post.objects.create(author=author, image='posts/1.jpg') for _ in range(3)]
+        self.hidden = Post.objects.create(author=private, image='posts/2.jpg')
+
+    def likes_counts(self):
+        posts = Post.objects.filter(pk__in=[post.pk for post in self.posts]).order_by('pk')
+        return list(posts.values_list('likes_count', flat=True))
+
+    def test_like_many_statuses_and_counters(self):
+        first, second, third = (post.pk for post in self.posts)
+        Like.objects.create(user=self.user, post_id=first)
+        Post.objects.filter(pk=first).update(likes_count=1)
+
+        results = like_many(self.user, [first, second, self.hidden.pk, 10 ** 9])
+
+        self.assertEqual([result['status'] for result in results], [ALREADY_LIKED, LIKED, NOT_FOUND, NOT_FOUND])
+        self.assertEqual(self.likes_counts(), [1, 1, 0])
+        self.assertFalse(Like.objects.filter(post=self.hidden).exists())
+
+    def test_like_many_concurrent_like_is_not_counted(self):
+        first, second, _ = (post.pk for post in self.posts)
+        insert_likes = likes.insert_likes
+
+        def liked_concurrently(user_id, post_ids):
+            # Другой запрос лайкнул пост между проверкой и вставкой
+            Like.objects.create(user_id=user_id, post_id=first)
+            return insert_likes(user_id, post_ids)
+
+        with mock.patch.object(likes, 'insert_likes', liked_concurrently):
+            results = like_many(self.user, [first, second])
+
+        self.assertEqual([result['status'] for result in results], [ALREADY_LIKED, LIKED])
+        self.assertEqual(self.likes_counts(), [0, 1, 0])
+
+    def test_unlike_many_statuses_and_counters(self):
+        first, second, third = (post.pk for post in self.posts)
+        like_many(self.user, [first, second])
+
+        results = unlike_many(self.user, [first, third])
+        self.assertEqual([result['status'] for result in results], [UNLIKED, NOT_LIKED])
+        self.assertEqual(self.likes_counts(), [0, 1, 0])
+
+        # Повторная отмена не уменьшает счетчик еще раз
+        results = unlike_many(self.user, [first, second])
+        self.assertEqual([result['status'] for result in results], [NOT_LIKED, UNLIKED])
+        self.assertEqual(self.likes_counts(), [0, 0, 0])
+
+    def test_unlike_many_clamps_drifted_counter(self):
+        first = self.posts[0].pk
+        Like.objects.create(user=self.user, post_id=first)
+
+        results = unlike_many(self.user, [first])
+
+        self.assertEqual(results, [{'post_id': first, 'status': UNLIKED}])
+        self.assertEqual(self.likes_counts()[0], 0)
+
+    def test_follower_can_like_private_post(self):
+        Follow.objects.create(follower=self.user, following=self.hidden.author)
+        self.user.refresh_from_db(fields=['feed_version'])
+
+        results = like_many(self.user, [self.hidden.pk])
+
+        self.assertEqual(results, [{'post_id': self.hidden.pk, 'status': LIKED}])
+        self.hidden.refresh_from_db()
+        self.assertEqual(self.hidden.likes_count, 1)
@@ -0,0 +1,32 @@
+from unittest import skipUnless
+
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase
+
+from apps.accounts.models import User, Follow
+from apps.posts.management.commands.check_query_plans import explain_key_queries, uses_seq_scan
+from apps.posts.models import Post, Comment, FeedEntry
+
+
+@skipUnless(connection.vendor == 'postgresql', 'планы проверяются на PostgreSQL (частичные и GIN-индексы)')
+class KeyQueryPlansTests(TestCase):
+    """Запросы ключевых эндпоинтов читают таблицы по своим индексам (как check_query_plans)"""
+
+    def setUp(self):
+        for cache in caches.all(initialized_only=True):
+            cache.clear()
+        self.viewer = User.objects.create_user(username='viewer', email='viewer@example.com')
+        self.author = User.objects.create_user(username='author', email='author@example.com')
+        Follow.objects.create(follower=self.viewer, following=self.author)
+        self.post = Post.objects.create(author=self.author, caption='post')
+        FeedEntry.objects.create(
+            user=self.viewer, post=self.post, author=self.author, created_at=self.post.created_at
+        )
+        Comment.objects.create(post=self.post, author=self.viewer, text='comment')
+
+    def test_key_queries_use_their_indexes(self):
+        for name, table, indexes, plan in explain_key_queries(self.viewer, self.author, self.post):
+            with self.subTest(name):
+                self.assertFalse(uses_seq_scan(plan, table), plan)
+                self.assertTrue(any(index in plan for index in indexes), plan)
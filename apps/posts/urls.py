@@ -1,7 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from rest_framework_nested import routers
-from . import views
+from . import views, async_views
 
 app_name = 'posts'
 
@@ -9,6 +9,7 @@ app_name = 'posts'
 router = DefaultRouter()
 router.register(r'posts', views.PostViewSet)
 router.register(r'stories', views.StoryViewSet)
+router.register(r'locations', views.LocationViewSet)
 
 # Вложенный роутер для комментариев
 posts_router = routers.NestedDefaultRouter(router, r'posts', lookup='post')
@@ -22,5 +23,14 @@ urlpatterns = [
     # Дополнительные endpoints
     path('feed/', views.FeedView.as_view(), name='feed'),
     path('explore/', views.ExploreView.as_view(), name='explore'),
+    path('home/', async_views.home, name='home'),
     path('users/<str:username>/posts/', views.UserPostsViewSet.as_view(), name='user_posts'),
+    path('tags/trending/', views.TrendingHashtagsView.as_view(), name='trending_tags'),
+    path('tags/<str:name>/posts/', views.HashtagPostsView.as_view(), name='tag_posts'),
+    path('mentions/', views.MentionsView.as_view(), name='mentions'),
+
+    # Асинхронные варианты для ASGI
+    path('async/feed/', async_views.feed, name='async_feed'),
+    path('async/explore/', async_views.explore, name='async_explore'),
+    path('async/stories/following/', async_views.following_stories, name='async_following_stories'),
 ]
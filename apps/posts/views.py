@@ -1,32 +1,72 @@
 from rest_framework import status, generics, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.viewsets import ModelViewSet
+from rest_framework.exceptions import ValidationError
+from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
 from django.shortcuts import get_object_or_404
+from django.db import transaction
+from django.db.models import F, Max, OuterRef, Subquery
+from django.db.models.functions import Greatest
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.filters import OrderingFilter
+from django.conf import settings
 from django.utils import timezone
 
-from .models import Post, Like, Comment, Story
-from apps.accounts.models import User, Follow
+from core.conditional import DetailVersionMixin, ListVersionMixin
+from core.pagination import (
+    KeysetPagination, ChronologicalKeysetPagination, PostLinkKeysetPagination, RankedListPagination
+)
+
+from .models import Post, Like, Comment, Story, Hashtag, PostHashtag, Mention, Location
+from apps.accounts.models import User
 from .serializers import (
     PostSerializer, PostCreateSerializer, PostDetailSerializer,
     LikeSerializer, CommentSerializer, CommentCreateSerializer,
-    StorySerializer, StoryCreateSerializer
+    StorySerializer, StoryCreateSerializer, StoryTraySerializer,
+    TrendingHashtagSerializer, MentionSerializer, LocationSerializer, BulkPostIdsSerializer
 )
 from .permissions import IsOwnerOrReadOnly, IsCommentOwnerOrReadOnly, CanViewUserPosts
+from .feed import home_feed_queryset
+from .stories import stories_tray, mark_seen
+from .comments import load_reply_previews, comment_authors
+from .locations import adjust_posts_count, nearby_locations
+from .likes import like_many, unlike_many
+from .cache import cached_posts
+from .tags import index_post, unindex_post, index_comment, normalize_hashtag, trending_hashtags
+from .explore import explore_post_ids
+from .tasks import fan_out
+from apps.jobs.queue import enqueue
+from apps.search.filters import SearchIndexFilter
+from apps.accounts import visibility
+from apps.accounts.graph import follow_graph
+from apps.accounts.cache import followers_counts
+from apps.accounts.viewer import attach_followers_counts
+
+
+class AuthorVersionMixin:
+    """
+    Счетчик подписчиков в карточке автора меняется без updated_at автора:
+    значения из кэша для авторов страницы входят в ETag (поле author_id в version_fields)
+    """
+
+    def related_version(self, rows):
+        index = self.version_fields.index('author_id')
+        return sorted(followers_counts.get_many({row[index] for row in rows}).items())
 
 
-class PostViewSet(ModelViewSet):
+class PostViewSet(AuthorVersionMixin, DetailVersionMixin, ModelViewSet):
     """ViewSet для постов"""
     queryset = Post.objects.all()
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrReadOnly]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
-    search_fields = ['caption', 'location', 'author__username']
-    filterset_fields = ['author', 'location']
-    # 'likes_count' является вычисляемым свойством, по нему нельзя сортировать без аннотации
-    ordering_fields = ['created_at']
+    filter_backends = [DjangoFilterBackend, SearchIndexFilter, OrderingFilter]
+    filterset_fields = ['author', 'location', 'place']
+    ordering_fields = ['created_at', 'likes_count', 'comments_count']
     ordering = ['-created_at']
+    # Комментарии входят в ответ превью recent_comments, лайк просматривающего - is_liked
+    version_fields = (
+        'updated_at', 'pk', 'likes_count', 'comments_count', 'author_id', 'author__updated_at',
+        'viewer_has_liked', 'comments_changed',
+    )
 
     def get_serializer_class(self):
         if self.action == 'create':
@@ -36,93 +76,189 @@ class PostViewSet(ModelViewSet):
         return PostSerializer
 
     def get_queryset(self):
-        queryset = Post.objects.select_related('author').prefetch_related('likes', 'comments')
+        # Посты приватных авторов - только им самим и подписчикам, в том числе для лайков и likes/
+        queryset = visibility.for_request(self.request).filter(Post.objects.for_listing(self.request.user))
         
         # Фильтрация по подпискам (лента новостей)
         if self.action == 'list' and self.request.query_params.get('feed') == 'true':
             if self.request.user.is_authenticated:
-                following_users = Follow.objects.filter(
-                    follower=self.request.user
-                ).values_list('following', flat=True)
-                queryset = queryset.filter(author__in=following_users)
+                queryset = queryset & home_feed_queryset(self.request.user)
             else:
                 queryset = queryset.none()
+
+        if self.action == 'retrieve':
+            queryset = queryset.annotate(comments_changed=Max('comments__updated_at'))
         
         return queryset
 
-    @action(detail=True, methods=['post'])
+    def perform_create(self, serializer):
+        # Пост, его хэштеги и задачи (копии изображения, раскладка по лентам) в одной транзакции
+        with transaction.atomic():
+            post = serializer.save()
+            index_post(post, created=True)
+            adjust_posts_count(post.place_id, 1)
+            enqueue(fan_out, idempotency_key=f'fan-out:{post.pk}', post_id=post.pk)
+
+    def perform_update(self, serializer):
+        previous_place_id = serializer.instance.place_id
+        with transaction.atomic():
+            post = serializer.save()
+            index_post(post)
+            if post.place_id != previous_place_id:
+                adjust_posts_count(previous_place_id, -1)
+                adjust_posts_count(post.place_id, 1)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            unindex_post(instance)
+            adjust_posts_count(instance.place_id, -1)
+            instance.delete()
+
+    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def like(self, request, pk=None):
         """Лайкнуть пост"""
         post = self.get_object()
-        like, created = Like.objects.get_or_create(user=request.user, post=post)
+        with transaction.atomic():
+            like, created = Like.objects.get_or_create(user=request.user, post=post)
+            if created:
+                Post.objects.filter(pk=post.pk).update(likes_count=F('likes_count') + 1)
         
         if created:
             return Response({'message': 'Пост лайкнут'}, status=status.HTTP_201_CREATED)
         else:
             return Response({'message': 'Вы уже лайкнули этот пост'}, status=status.HTTP_200_OK)
 
-    @action(detail=True, methods=['delete'])
+    @action(detail=True, methods=['delete'], permission_classes=[permissions.IsAuthenticated])
     def unlike(self, request, pk=None):
         """Убрать лайк с поста"""
         post = self.get_object()
-        try:
-            like = Like.objects.get(user=request.user, post=post)
-            like.delete()
+        with transaction.atomic():
+            deleted, _ = Like.objects.filter(user=request.user, post=post).delete()
+            if deleted:
+                # Greatest: разошедшийся счетчик не уходит ниже нуля (CHECK >= 0)
+                Post.objects.filter(pk=post.pk).update(likes_count=Greatest(F('likes_count') - 1, 0))
+
+        if deleted:
             return Response({'message': 'Лайк убран'}, status=status.HTTP_200_OK)
-        except Like.DoesNotExist:
-            return Response(
-                {'error': 'Вы не лайкали этот пост'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        return Response(
+            {'error': 'Вы не лайкали этот пост'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    @action(
+        detail=False,
+        methods=['post', 'delete'],
+        url_path='likes/bulk',
+        permission_classes=[permissions.IsAuthenticated]
+    )
+    def bulk_likes(self, request):
+        """Лайкнуть (POST) или убрать лайки (DELETE) списком: {"post_ids": [...]}"""
+        serializer = BulkPostIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        post_ids = serializer.validated_data['post_ids']
+        if request.method == 'POST':
+            return Response({'results': like_many(request.user, post_ids)})
+        return Response({'results': unlike_many(request.user, post_ids)})
 
     @action(detail=True, methods=['get'])
     def likes(self, request, pk=None):
         """Список пользователей, которые лайкнули пост"""
         post = self.get_object()
         likes = Like.objects.filter(post=post).select_related('user')
-        serializer = LikeSerializer(likes, many=True)
-        return Response(serializer.data)
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(likes, request, view=self)
+        serializer = LikeSerializer(page, many=True, context=self.get_serializer_context())
+        return paginator.get_paginated_response(serializer.data)
 
 
-class UserPostsViewSet(generics.ListAPIView):
+class UserPostsViewSet(AuthorVersionMixin, ListVersionMixin, generics.ListAPIView):
     """Посты конкретного пользователя"""
     serializer_class = PostSerializer
     permission_classes = [permissions.IsAuthenticated, CanViewUserPosts]
-    filter_backends = [OrderingFilter]
-    ordering_fields = ['created_at']
-    ordering = ['-created_at']
+    pagination_class = KeysetPagination
+    version_fields = (
+        'updated_at', 'pk', 'likes_count', 'comments_count', 'author_id', 'author__updated_at', 'viewer_has_liked',
+    )
 
     def get_queryset(self):
-        username = self.kwargs['username']
-        author = get_object_or_404(User, username=username)
-        return Post.objects.filter(author=author).select_related('author').prefetch_related('likes', 'comments')
+        return Post.objects.filter(author=self.get_author()).for_listing(self.request.user)
 
     def get_author(self):
-        username = self.kwargs['username']
-        return get_object_or_404(User, username=username)
+        # Автор нужен проверке доступа, ETag и выборке - резолвер загружает его один раз
+        return visibility.for_request(self.request).get_author(self.kwargs['username'])
 
 
-class CommentViewSet(ModelViewSet):
+class CommentViewSet(AuthorVersionMixin, ListVersionMixin, ModelViewSet):
     """ViewSet для комментариев"""
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticated, IsCommentOwnerOrReadOnly]
-    filter_backends = [OrderingFilter]
-    ordering_fields = ['created_at']
-    ordering = ['created_at']
+    pagination_class = ChronologicalKeysetPagination
+    # Превью ответов (load_reply_previews) входят в ответ: их правки меняют replies_changed
+    version_fields = ('updated_at', 'pk', 'replies_count', 'author_id', 'author__updated_at', 'replies_changed')
 
     def get_queryset(self):
         post_pk = self.kwargs['post_pk']
-        return Comment.objects.filter(post_id=post_pk).select_related('author', 'parent')
+        queryset = visibility.for_request(self.request).filter(
+            Comment.objects.filter(post_id=post_pk).select_related('author'),
+            field='post__author',
+        )
+        if self.action == 'list':
+            # Ответы загружаются превью и через comments/{id}/replies/
+            queryset = queryset.filter(parent=None).annotate(replies_changed=Subquery(
+                Comment.objects.filter(parent=OuterRef('pk')).order_by()
+                .values('parent').annotate(changed=Max('updated_at')).values('changed')
+            ))
+        return queryset
 
     def get_serializer_class(self):
         if self.action == 'create':
             return CommentCreateSerializer
         return CommentSerializer
 
+    def list(self, request, *args, **kwargs):
+        page = load_reply_previews(self.paginate_queryset(self.get_queryset()))
+        attach_followers_counts(comment_authors(page))
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=True, methods=['get'])
+    def replies(self, request, post_pk=None, pk=None):
+        """Ответы на комментарий (курсорная пагинация от старых к новым)"""
+        comment = self.get_object()
+        replies = Comment.objects.filter(parent=comment).select_related('author')
+        page = self.paginate_queryset(replies)
+        attach_followers_counts(comment_authors(page))
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
     def perform_create(self, serializer):
         post_pk = self.kwargs['post_pk']
-        post = get_object_or_404(Post, pk=post_pk)
-        serializer.save(author=self.request.user, post=post)
+        post = get_object_or_404(visibility.for_request(self.request).filter(Post.objects.all()), pk=post_pk)
+        with transaction.atomic():
+            comment = serializer.save(author=self.request.user, post=post)
+            Post.objects.filter(pk=post.pk).update(comments_count=F('comments_count') + 1)
+            if comment.parent_id:
+                Comment.objects.filter(pk=comment.parent_id).update(
+                    replies_count=F('replies_count') + 1
+                )
+            index_comment(comment, created=True)
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            index_comment(serializer.save())
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            # Вместе с комментарием каскадно удаляются и ответы на него
+            _, deleted = instance.delete()
+            removed = deleted.get(Comment._meta.label, 0)
+            Post.objects.filter(pk=instance.post_id).update(
+                comments_count=Greatest(F('comments_count') - removed, 0)
+            )
+            if instance.parent_id:
+                Comment.objects.filter(pk=instance.parent_id).update(
+                    replies_count=Greatest(F('replies_count') - 1, 0)
+                )
 
 
 class StoryViewSet(ModelViewSet):
@@ -134,10 +270,10 @@ class StoryViewSet(ModelViewSet):
     ordering = ['-created_at']
 
     def get_queryset(self):
-        # Показываем только активные истории
-        return Story.objects.filter(
-            expires_at__gt=timezone.now()
-        ).select_related('author')
+        # Показываем только активные истории доступных авторов
+        return visibility.for_request(self.request).filter(
+            Story.objects.filter(expires_at__gt=timezone.now()).select_related('author')
+        )
 
     def get_serializer_class(self):
         if self.action == 'create':
@@ -148,12 +284,8 @@ class StoryViewSet(ModelViewSet):
     def following_stories(self, request):
         """Истории от подписок"""
         if request.user.is_authenticated:
-            following_users = Follow.objects.filter(
-                follower=request.user
-            ).values_list('following', flat=True)
-            
             stories = Story.objects.filter(
-                author__in=following_users,
+                author__in=follow_graph.following_ids(request.user),
                 expires_at__gt=timezone.now()
             ).select_related('author').order_by('-created_at')
             
@@ -162,41 +294,149 @@ class StoryViewSet(ModelViewSet):
         else:
             return Response([])
 
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
+    def tray(self, request):
+        """Активные истории подписок, сгруппированные по авторам"""
+        groups = stories_tray(request.user)
+        attach_followers_counts([group['author'] for group in groups])
+        serializer = StoryTraySerializer(groups, many=True, context=self.get_serializer_context())
+        return Response(serializer.data)
+
+    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
+    def seen(self, request, pk=None):
+        """Отметить историю (и все более ранние истории автора) просмотренной"""
+        story = self.get_object()
+        mark_seen(request.user, story)
+        return Response({'message': 'История просмотрена'}, status=status.HTTP_200_OK)
+
 
-class FeedView(generics.ListAPIView):
+class FeedView(AuthorVersionMixin, ListVersionMixin, generics.ListAPIView):
     """Лента новостей (посты от подписок)"""
     serializer_class = PostSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [OrderingFilter]
-    ordering = ['-created_at']
+    pagination_class = KeysetPagination
+    version_fields = (
+        'updated_at', 'pk', 'likes_count', 'comments_count', 'author_id', 'author__updated_at', 'viewer_has_liked',
+    )
 
     def get_queryset(self):
-        following_users = Follow.objects.filter(
-            follower=self.request.user
-        ).values_list('following', flat=True)
-        
-        return Post.objects.filter(
-            author__in=following_users
-        ).select_related('author').prefetch_related('likes', 'comments')
+        return home_feed_queryset(self.request.user).for_listing(self.request.user)
 
 
 class ExploreView(generics.ListAPIView):
     """Рекомендуемые посты"""
     serializer_class = PostSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [OrderingFilter]
-    ordering = ['-created_at']
+    pagination_class = RankedListPagination
+
+    def list(self, request, *args, **kwargs):
+        # Пул уже отфильтрован от подписок и своих постов, из БД читается только страница
+        page_ids = self.paginate_queryset(explore_post_ids(request.user))
+        # Посты и авторы - из кэша сводок, лайки догружает ViewerState
+        posts = cached_posts(page_ids)
+        visible = visibility.for_request(request).visible_ids(post.author for post in posts.values())
+        page = [
+            posts[post_id] for post_id in page_ids
+            if post_id in posts and posts[post_id].author_id in visible
+        ]
+
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+class HashtagPostsView(generics.ListAPIView):
+    """Посты с хэштегом (по индексу PostHashtag, от новых к старым)"""
+    serializer_class = PostSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = PostLinkKeysetPagination
+
+    def list(self, request, *args, **kwargs):
+        hashtag = get_object_or_404(Hashtag, name=normalize_hashtag(kwargs['name']))
+        links = visibility.for_request(request).filter(
+            PostHashtag.objects.filter(hashtag=hashtag)
+        ).only('post_id', 'created_at')
+
+        page_ids = [link.post_id for link in self.paginate_queryset(links)]
+        posts = cached_posts(page_ids)
+        page = [posts[post_id] for post_id in page_ids if post_id in posts]
+
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+class TrendingHashtagsView(generics.ListAPIView):
+    """Хэштеги с наибольшим числом новых постов за последние дни"""
+    serializer_class = TrendingHashtagSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = None
 
     def get_queryset(self):
-        # Исключаем посты от подписок и свои посты
-        following_users = Follow.objects.filter(
-            follower=self.request.user
-        ).values_list('following', flat=True)
-        
-        excluded_users = list(following_users) + [self.request.user.id]
-        
-        return Post.objects.exclude(
-            author__in=excluded_users
-        ).filter(
-            author__is_private=False
-        ).select_related('author').prefetch_related('likes', 'comments')
+        return trending_hashtags()
+
+
+class MentionsView(generics.ListAPIView):
+    """Упоминания текущего пользователя в постах и комментариях"""
+    serializer_class = MentionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        return Mention.objects.filter(user=self.request.user).select_related('author')
+
+    def list(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.get_queryset())
+        attach_followers_counts([mention.author for mention in page])
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+class LocationViewSet(ReadOnlyModelViewSet):
+    """Места и посты, сделанные в них или рядом"""
+    queryset = Location.objects.all()
+    serializer_class = LocationSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        queryset = Location.objects.all()
+        name = self.request.query_params.get('name', '').strip().lower()
+        if self.action == 'list' and name:
+            queryset = queryset.filter(normalized_name__startswith=name)
+        return queryset.order_by('-posts_count', 'pk')
+
+    def paginate_posts(self, queryset):
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(
+            visibility.for_request(self.request).filter(queryset).for_listing(self.request.user),
+            self.request,
+            view=self,
+        )
+        serializer = PostSerializer(page, many=True, context=self.get_serializer_context())
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=True, methods=['get'])
+    def posts(self, request, pk=None):
+        """Посты места (от новых к старым)"""
+        location = self.get_object()
+        return self.paginate_posts(Post.objects.filter(place=location))
+
+    @action(detail=False, methods=['get'])
+    def nearby(self, request):
+        """Посты в радиусе ?radius= км от точки ?lat=&lon="""
+        latitude = self.coordinate('lat', -90, 90)
+        longitude = self.coordinate('lon', -180, 180)
+        radius = self.coordinate('radius', 0, settings.LOCATIONS_NEARBY_MAX_RADIUS_KM,
+                                 default=settings.LOCATIONS_NEARBY_DEFAULT_RADIUS_KM)
+        place_ids = [pk for pk, _ in nearby_locations(latitude, longitude, radius)]
+        return self.paginate_posts(Post.objects.filter(place_id__in=place_ids))
+
+    def coordinate(self, param, minimum, maximum, default=None):
+        raw = self.request.query_params.get(param)
+        if raw is None and default is not None:
+            return default
+        try:
+            value = float(raw)
+        except (TypeError, ValueError):
+            raise ValidationError({param: 'Укажите число'})
+        if not minimum <= value <= maximum:
+            raise ValidationError({param: f'Значение должно быть от {minimum} до {maximum}'})
+        return value
@@ -0,0 +1,194 @@
+"""
+Поиск постов и пользователей.
+
+На PostgreSQL посты ищутся полнотекстово по search_vector (tsvector,
+GIN-индекс, поддерживается триггером) с ранжированием ts_rank, а
+пользователи - по префиксу и триграммному сходству (pg_trgm) имени
+пользователя, имени и фамилии. На остальных СУБД (SQLite в бенчмарках и
+при локальной разработке) используется инвертированный индекс в памяти
+процесса, который перестраивается при изменении данных.
+"""
+import re
+from collections import defaultdict
+from difflib import get_close_matches
+from math import log
+
+from django.contrib.postgres.lookups import TrigramSimilar
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db import connection
+from django.db.models import Count, F, Max, Q, TextField
+from django.db.models.functions import Cast, Greatest, Upper
+
+from apps.accounts.models import User
+from apps.posts.models import Post
+
+# Должен совпадать со словарем в триггере posts_search_vector_update
+SEARCH_CONFIG = 'russian'
+FUZZY_CUTOFF = 0.6
+
+_TOKEN = re.compile(r'\w+')
+
+
+def tokenize(text):
+    return _TOKEN.findall((text or '').lower())
+
+
+def _upper_text(field):
+    # То же выражение, что в триграммных индексах users_*_trgm_idx
+    return Upper(Cast(field, TextField()))
+
+
+class PostgresSearchBackend:
+    """Полнотекстовый поиск (tsvector) и триграммы (pg_trgm)"""
+
+    def filter_posts(self, queryset, query):
+        return queryset.filter(search_vector=self._post_query(query))
+
+    def rank_posts(self, queryset, query, limit):
+        search_query = self._post_query(query)
+        return list(
+            queryset.filter(search_vector=search_query)
+            .annotate(rank=SearchRank(F('search_vector'), search_query))
+            .order_by('-rank', '-created_at')
+            .values_list('pk', flat=True)[:limit]
+        )
+
+    def filter_users(self, queryset, query):
+        return queryset.filter(self._user_condition(query))
+
+    def rank_users(self, queryset, query, limit):
+        term = query.upper()
+        return list(
+            queryset.filter(self._user_condition(query))
+            .annotate(similarity=Greatest(
+                TrigramSimilarity(_upper_text('username'), term),
+                TrigramSimilarity(_upper_text('first_name'), term),
+                TrigramSimilarity(_upper_text('last_name'), term),
+            ))
+            .order_by('-similarity', 'username')
+            .values_list('pk', flat=True)[:limit]
+        )
+
+    @staticmethod
+    def _post_query(query):
+        return SearchQuery(query, config=SEARCH_CONFIG, search_type='websearch')
+
+    @staticmethod
+    def _user_condition(query):
+        """Префикс любого из полей или нечеткое совпадение имени пользователя"""
+        return (
+            Q(username__istartswith=query)
+            | Q(first_name__istartswith=query)
+            | Q(last_name__istartswith=query)
+            | TrigramSimilar(_upper_text('username'), query.upper())
+        )
+
+
+class InvertedIndex:
+    """Термин -> {id: число вхождений}; перестраивается, если изменилась версия данных"""
+
+    def __init__(self, load_documents):
+        self.load_documents = load_documents
+        self.version = None
+        self.postings = {}
+        self.size = 0
+
+    def refresh(self, version):
+        if version == self.version:
+            return
+        postings = defaultdict(lambda: defaultdict(int))
+        size = 0
+        for pk, text in self.load_documents():
+            size += 1
+            for token in tokenize(text):
+                postings[token][pk] += 1
+        self.postings = {token: dict(docs) for token, docs in postings.items()}
+        self.size = size
+        self.version = version
+
+    def terms(self, token, prefix, fuzzy):
+        if prefix:
+            terms = [term for term in self.postings if term.startswith(token)]
+        else:
+            terms = [token] if token in self.postings else []
+        if not terms and fuzzy:
+            terms = get_close_matches(token, self.postings, n=5, cutoff=FUZZY_CUTOFF)
+        return terms
+
+    def search(self, query, fuzzy=False):
+        """{id: оценка tf-idf}; документ должен содержать все слова запроса"""
+        tokens = tokenize(query)
+        if not tokens:
+            return {}
+        scores = None
+        for position, token in enumerate(tokens):
+            # Последнее слово запроса может быть недописанным - ищем по префиксу
+            terms = self.terms(token, prefix=position == len(tokens) - 1, fuzzy=fuzzy)
+            matches = defaultdict(float)
+            for term in terms:
+                docs = self.postings.get(term, {})
+                idf = log(1 + self.size / len(docs)) if docs else 0
+                for pk, count in docs.items():
+                    matches[pk] += count * idf
+            if scores is None:
+                scores = dict(matches)
+            else:
+                scores = {pk: score + matches[pk] for pk, score in scores.items() if pk in matches}
+        return scores
+
+
+class InMemorySearchBackend:
+    """Поиск без расширений PostgreSQL: инвертированный индекс в памяти"""
+
+    def __init__(self):
+        self.posts = InvertedIndex(
+            lambda: (
+                (pk, f'{caption} {location}')
+                for pk, caption, location in Post.objects.values_list('pk', 'caption', 'location').iterator()
+            )
+        )
+
+        self.users = InvertedIndex(
+            lambda: (
+                (pk, ' '.join(fields))
+                for pk, *fields in User.objects.filter(is_active=True).values_list(
+                    'pk', 'username', 'first_name', 'last_name'
+                ).iterator()
+            )
+        )
+
+    def _post_scores(self, query):
+        self.posts.refresh(Post.objects.aggregate(total=Count('pk'), changed=Max('updated_at')))
+        return self.posts.search(query)
+
+    def filter_posts(self, queryset, query):
+        return queryset.filter(pk__in=list(self._post_scores(query)))
+
+    def rank_posts(self, queryset, query, limit):
+        scores = self._post_scores(query)
+        allowed = set(queryset.filter(pk__in=list(scores)).values_list('pk', flat=True))
+        ranked = sorted(allowed, key=lambda pk: (-scores[pk], -pk))
+        return ranked[:limit]
+
+    def _user_scores(self, query):
+        self.users.refresh(User.objects.aggregate(total=Count('pk'), changed=Max('updated_at')))
+        return self.users.search(query, fuzzy=True)
+
+    def filter_users(self, queryset, query):
+        return queryset.filter(pk__in=list(self._user_scores(query)))
+
+    def rank_users(self, queryset, query, limit):
+        scores = self._user_scores(query)
+        allowed = set(queryset.filter(pk__in=list(scores)).values_list('pk', flat=True))
+        return sorted(allowed, key=lambda pk: (-scores[pk], pk))[:limit]
+
+
+_backends = {}
+
+
+def get_backend():
+    """Бэкенд поиска для текущей СУБД"""
+    vendor = connection.vendor
+    if vendor not in _backends:
+        _backends[vendor] = PostgresSearchBackend() if vendor == 'postgresql' else InMemorySearchBackend()
+    return _backends[vendor]
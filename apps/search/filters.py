@@ -0,0 +1,30 @@
+from rest_framework.filters import BaseFilterBackend
+
+from apps.posts.models import Post
+from .backends import get_backend
+
+
+class SearchIndexFilter(BaseFilterBackend):
+    """
+    Параметр ?search= для списков постов и пользователей через поисковый
+    индекс вместо icontains по каждому полю
+    """
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query:
+            return queryset
+        backend = get_backend()
+        if issubclass(queryset.model, Post):
+            return backend.filter_posts(queryset, query)
+        return backend.filter_users(queryset, query)
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            'name': self.search_param,
+            'required': False,
+            'in': 'query',
+            'description': 'Поисковый запрос',
+            'schema': {'type': 'string'},
+        }]
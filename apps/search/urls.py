@@ -0,0 +1,9 @@
+from django.urls import path
+from . import views
+
+app_name = 'search'
+
+urlpatterns = [
+    path('posts/', views.PostSearchView.as_view(), name='posts'),
+    path('users/', views.UserSearchView.as_view(), name='users'),
+]
@@ -0,0 +1,69 @@
+from abc import ABCMeta, abstractmethod
+
+from django.conf import settings
+from rest_framework import generics, permissions
+from rest_framework.exceptions import ValidationError
+
+from apps.accounts.models import User
+from apps.accounts.serializers import UserListSerializer
+from apps.accounts.cache import cached_users
+from apps.posts.cache import cached_posts
+from apps.posts.models import Post
+from apps.posts.serializers import PostSerializer
+from core.pagination import RankedListPagination
+from .backends import get_backend
+
+
+class RankedSearchView(generics.ListAPIView, metaclass=ABCMeta):
+    """
+    Поиск с ранжированием: бэкенд возвращает упорядоченные ID лучших
+    SEARCH_MAX_RESULTS результатов, из БД читается только текущая страница
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = RankedListPagination
+
+    def get_search_query(self):
+        query = self.request.query_params.get('q', '').strip()
+        if not query:
+            raise ValidationError({'q': 'Укажите поисковый запрос'})
+        return query
+
+    @abstractmethod
+    def rank(self, query, limit):
+        """Упорядоченные ID не более limit лучших результатов"""
+
+    @abstractmethod
+    def load_page(self, page_ids):
+        """{id: объект} для ID текущей страницы"""
+
+    def list(self, request, *args, **kwargs):
+        ranked_ids = self.rank(self.get_search_query(), settings.SEARCH_MAX_RESULTS)
+        page_ids = self.paginate_queryset(ranked_ids)
+        objects = self.load_page(page_ids)
+        page = [objects[pk] for pk in page_ids if pk in objects]
+
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+class PostSearchView(RankedSearchView):
+    """Полнотекстовый поиск постов по подписи и месту"""
+    serializer_class = PostSerializer
+
+    def rank(self, query, limit):
+        # Только посты, которые пользователь может видеть
+        return get_backend().rank_posts(Post.objects.visible_to(self.request.user), query, limit)
+
+    def load_page(self, page_ids):
+        return cached_posts(page_ids)
+
+
+class UserSearchView(RankedSearchView):
+    """Поиск пользователей по префиксу и нечеткому совпадению имени"""
+    serializer_class = UserListSerializer
+
+    def rank(self, query, limit):
+        return get_backend().rank_users(User.objects.filter(is_active=True), query, limit)
+
+    def load_page(self, page_ids):
+        return cached_users(page_ids)
@@ -0,0 +1,63 @@
+"""
+Пропускная способность при конкурентных клиентах: синхронные представления
+под WSGI-сервером против асинхронных вариантов под ASGI-сервером.
+
+Оба сервера запускаются отдельно на одной и той же БД; здесь только клиенты
+(потоки со стандартным urllib), которые бьют в эндпоинты с одинаковым JWT.
+"""
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from .runner import percentile
+
+# (название, путь в синхронном API, путь асинхронного варианта)
+ENDPOINTS = [
+    ('feed', '/api/posts/feed/', '/api/posts/async/feed/'),
+    ('explore', '/api/posts/explore/', '/api/posts/async/explore/'),
+    ('following_stories', '/api/posts/stories/following_stories/', '/api/posts/async/stories/following/'),
+    ('user_detail', '/api/accounts/users/{username}/', '/api/accounts/async/users/{username}/'),
+]
+
+
+def fetch(url, token, timeout):
+    """Один запрос: (время в мс, успех)"""
+    request = urllib.request.Request(url, headers={'Authorization': f'Bearer {token}'})
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            ok = response.status == 200
+    except (urllib.error.URLError, TimeoutError, ConnectionError):
+        ok = False
+    return (time.perf_counter() - started) * 1000, ok
+
+
+def load(url, token, clients, requests, timeout=30):
+    """requests запросов к url от clients одновременных клиентов"""
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        started = time.perf_counter()
+        results = list(pool.map(lambda _: fetch(url, token, timeout), range(requests)))
+        elapsed = time.perf_counter() - started
+
+    timings = [ms for ms, ok in results if ok]
+    return {
+        'rps': round(len(timings) / elapsed, 1),
+        'errors': len(results) - len(timings),
+        'p50_ms': round(percentile(timings, 50), 2) if timings else None,
+        'p95_ms': round(percentile(timings, 95), 2) if timings else None,
+    }
+
+
+def run_concurrency(wsgi_url, asgi_url, token, params, clients, requests, warmup=5):
+    """Замеры для каждой пары эндпоинтов на обоих серверах"""
+    results = {}
+    for name, sync_path, async_path in ENDPOINTS:
+        results[name] = {}
+        for server, base_url, path in (('wsgi', wsgi_url, sync_path), ('asgi', asgi_url, async_path)):
+            url = base_url.rstrip('/') + path.format(**params)
+            for _ in range(warmup):
+                fetch(url, token, timeout=30)
+            results[name][server] = load(url, token, clients, requests)
+    return results
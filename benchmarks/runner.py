@@ -0,0 +1,129 @@
+"""
+Замеры API на синтетических данных: количество SQL-запросов, задержка
+(p50/p95/p99) и число загруженных строк (созданных экземпляров моделей).
+
+Общий уровень кэша объектов отключается, а локальный очищается после
+прогрева: первый замер идет с холодным кэшем, и максимум числа запросов
+не прячет N+1 за попаданиями, а задержки в основном - с теплым.
+"""
+import subprocess
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.db.models import Count
+from django.db.models.signals import post_init
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+
+from apps.accounts.models import User
+from apps.posts.models import Post
+
+ENDPOINTS = [
+    ('feed', '/api/posts/feed/'),
+    ('explore', '/api/posts/explore/'),
+    ('post_detail', '/api/posts/posts/{post_id}/'),
+    ('post_comments', '/api/posts/posts/{post_id}/comments/'),
+    ('user_posts', '/api/posts/users/{username}/posts/'),
+    ('user_list', '/api/accounts/users/'),
+]
+
+
+class RowCounter:
+    """Считает экземпляры моделей, созданные из строк БД"""
+
+    def __init__(self):
+        self.rows = 0
+
+    def __enter__(self):
+        post_init.connect(self.count, weak=False)
+        return self
+
+    def __exit__(self, *exc_info):
+        post_init.disconnect(self.count)
+
+    def count(self, sender, **kwargs):
+        self.rows += 1
+
+
+def percentile(values, percent):
+    """Перцентиль методом ближайшего ранга"""
+    ordered = sorted(values)
+    index = max(0, int(round(percent / 100 * len(ordered))) - 1)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+def pick_fixtures():
+    """Самые «тяжелые» объекты графа: на них регрессии заметнее всего"""
+    viewer = User.objects.annotate(n=Count('following')).order_by('-n', 'pk').first()
+    author = User.objects.filter(is_private=False).annotate(
+        n=Count('followers')
+    ).order_by('-n', 'pk').first()
+    post = Post.objects.filter(author__is_private=False).order_by('-comments_count', 'pk').first()
+    return viewer, {'username': author.username, 'post_id': post.pk}
+
+
+def measure(client, url, iterations, warmup):
+    for _ in range(warmup):
+        client.get(url)
+    caches[settings.OBJECT_CACHE['LOCAL']].clear()
+
+    timings, queries, rows = [], 0, 0
+    status = None
+    for _ in range(iterations):
+        with CaptureQueriesContext(connection) as captured, RowCounter() as counter:
+            started = time.perf_counter()
+            response = client.get(url)
+            timings.append((time.perf_counter() - started) * 1000)
+        status = response.status_code
+        queries = max(queries, len(captured))
+        rows = max(rows, counter.rows)
+
+    return {
+        'status': status,
+        'queries': queries,
+        'rows': rows,
+        'p50_ms': round(percentile(timings, 50), 2),
+        'p95_ms': round(percentile(timings, 95), 2),
+        'p99_ms': round(percentile(timings, 99), 2),
+    }
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(iterations=20, warmup=2):
+    viewer, params = pick_fixtures()
+    client = APIClient()
+    client.force_authenticate(viewer)
+
+    with override_settings(OBJECT_CACHE={**settings.OBJECT_CACHE, 'SHARED': None}):
+        return {
+            name: measure(client, template.format(**params), iterations, warmup)
+            for name, template in ENDPOINTS
+        }
+
+
+# Метрики, которые не должны расти относительно эталона (задержки зависят от машины)
+CHECKED_METRICS = ('queries', 'rows')
+
+
+def compare(results, baseline):
+    """[(эндпоинт, метрика, в эталоне, сейчас), ...] - где запросов или строк стало больше"""
+    regressions = []
+    for name, metrics in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        for metric in CHECKED_METRICS:
+            if metric in expected and metrics[metric] > expected[metric]:
+                regressions.append((name, metric, expected[metric], metrics[metric]))
+    return regressions
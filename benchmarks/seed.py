@@ -0,0 +1,122 @@
+"""
+Генерация синтетического социального графа для бенчмарков.
+
+Популярность пользователей распределена по степенному закону (Zipf):
+несколько аккаунтов собирают большую часть подписок и лайков, как в
+настоящей соцсети.
+"""
+import io
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+
+from apps.accounts.models import User, Follow
+from apps.posts.models import Post, Like, Comment
+
+BULK_BATCH_SIZE = 1000
+
+DEFAULT_CONFIG = {
+    'users': 200,
+    'follows_per_user': 20,
+    'posts': 1000,
+    'likes': 5000,
+    'comments': 2000,
+    'private_ratio': 0.1,
+    'zipf_alpha': 1.2,
+    'seed': 42,
+}
+
+
+def zipf_weights(size, alpha):
+    return [1 / (rank + 1) ** alpha for rank in range(size)]
+
+
+def weighted_sample(rng, population, weights, k):
+    """До k различных элементов с вероятностью, пропорциональной весу"""
+    chosen = set()
+    for _ in range(4):
+        chosen.update(rng.choices(population, weights=weights, k=k))
+        if len(chosen) >= k:
+            break
+    return list(chosen)[:k]
+
+
+def seed_graph(config=None):
+    """Создать пользователей, подписки, посты, лайки и комментарии"""
+    config = {**DEFAULT_CONFIG, **(config or {})}
+    rng = random.Random(config['seed'])
+    password = make_password('benchmark-password')
+
+    users = User.objects.bulk_create(
+        [
+            User(
+                username=f'bench{i}',
+                email=f'bench{i}@example.com',
+                password=password,
+                is_private=rng.random() < config['private_ratio'],
+            )
+            for i in range(config['users'])
+        ],
+        batch_size=BULK_BATCH_SIZE,
+    )
+    user_ids = [user.pk for user in users]
+    # Ранг популярности не совпадает с порядком создания
+    popularity = user_ids[:]
+    rng.shuffle(popularity)
+    weights = zipf_weights(len(popularity), config['zipf_alpha'])
+
+    follows = []
+    for user_id in user_ids:
+        count = rng.randint(1, 2 * config['follows_per_user'])
+        targets = weighted_sample(rng, popularity, weights, count)
+        follows.extend(
+            Follow(follower_id=user_id, following_id=target)
+            for target in targets if target != user_id
+        )
+    Follow.objects.bulk_create(follows, batch_size=BULK_BATCH_SIZE, ignore_conflicts=True)
+
+    authors = rng.choices(popularity, weights=weights, k=config['posts'])
+    posts = Post.objects.bulk_create(
+        [
+            Post(author_id=author_id, image='bench/placeholder.jpg', caption=f'Пост #{i}')
+            for i, author_id in enumerate(authors)
+        ],
+        batch_size=BULK_BATCH_SIZE,
+    )
+    # Посты популярных авторов популярнее: вес поста - вес автора
+    author_weight = dict(zip(popularity, weights))
+    post_ids = [post.pk for post in posts]
+    post_weights = [author_weight[post.author_id] for post in posts]
+
+    liked_posts = rng.choices(post_ids, weights=post_weights, k=config['likes'])
+    likes = {(rng.choice(user_ids), post_id) for post_id in liked_posts}
+    Like.objects.bulk_create(
+        [Like(user_id=user_id, post_id=post_id) for user_id, post_id in likes],
+        batch_size=BULK_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+    commented_posts = rng.choices(post_ids, weights=post_weights, k=config['comments'])
+    top_level_count = int(len(commented_posts) * 0.7)
+    top_level = Comment.objects.bulk_create(
+        [
+            Comment(author_id=rng.choice(user_ids), post_id=post_id, text='Комментарий')
+            for post_id in commented_posts[:top_level_count]
+        ],
+        batch_size=BULK_BATCH_SIZE,
+    )
+    if top_level:
+        parents = rng.choices(top_level, k=len(commented_posts) - top_level_count)
+        Comment.objects.bulk_create(
+            [
+                Comment(author_id=rng.choice(user_ids), post_id=parent.post_id, parent_id=parent.pk, text='Ответ')
+                for parent in parents
+            ],
+            batch_size=BULK_BATCH_SIZE,
+        )
+
+    # Счетчики и материализованные ленты заполняются штатными командами
+    call_command('reconcile_counters', stdout=io.StringIO())
+    call_command('rebuild_feeds', stdout=io.StringIO())
+    return config
@@ -0,0 +1,47 @@
+import json
+from pathlib import Path
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from .runner import compare, run_benchmarks
+from .seed import seed_graph
+
+BASELINE = json.loads((Path(__file__).resolve().parent / 'baseline.json').read_text())
+
+
+class CompareTests(SimpleTestCase):
+    baseline = {'feed': {'queries': 3, 'rows': 42}}
+
+    def test_no_regressions(self):
+        self.assertEqual(compare({'feed': {'queries': 3, 'rows': 40}}, self.baseline), [])
+
+    def test_more_queries(self):
+        self.assertEqual(
+            compare({'feed': {'queries': 4, 'rows': 42}}, self.baseline),
+            [('feed', 'queries', 3, 4)],
+        )
+
+    def test_more_rows(self):
+        self.assertEqual(
+            compare({'feed': {'queries': 3, 'rows': 60}}, self.baseline),
+            [('feed', 'rows', 42, 60)],
+        )
+
+    def test_endpoint_missing_from_baseline(self):
+        self.assertEqual(compare({'explore': {'queries': 50, 'rows': 500}}, self.baseline), [])
+
+
+@skipUnless(connection.vendor == BASELINE['database'], 'эталон снят на другой СУБД')
+@override_settings(REQUEST_METRICS={'SAMPLE_RATE': 0})
+class BaselineTests(TestCase):
+    """Число запросов и строк ключевых эндпоинтов не превышает benchmarks/baseline.json"""
+
+    def test_queries_and_rows_within_baseline(self):
+        seed_graph(BASELINE['config'])
+        results = run_benchmarks(iterations=1, warmup=1)
+        for name, metrics in results.items():
+            with self.subTest(name):
+                self.assertEqual(metrics['status'], 200)
+        self.assertEqual(compare(results, BASELINE['endpoints']), [])
@@ -0,0 +1,87 @@
+"""
+Общие части асинхронных (ASGI) представлений для нагруженных чтений.
+
+DRF не поддерживает async-представления, поэтому здесь обычные async-функции
+Django: JWT-аутентификация по claims токена (для старых токенов - загрузка
+пользователя через async ORM), обертка
+запроса в rest_framework.request.Request (для сериализаторов и пагинации) и
+ответ в том же JSON-формате, что у DRF.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotAuthenticated, AuthenticationFailed
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from apps.accounts.authentication import user_from_token
+from apps.accounts.models import User
+from core.middleware import timed
+
+
+def json_response(data, status=status.HTTP_200_OK):
+    with timed('render'):
+        content = JSONRenderer().render(data)
+    return HttpResponse(content, status=status, content_type='application/json')
+
+
+async def authenticate(request):
+    """Пользователь из JWT-заголовка Authorization (без блокирующих запросов)"""
+    auth = JWTAuthentication()
+    header = auth.get_header(request)
+    raw_token = auth.get_raw_token(header) if header is not None else None
+    if raw_token is None:
+        return AnonymousUser()
+
+    # Проверка подписи и срока действия токена не обращается к БД
+    token = auth.get_validated_token(raw_token)
+    # Пользователь из claims; feed_version читается из кэша объектов (синхронный API)
+    user = await sync_to_async(user_from_token)(token)
+    if user is not None:
+        return user
+    try:
+        user_id = token[api_settings.USER_ID_CLAIM]
+    except KeyError:
+        raise InvalidToken('Токен не содержит идентификатор пользователя')
+
+    user = await User.objects.filter(**{api_settings.USER_ID_FIELD: user_id}).afirst()
+    if user is None or not user.is_active:
+        raise AuthenticationFailed('Пользователь не найден или отключен')
+    return user
+
+
+def async_api_view(view=None, *, login_required=True):
+    """
+    Асинхронное представление только для GET с JWT-аутентификацией.
+    Представление получает DRF Request, ошибки DRF превращаются в JSON-ответ.
+    """
+    if view is None:
+        return lambda view: async_api_view(view, login_required=login_required)
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method != 'GET':
+            return json_response(
+                {'detail': f'Метод "{request.method}" не разрешен.'},
+                status=status.HTTP_405_METHOD_NOT_ALLOWED,
+            )
+        try:
+            user = await authenticate(request)
+            if login_required and not user.is_authenticated:
+                raise NotAuthenticated()
+            api_request = Request(request)
+            api_request.user = user
+            return await view(api_request, *args, **kwargs)
+        except APIException as exc:
+            data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+            response = json_response(data, exc.status_code)
+            if isinstance(exc, (NotAuthenticated, AuthenticationFailed)):
+                response['WWW-Authenticate'] = JWTAuthentication().authenticate_header(request)
+            return response
+    return wrapper
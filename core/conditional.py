@@ -0,0 +1,141 @@
+"""
+Условные GET-запросы (If-None-Match) для представлений DRF.
+
+Версия ответа - значения полей version_fields у объектов ответа: updated_at,
+хранимые счетчики, дата изменения автора, лайк просматривающего (аннотация
+viewer_has_liked). Вместе с полным путем запроса, версией связанных данных
+(related_version(), например счетчики подписчиков авторов) и номером версии
+просматривающего (User.feed_version: подписки меняют is_following и состав
+ленты) она хэшируется в слабый ETag.
+
+Если клиент прислал If-None-Match, те же поля читаются одним узким запросом
+до загрузки объектов; при совпадении отдается 304 без сериализации. Без
+If-None-Match лишнего запроса нет: ETag считается по уже загруженным
+объектам.
+
+Last-Modified отдается справочно: лайки и комментарии меняют счетчики, но
+не updated_at, поэтому 304 решается только по ETag.
+"""
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from rest_framework.exceptions import APIException
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+class NotModified(APIException):
+    status_code = 304
+
+    def __init__(self, response):
+        super().__init__()
+        self.response = response
+
+
+def field_value(obj, path):
+    for name in path.split('__'):
+        obj = getattr(obj, name)
+    return obj
+
+
+class ConditionalMixin:
+    """
+    ETag и Last-Modified для GET. Представление задает version_fields (первое
+    поле - дата изменения) и get_version_queryset() - строки той же выборки,
+    что попадут в ответ; загруженные объекты запоминаются в version_objects.
+    """
+    version_fields = ('updated_at', 'pk')
+    conditional_actions = None
+
+    def get_version_queryset(self):
+        raise NotImplementedError
+
+    def load_version_rows(self):
+        """Строки версии до загрузки объектов; None - ответ не будет 200"""
+        return list(self.get_version_queryset().values_list(*self.version_fields))
+
+    def version_rows(self, objects):
+        return [tuple(field_value(obj, field) for field in self.version_fields) for obj in objects]
+
+    def related_version(self, rows):
+        """Версия данных ответа, которых нет в строках версии (None - таких нет)"""
+        return None
+
+    def make_etag(self, request, rows):
+        viewer = request.user
+        viewer_version = (viewer.pk, viewer.feed_version) if viewer.is_authenticated else None
+        raw = repr((request.get_full_path(), viewer_version, rows, self.related_version(rows)))
+        return f'W/"{hashlib.sha1(raw.encode()).hexdigest()}"'
+
+    def is_conditional(self, request):
+        if request.method not in SAFE_METHODS:
+            return False
+        return self.is_conditional_action()
+
+    def is_conditional_action(self):
+        # У generic-представлений вне ViewSet нет action: условным считается любой GET
+        action = getattr(self, 'action', None)
+        return action is None or self.conditional_actions is None or action in self.conditional_actions
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.version_objects = None
+        if self.is_conditional(request) and 'HTTP_IF_NONE_MATCH' in request.META:
+            rows = self.load_version_rows()
+            if rows is not None:
+                not_modified = get_conditional_response(request, etag=self.make_etag(request, rows))
+                if not_modified is not None:
+                    raise NotModified(not_modified)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        objects = getattr(self, 'version_objects', None)
+        if objects is not None and response.status_code == 200 and self.is_conditional(request):
+            rows = self.version_rows(objects)
+            response['ETag'] = self.make_etag(request, rows)
+            if rows:
+                response['Last-Modified'] = http_date(max(row[0] for row in rows).timestamp())
+            # Ответ зависит от пользователя: кэш клиента должен переспрашивать сервер
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ('Authorization',))
+        return response
+
+
+class DetailVersionMixin(ConditionalMixin):
+    """Версия одного объекта (retrieve)"""
+    conditional_actions = ('retrieve',)
+
+    def get_version_queryset(self):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        return self.filter_queryset(self.get_queryset()).filter(
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+
+    def load_version_rows(self):
+        # Объект не найден - пусть get_object() ответит 404
+        return super().load_version_rows() or None
+
+    def get_object(self):
+        obj = super().get_object()
+        self.version_objects = [obj]
+        return obj
+
+
+class ListVersionMixin(ConditionalMixin):
+    """Версия страницы курсорной пагинации: те же фильтры, курсор и размер"""
+    conditional_actions = ('list',)
+
+    def get_version_queryset(self):
+        return self.paginator.page_queryset(self.filter_queryset(self.get_queryset()), self.request)
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if self.is_conditional_action():
+            self.version_objects = page
+        return page
@@ -0,0 +1,81 @@
+"""
+Geohash без PostGIS.
+
+Точка кодируется строкой base32, у близких точек общий префикс. Поиск
+«рядом с X» - это 9 префиксов (ячейка X и соседние) подходящей длины, то
+есть 9 диапазонов по обычному B-tree индексу, а точное расстояние
+проверяется только для найденных строк.
+"""
+from math import asin, cos, radians, sin, sqrt
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+MAX_PRECISION = 12
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.32
+
+
+def encode(latitude, longitude, precision=MAX_PRECISION):
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        # Биты долготы и широты чередуются, начиная с долготы
+        interval, coordinate = (lon_range, longitude) if even else (lat_range, latitude)
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits = value = 0
+    return ''.join(chars)
+
+
+def cell_size(precision):
+    """Размер ячейки в градусах: (широта, долгота)"""
+    lon_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lon_bits
+
+
+def precision_for_radius(radius_km, latitude):
+    """
+    Самая длинная точность, при которой ячейка не меньше радиуса: тогда
+    ячейка точки и ее соседи целиком покрывают круг поиска
+    """
+    for precision in range(MAX_PRECISION, 0, -1):
+        lat_size, lon_size = cell_size(precision)
+        height = lat_size * KM_PER_DEGREE
+        width = lon_size * KM_PER_DEGREE * cos(radians(latitude))
+        if min(height, width) >= radius_km:
+            return precision
+    return 1
+
+
+def neighbours(latitude, longitude, precision):
+    """Ячейка точки и восемь соседних (без повторов у полюсов)"""
+    lat_size, lon_size = cell_size(precision)
+    cells = []
+    for dlat in (-1, 0, 1):
+        lat = min(max(latitude + dlat * lat_size, -90.0), 90.0)
+        for dlon in (-1, 0, 1):
+            lon = (longitude + dlon * lon_size + 180.0) % 360.0 - 180.0
+            cell = encode(lat, lon, precision)
+            if cell not in cells:
+                cells.append(cell)
+    return cells
+
+
+def distance_km(lat1, lon1, lat2, lon2):
+    """Расстояние по большому кругу (формула гаверсинусов)"""
+    lat1, lon1, lat2, lon2 = map(radians, (lat1, lon1, lat2, lon2))
+    a = sin((lat2 - lat1) / 2) ** 2 + cos(lat1) * cos(lat2) * sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * asin(sqrt(a))
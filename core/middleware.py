@@ -0,0 +1,215 @@
+import json
+import logging
+import random
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connection
+from django.db.backends.signals import connection_created
+
+from core.object_cache import collect_stats, hit_ratio
+
+logger = logging.getLogger('core.metrics')
+
+_IN_LIST = re.compile(r'\((?:\s*%s\s*,)+\s*%s\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """SQL без параметров и с одинаковым видом IN-списков любой длины"""
+    return _WHITESPACE.sub(' ', _IN_LIST.sub('(...)', sql)).strip()
+
+
+class QueryCollector:
+    """Обертка execute_wrapper: число запросов, время в БД и повторы"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    def duplicates(self):
+        return {sql: count for sql, count in self.fingerprints.items() if count > 1}
+
+
+class RequestTimings:
+    """Время сериализации и рендеринга ответа без запросов к БД внутри них"""
+
+    def __init__(self, collector):
+        self.collector = collector
+        self.durations = Counter()
+        self.active = set()
+
+
+_timings = ContextVar('request_timings', default=None)
+
+
+def collect_query(execute, sql, params, many, context):
+    """
+    Обертка execute_wrapper, установленная на каждое соединение. Соединения
+    свои у каждого потока, а контекст запроса копируется и в потоки
+    sync_to_async, поэтому так учитываются и запросы асинхронных представлений
+    """
+    timings = _timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    return timings.collector(execute, sql, params, many, context)
+
+
+def install_collector(connection, **kwargs):
+    if collect_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(collect_query)
+
+
+connection_created.connect(install_collector)
+
+
+@contextmanager
+def timed(kind):
+    """
+    Отнести время блока к kind ('serialize' или 'render') в метриках запроса.
+    Вложенные блоки того же вида не считаются повторно, запросы к БД внутри
+    блока остаются во времени БД
+    """
+    timings = _timings.get()
+    if timings is None or kind in timings.active:
+        yield
+        return
+    timings.active.add(kind)
+    started, db_before = time.perf_counter(), timings.collector.duration
+    try:
+        yield
+    finally:
+        timings.active.discard(kind)
+        elapsed = time.perf_counter() - started - (timings.collector.duration - db_before)
+        timings.durations[kind] += max(elapsed, 0.0)
+
+
+class RequestMetricsMiddleware:
+    """
+    Замеряет для выборки запросов количество SQL-запросов, время в БД, время
+    сериализаторов (timed('serialize') в списочном сериализаторе), рендеринга
+    ответа и остального кода представления, повторяющиеся запросы (N+1),
+    размер ответа и попадания в кэш объектов. Результат отдается заголовком
+    Server-Timing и пишется JSON-строкой в логгер core.metrics; сводку по
+    представлениям строит команда request_metrics_summary.
+
+    Работает и в синхронной, и в асинхронной цепочке: под ASGI асинхронные
+    представления не переводятся в поток ради этого middleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        config = getattr(settings, 'REQUEST_METRICS', {})
+        self.sample_rate = config.get('SAMPLE_RATE', 0.0)
+        self.server_timing = config.get('SERVER_TIMING', True)
+
+    def sampled(self):
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+
+        with self.measure() as (timings, cache_stats):
+            response = self.get_response(request)
+        return self.report(request, response, timings, cache_stats)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+
+        with self.measure() as (timings, cache_stats):
+            response = await self.get_response(request)
+        return self.report(request, response, timings, cache_stats)
+
+    @contextmanager
+    def measure(self):
+        # Соединение могло открыться до загрузки middleware
+        install_collector(connection)
+        timings = RequestTimings(QueryCollector())
+        token = _timings.set(timings)
+        started = time.perf_counter()
+        try:
+            with collect_stats() as cache_stats:
+                yield timings, cache_stats
+        finally:
+            timings.durations['total'] = time.perf_counter() - started
+            _timings.reset(token)
+
+    def process_template_response(self, request, response):
+        # Рендеринг DRF Response идет сразу после этого хука и до возврата из get_response
+        timings = _timings.get()
+        if timings is not None:
+            context = timed('render')
+            context.__enter__()
+
+            def rendered(response):
+                # Непустой результат обратного вызова подменил бы ответ
+                context.__exit__(None, None, None)
+
+            response.add_post_render_callback(rendered)
+        return response
+
+    def report(self, request, response, timings, cache_stats):
+        collector = timings.collector
+        db_ms = collector.duration * 1000
+        total_ms = timings.durations['total'] * 1000
+        serialize_ms = timings.durations['serialize'] * 1000
+        render_ms = timings.durations['render'] * 1000
+        # Остальное: код представления, проверки доступа, middleware
+        app_ms = max(total_ms - db_ms - serialize_ms - render_ms, 0.0)
+        size = len(response.content) if not response.streaming else None
+        duplicates = collector.duplicates()
+
+        if self.server_timing:
+            response['Server-Timing'] = ', '.join((
+                f'db;dur={db_ms:.1f};desc="{collector.count} queries"',
+                f'serialize;dur={serialize_ms:.1f}',
+                f'render;dur={render_ms:.1f}',
+                f'app;dur={app_ms:.1f}',
+                f'total;dur={total_ms:.1f}',
+                f'cache;desc="{cache_stats["local"] + cache_stats["shared"]} hits, {cache_stats["miss"]} misses"',
+            ))
+
+        match = request.resolver_match
+        logger.info(json.dumps({
+            'view': match.view_name if match else None,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': collector.count,
+            'db_ms': round(db_ms, 2),
+            'serialize_ms': round(serialize_ms, 2),
+            'render_ms': round(render_ms, 2),
+            'app_ms': round(app_ms, 2),
+            'total_ms': round(total_ms, 2),
+            'response_bytes': size,
+            'duplicate_queries': sum(duplicates.values()) - len(duplicates),
+            'duplicates': sorted(duplicates.items(), key=lambda item: -item[1])[:5],
+            'cache_hits': cache_stats['local'] + cache_stats['shared'],
+            'cache_misses': cache_stats['miss'],
+            'cache_hit_ratio': hit_ratio(cache_stats),
+        }, ensure_ascii=False))
+        return response
@@ -0,0 +1,122 @@
+"""
+Версионированный кэш объектов в два уровня.
+
+Локальный уровень - LocMemCache процесса (LRU с MAX_ENTRIES) с коротким
+сроком жизни, общий (необязательный, например Redis) - с длинным. Чтение
+страницы - один get_many на уровень; промахи строятся одним пакетным
+запросом (build_many) и записываются в оба уровня. Версия входит в ключ,
+поэтому смена формата значения не требует очистки кэша.
+
+Инвалидация удаляет ключ из общего уровня и локального уровня текущего
+процесса; в других процессах локальная копия живет не дольше LOCAL_TIMEOUT.
+Значения, которые должны меняться во всех процессах сразу (local=False),
+при настроенном общем уровне хранятся только в нем.
+
+Попадания и промахи считаются по видам объектов для процесса (stats) и для
+текущего запроса (collect_stats, используется RequestMetricsMiddleware).
+"""
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+stats = Counter()
+_request_stats = ContextVar('object_cache_stats', default=None)
+
+
+@contextmanager
+def collect_stats():
+    """Счетчики попаданий и промахов внутри блока (для метрик запроса)"""
+    counts = Counter()
+    token = _request_stats.set(counts)
+    try:
+        yield counts
+    finally:
+        _request_stats.reset(token)
+
+
+def hit_ratio(counts):
+    hits = counts['local'] + counts['shared']
+    total = hits + counts['miss']
+    return round(hits / total, 3) if total else None
+
+
+def _record(kind, local, shared, miss):
+    request_counts = _request_stats.get()
+    for tier, value in (('local', local), ('shared', shared), ('miss', miss)):
+        if value:
+            stats[f'{kind}:{tier}'] += value
+            stats[tier] += value
+            if request_counts is not None:
+                request_counts[tier] += value
+
+
+class ObjectCache:
+    """Кэш значений вида kind по pk; build_many(pks) -> {pk: значение} для промахов"""
+
+    def __init__(self, kind, version, build_many, local=True):
+        self.kind = kind
+        self.version = version
+        self.build_many = build_many
+        self.local = local
+
+    def key(self, pk):
+        # pk может быть кортежем, например (id, версия)
+        if isinstance(pk, tuple):
+            pk = ':'.join(map(str, pk))
+        return f'{self.kind}:v{self.version}:{pk}'
+
+    def tiers(self):
+        config = settings.OBJECT_CACHE
+        local = caches[config['LOCAL']]
+        shared = caches[config['SHARED']] if config['SHARED'] else None
+        if shared is not None and not self.local:
+            local = None
+        return config, local, shared
+
+    def get_many(self, pks):
+        keys = {self.key(pk): pk for pk in pks}
+        if not keys:
+            return {}
+        config, local, shared = self.tiers()
+
+        cached = local.get_many(keys) if local is not None else {}
+        local_hits = len(cached)
+        shared_hits = 0
+        missing = [key for key in keys if key not in cached]
+        if missing and shared is not None:
+            from_shared = shared.get_many(missing)
+            if from_shared:
+                if local is not None:
+                    local.set_many(from_shared, config['LOCAL_TIMEOUT'])
+                cached.update(from_shared)
+                shared_hits = len(from_shared)
+                missing = [key for key in missing if key not in from_shared]
+
+        if missing:
+            built = {self.key(pk): value for pk, value in self.build_many([keys[key] for key in missing]).items()}
+            if built:
+                if local is not None:
+                    local.set_many(built, config['LOCAL_TIMEOUT'])
+                if shared is not None:
+                    shared.set_many(built, config['SHARED_TIMEOUT'])
+                cached.update(built)
+
+        _record(self.kind, local_hits, shared_hits, len(missing))
+        return {keys[key]: value for key, value in cached.items()}
+
+    def invalidate(self, pks):
+        """Удалить значения после фиксации текущей транзакции"""
+        keys = [self.key(pk) for pk in pks]
+        if keys:
+            transaction.on_commit(lambda: self.delete_many(keys))
+
+    def delete_many(self, keys):
+        _, local, shared = self.tiers()
+        if local is not None:
+            local.delete_many(keys)
+        if shared is not None:
+            shared.delete_many(keys)
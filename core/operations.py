@@ -0,0 +1,62 @@
+"""Операции миграций, которые учитывают возможности конкретной СУБД."""
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db.migrations.operations import AddField, AddIndex
+
+
+class PortableAddIndexConcurrently(AddIndexConcurrently):
+    """
+    CREATE INDEX CONCURRENTLY на PostgreSQL (без блокировки записи в таблицу)
+    и обычный CREATE INDEX на остальных СУБД, например на SQLite в бенчмарках.
+    Миграция с этой операцией должна объявлять atomic = False.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+        else:
+            AddIndex.database_forwards(self, app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+        else:
+            AddIndex.database_backwards(self, app_label, schema_editor, from_state, to_state)
+
+
+class PostgresAddIndexConcurrently(AddIndexConcurrently):
+    """
+    Индекс, который есть только в PostgreSQL (GIN, pg_trgm): создается
+    CONCURRENTLY, на остальных СУБД операция ничего не делает.
+    Миграция с этой операцией должна объявлять atomic = False.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+class AddFieldWithoutRebuild(AddField):
+    """
+    AddField, который на SQLite добавляет столбец через ALTER TABLE ADD COLUMN
+    с DEFAULT, а не пересозданием таблицы: пересоздание повторяет все индексы
+    модели, включая индексы только для PostgreSQL (PostgresAddIndexConcurrently),
+    и падает на них. Подходит для полей NOT NULL с постоянным значением по умолчанию.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != 'sqlite':
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+        field = model._meta.get_field(self.name)
+        definition, params = schema_editor.column_sql(model, field, include_default=True)
+        schema_editor.execute(
+            f'ALTER TABLE {schema_editor.quote_name(model._meta.db_table)} '
+            f'ADD COLUMN {schema_editor.quote_name(field.column)} {definition}',
+            params,
+        )
@@ -0,0 +1,149 @@
+import base64
+import binascii
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Курсорная (keyset) пагинация по паре (created_at, id).
+    Страница выбирается условием WHERE по последней позиции, поэтому любая
+    страница стоит столько же, сколько первая, а COUNT(*) не выполняется.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = 'limit'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Неверный курсор'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.finish_page(list(self.page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """То же для асинхронных представлений (async ORM)"""
+        return self.finish_page([item async for item in self.page_queryset(queryset, request)])
+
+    def page_queryset(self, queryset, request):
+        self.request = request
+        self.limit = self.get_page_size(request)
+        self.next_position = None
+
+        key_field, pk_field = self.key_fields()
+        queryset = queryset.order_by(*self.ordering)
+
+        position = self.decode_cursor(request)
+        if position is not None:
+            value, pk = position
+            lookup = 'lt' if self.ordering[0].startswith('-') else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'{key_field}__{lookup}': value})
+                | Q(**{key_field: value, f'{pk_field}__{lookup}': pk})
+            )
+
+        # Берем на одну запись больше, чтобы узнать, есть ли следующая страница
+        return queryset[:self.limit + 1]
+
+    def finish_page(self, results):
+        if len(results) > self.limit:
+            results = results[:self.limit]
+            last = results[-1]
+            key_field, pk_field = self.key_fields()
+            self.next_position = (getattr(last, key_field), getattr(last, pk_field))
+        return results
+
+    def key_fields(self):
+        return tuple(field.lstrip('-') for field in self.ordering)
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            decoded = base64.urlsafe_b64decode(encoded.encode('ascii')).decode('ascii')
+            value, pk = decoded.rsplit('|', 1)
+            value = parse_datetime(value)
+            pk = int(pk)
+        except (binascii.Error, UnicodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if value is None:
+            raise NotFound(self.invalid_cursor_message)
+        return value, pk
+
+    def encode_cursor(self, position):
+        value, pk = position
+        raw = f'{value.isoformat()}|{pk}'
+        return base64.urlsafe_b64encode(raw.encode('ascii')).decode('ascii')
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Курсор следующей страницы',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': f'Размер страницы (не больше {self.max_page_size})',
+                'schema': {'type': 'integer'},
+            },
+        ]
+
+
+class ChronologicalKeysetPagination(KeysetPagination):
+    """Курсорная пагинация от старых записей к новым (комментарии)"""
+    ordering = ('created_at', 'id')
+
+
+class PostLinkKeysetPagination(KeysetPagination):
+    """Курсорная пагинация по таблице-индексу с копией даты поста (created_at, post_id)"""
+    ordering = ('-created_at', '-post_id')
+
+
+class RankedListPagination(LimitOffsetPagination):
+    """
+    Пагинация по готовому упорядоченному списку (например, ID из кэша).
+    Подсчет количества - len() списка в памяти, без запроса к БД.
+    """
+    default_limit = 20
+    max_limit = 100
@@ -0,0 +1,179 @@
+"""
+Уменьшенные копии (renditions) загруженных изображений.
+
+После загрузки оригинала фоновая задача (см. apps.jobs) создает миниатюры фиксированных
+размеров в нескольких форматах (WebP, AVIF, JPEG). Ориентация из EXIF
+применяется к пикселям, сами метаданные (в том числе геолокация) в копии не
+попадают. Прозрачность исходника сохраняется в WebP и AVIF, в JPEG она
+заменяется белым фоном. Имена файлов сохраняются в JSON-поле модели
+renditions, а сериализаторы отдают клиенту URL подходящего размера вместо
+оригинала.
+
+Оригинал тоже отдается клиентам, поэтому еще при загрузке сериализатор
+перекодирует его без метаданных (strip_metadata).
+"""
+import posixpath
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.dispatch import Signal
+from django.utils import timezone
+from PIL import Image, ImageOps, features
+
+from apps.jobs.queue import enqueue, task
+
+FORMAT_OPTIONS = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+    'avif': {'format': 'AVIF', 'quality': 60},
+    'jpeg': {'format': 'JPEG', 'quality': 85, 'optimize': True, 'progressive': True},
+}
+
+# Форматы с альфа-каналом; для остальных прозрачные копии кладутся на белый фон
+ALPHA_FORMATS = {'webp', 'avif'}
+
+# Перекодирование оригинала: Pillow не переносит EXIF, если его не передать в save().
+# Остальные форматы (например, GIF) сохраняются как есть
+ORIGINAL_OPTIONS = {
+    'JPEG': {'format': 'JPEG', 'quality': 95},
+    'MPO': {'format': 'JPEG', 'quality': 95},
+    'PNG': {'format': 'PNG', 'optimize': True},
+    'WEBP': {'format': 'WEBP', 'quality': 95},
+}
+
+# Отправляется после записи копий через update() (post_save при этом не срабатывает)
+renditions_updated = Signal()
+
+
+def strip_metadata(upload):
+    """
+    Загруженное изображение без EXIF (в том числе геолокации) и текстовых
+    метаданных; ориентация применяется к пикселям, цветовой профиль сохраняется
+    """
+    upload.seek(0)
+    image = Image.open(upload)
+    options = ORIGINAL_OPTIONS.get(image.format)
+    if options is None:
+        upload.seek(0)
+        return upload
+    icc_profile = image.info.get('icc_profile')
+    image = ImageOps.exif_transpose(image)
+    if icc_profile:
+        options = {**options, 'icc_profile': icc_profile}
+    buffer = BytesIO()
+    image.save(buffer, **options)
+    return ContentFile(buffer.getvalue(), name=posixpath.basename(upload.name))
+
+
+def has_alpha(image):
+    return image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info
+
+
+def flatten(image):
+    """RGBA -> RGB на белом фоне"""
+    background = Image.new('RGB', image.size, (255, 255, 255))
+    background.paste(image, mask=image.getchannel('A'))
+    return background
+
+
+def available_formats():
+    """Форматы из настроек, которые поддерживает установленный Pillow"""
+    return [fmt for fmt in settings.IMAGE_RENDITION_FORMATS if fmt == 'jpeg' or features.check(fmt)]
+
+
+def rendition_name(original_name, label, fmt):
+    stem, _ = posixpath.splitext(original_name)
+    return f'renditions/{stem}_{label}.{fmt}'
+
+
+def render(image, size, crop):
+    """Квадрат size x size (crop) или вписанное в size x size изображение"""
+    if crop:
+        return ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+    copy = image.copy()
+    copy.thumbnail((size, size), Image.Resampling.LANCZOS)
+    return copy
+
+
+def generate_renditions(name, preset):
+    """Создать все копии для файла name по набору размеров preset"""
+    with default_storage.open(name, 'rb') as source:
+        image = Image.open(source)
+        image = ImageOps.exif_transpose(image)
+        image = image.convert('RGBA' if has_alpha(image) else 'RGB')
+
+    renditions = {}
+    for label, size, crop in settings.IMAGE_RENDITIONS[preset]:
+        resized = render(image, size, crop)
+        opaque = flatten(resized) if resized.mode == 'RGBA' else resized
+        renditions[label] = {}
+        for fmt in available_formats():
+            buffer = BytesIO()
+            # Метаданные не передаются в save(), поэтому EXIF в копию не попадает
+            (resized if fmt in ALPHA_FORMATS else opaque).save(buffer, **FORMAT_OPTIONS[fmt])
+            target = rendition_name(name, label, fmt)
+            if default_storage.exists(target):
+                default_storage.delete(target)
+            renditions[label][fmt] = default_storage.save(target, ContentFile(buffer.getvalue()))
+    return renditions
+
+
+def rendition_files(renditions):
+    return {name for formats in (renditions or {}).values() for name in formats.values()}
+
+
+def delete_renditions(renditions, keep=None):
+    """Удалить файлы копий (кроме перечисленных в keep)"""
+    for name in rendition_files(renditions) - rendition_files(keep):
+        default_storage.delete(name)
+
+
+@task(max_attempts=3)
+def process_renditions(model, pk, field_name, name, preset):
+    """Создать копии и сохранить их имена в объекте (выполняется в фоне)"""
+    model = apps.get_model(model)
+    # Если файл уже заменили, копии для него не нужны
+    if not model.objects.filter(pk=pk, **{field_name: name}).exists():
+        return
+    renditions = generate_renditions(name, preset)
+    previous = model.objects.filter(pk=pk).values_list('renditions', flat=True).first()
+    changes = {'renditions': renditions}
+    # update() не трогает auto_now: без новой даты изменения ETag поста,
+    # ленты и профиля остался бы прежним и клиент не увидел бы копий
+    if any(field.name == 'updated_at' for field in model._meta.concrete_fields):
+        changes['updated_at'] = timezone.now()
+    updated = model.objects.filter(pk=pk, **{field_name: name}).update(**changes)
+    if updated:
+        delete_renditions(previous, keep=renditions)
+        renditions_updated.send(sender=model, pk=pk)
+    else:
+        delete_renditions(renditions)
+
+
+def schedule_renditions(instance, field_name, preset):
+    """Поставить создание копий в очередь фоновых задач"""
+    name = getattr(instance, field_name).name
+    if not name:
+        return
+    enqueue(
+        process_renditions,
+        idempotency_key=f'renditions:{instance._meta.label_lower}:{instance.pk}:{name}',
+        model=instance._meta.label_lower,
+        pk=instance.pk,
+        field_name=field_name,
+        name=name,
+        preset=preset,
+    )
+
+
+def rendition_urls(renditions, request=None):
+    """{размер: {формат: абсолютный URL}} для ответа API"""
+    urls = {}
+    for label, formats in (renditions or {}).items():
+        urls[label] = {}
+        for fmt, name in formats.items():
+            url = default_storage.url(name)
+            urls[label][fmt] = request.build_absolute_uri(url) if request else url
+    return urls
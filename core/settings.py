@@ -33,6 +33,8 @@ ALLOWED_HOSTS = os.getenv('ALLOWED_HOSTS', '127.0.0.1,localhost').split(',')
 MY_APPS = [
     'apps.accounts',
     'apps.posts',
+    'apps.jobs',
+    'apps.search',
 ]
 THIRD_PARTY_APPS = [
     'rest_framework',
@@ -48,9 +50,11 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 ] + MY_APPS + THIRD_PARTY_APPS
 
 MIDDLEWARE = [
+    'core.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -95,6 +99,33 @@ DATABASES = {
     }
 }
 
+# Кэш: общий Redis, если задан REDIS_URL (нужен пакет redis), иначе память процесса.
+# 'objects' - локальный LRU-уровень кэша объектов (core.object_cache)
+REDIS_URL = os.getenv('REDIS_URL', '')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    } if REDIS_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'default',
+    },
+    'objects': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'objects',
+        'OPTIONS': {'MAX_ENTRIES': 20000, 'CULL_FREQUENCY': 10},
+    },
+}
+
+# Кэш карточек пользователей и сводок постов: локальный уровень живет
+# недолго (инвалидация не доходит до других процессов), общий - дольше
+OBJECT_CACHE = {
+    'LOCAL': 'objects',
+    'LOCAL_TIMEOUT': 30,
+    'SHARED': 'default' if REDIS_URL else None,
+    'SHARED_TIMEOUT': 600,
+}
+
 
 
 
@@ -124,7 +155,7 @@ REST_FRAMEWORK = {
     ),
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.accounts.authentication.StatelessJWTAuthentication',
     ),
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
@@ -169,3 +200,88 @@ SPECTACULAR_SETTINGS = {
 }
 
 AUTH_USER_MODEL = 'accounts.User'
+
+# Метрики запросов (SQL, время, Server-Timing): доля запросов, которые замеряются
+REQUEST_METRICS = {
+    'SAMPLE_RATE': float(os.getenv('REQUEST_METRICS_SAMPLE_RATE', '1.0' if DEBUG else '0.01')),
+    'SERVER_TIMING': True,
+    'LOG_FILE': os.getenv('REQUEST_METRICS_LOG_FILE', ''),
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'json_line': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'metrics': (
+            {
+                'class': 'logging.FileHandler',
+                'filename': REQUEST_METRICS['LOG_FILE'],
+                'formatter': 'json_line',
+            } if REQUEST_METRICS['LOG_FILE'] else {
+                'class': 'logging.StreamHandler',
+                'formatter': 'json_line',
+            }
+        ),
+    },
+    'loggers': {
+        'core.metrics': {
+            'handlers': ['metrics'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+# Материализованная лента: авторы с большим числом подписчиков читаются при запросе
+FEED_FANOUT_FOLLOWER_LIMIT = int(os.getenv('FEED_FANOUT_FOLLOWER_LIMIT', 10000))
+FEED_MAX_LENGTH = 1000
+FEED_BACKFILL_SIZE = 100
+
+# Рекомендации (Explore): пул кандидатов пересчитывается командой rank_explore
+EXPLORE_POOL_SIZE = 1000
+EXPLORE_LOOKBACK_DAYS = 7
+EXPLORE_VIEWER_CACHE_TIMEOUT = 120
+
+# Пакетные подписки и лайки: наибольший размер списка в одном запросе
+BULK_ACTION_MAX_ITEMS = 100
+
+# Рекомендации пользователей: сколько хранить на пользователя и размер пакета расчета
+SUGGESTIONS_PER_USER = 50
+SUGGESTIONS_BATCH_SIZE = 500
+
+# Сколько недавно отключенных пользователей помнит процесс (apps.accounts.authentication)
+JWT_REVOKED_USERS_MAX_ENTRIES = 10000
+
+# Хэштеги: тренды по числу новых постов за последние дни
+TAGS_TRENDING_DAYS = 7
+TAGS_TRENDING_SIZE = 20
+
+# Места: поиск постов рядом с точкой
+LOCATIONS_NEARBY_DEFAULT_RADIUS_KM = 1
+LOCATIONS_NEARBY_MAX_RADIUS_KM = 50
+LOCATIONS_NEARBY_MAX_PLACES = 500
+
+# Поиск: сколько лучших результатов ранжируется и отдается постранично
+SEARCH_MAX_RESULTS = 200
+
+# Уменьшенные копии изображений: (название, размер в px, обрезать до квадрата)
+IMAGE_RENDITIONS = {
+    'post': [('thumb', 150, True), ('small', 320, False), ('medium', 640, False), ('large', 1080, False)],
+    'story': [('thumb', 150, True), ('medium', 720, False)],
+    'avatar': [('small', 40, True), ('medium', 80, True), ('large', 150, True)],
+}
+IMAGE_RENDITION_FORMATS = ['webp', 'avif', 'jpeg']
+
+# Очередь фоновых задач (apps.jobs): выполняется командой runworker.
+# ALWAYS_EAGER выполняет задачи сразу после коммита, без воркера
+JOBS = {
+    'ALWAYS_EAGER': os.getenv('JOBS_ALWAYS_EAGER', 'False').lower() in ['1', 'true', 'yes'],
+    'MAX_ATTEMPTS': 5,
+    'RETRY_BACKOFF': 10,
+    'RETRY_BACKOFF_MAX': 3600,
+    'STALE_AFTER': 600,
+    'KEEP_DONE_DAYS': 7,
+}
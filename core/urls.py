@@ -36,6 +36,7 @@ urlpatterns = [
     path('api/v1/', include(swagger_patterns)),
     path('api/posts/', include('apps.posts.urls')),
     path('api/accounts/', include('apps.accounts.urls')),
+    path('api/search/', include('apps.search.urls')),
     path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
 ]